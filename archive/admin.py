@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import Bundle, Category, DonationLink, Resource, Tag
+from .models import Bundle, Category, DonationLink, Resource, Tag, Task
+from .tasks import retry
 
 
 @admin.register(Category)
@@ -58,3 +59,16 @@ class BundleAdmin(admin.ModelAdmin):
     search_fields = ('title', 'description')
     prepopulated_fields = {'slug': ('title',)}
     filter_horizontal = ('resources',)
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('name', 'queue', 'status', 'attempts', 'max_attempts', 'run_at', 'finished_at')
+    list_filter = ('status', 'queue')
+    search_fields = ('name', 'last_error')
+    readonly_fields = ('created_at', 'finished_at', 'locked_by', 'locked_at', 'last_error')
+    actions = ('retry_tasks',)
+
+    @admin.action(description='Перезапустить (dead → в очередь)')
+    def retry_tasks(self, request, queryset):
+        self.message_user(request, f'Поставлено в очередь: {retry(queryset)}')
@@ -5,4 +5,5 @@ class ArchiveConfig(AppConfig):
     name = "archive"
 
     def ready(self):
-        import archive.signals
\ No newline at end of file
+        import archive.checks
+        import archive.signals
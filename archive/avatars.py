@@ -0,0 +1,205 @@
+# archive/avatars.py
+"""
+Миниатюры аватаров.
+
+В ленте, комментариях и шапке аватар показывается размером 28–40px,
+а раньше в <img> уходил оригинал — иногда в несколько мегабайт. Теперь
+при загрузке (ProfileForm) и при входе через Google (avatar_url в
+archive.pipeline.save_profile) из картинки делаются квадратные
+миниатюры AVATAR_SIZES в WebP (JPEG — если Pillow собран без WebP).
+Они лежат рядом с оригиналом, их имена — в Profile.avatar_thumbnails,
+поэтому тег {% avatar_url %} (archive/templatetags/avatars.py) выбирает
+размер без обращений к storage.
+
+Обе операции выполняет воркер очереди (make_upload_thumbnails,
+fetch_google_avatar ниже): запрос сохранения профиля и вход через Google
+не ждут декодирования картинки и скачивания с googleusercontent.
+
+Существующие аватары: manage.py make_avatar_thumbnails.
+"""
+import hashlib
+import io
+import posixpath
+from urllib.request import Request, urlopen
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+
+from .tasks import task
+
+# Стороны миниатюр, px. Показываются с запасом ×2 под retina:
+# 28–40px в шапке и ленте → 80, превью в профиле (96px) → 192.
+AVATAR_SIZES = (40, 80, 192)
+
+# Больше — не аватар, а попытка положить воркер
+MAX_SOURCE_PIXELS = 40_000_000
+MAX_DOWNLOAD_BYTES = 5 * 1024 * 1024
+DOWNLOAD_TIMEOUT = 5
+
+GOOGLE_AVATARS_DIR = "avatars/google/"
+
+if features.check("webp"):
+    THUMB_FORMAT, THUMB_EXT, THUMB_OPTIONS = "WEBP", "webp", {"quality": 82, "method": 4}
+else:
+    THUMB_FORMAT, THUMB_EXT, THUMB_OPTIONS = "JPEG", "jpg", {"quality": 85, "optimize": True}
+
+
+class AvatarError(Exception):
+    pass
+
+
+def _open(source):
+    try:
+        image = Image.open(source)
+    except (UnidentifiedImageError, OSError) as exc:
+        raise AvatarError(f"Не картинка: {exc}") from exc
+    width, height = image.size
+    if width * height > MAX_SOURCE_PIXELS:
+        raise AvatarError("Слишком большое изображение")
+    # JPEG декодируется сразу в уменьшенном виде — в разы быстрее
+    image.draft("RGB", (max(AVATAR_SIZES) * 2, max(AVATAR_SIZES) * 2))
+    image = ImageOps.exif_transpose(image)
+    has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+    if not has_alpha:
+        return image.convert("RGB")
+    image = image.convert("RGBA")
+    if THUMB_FORMAT == "JPEG":
+        # у JPEG нет прозрачности — кладём на белый фон
+        background = Image.new("RGB", image.size, "white")
+        background.paste(image, mask=image.getchannel("A"))
+        image = background
+    return image
+
+
+def render_thumbnails(source):
+    """{сторона: байты миниатюры} из файла / file-like с картинкой."""
+    result = {}
+    try:
+        image = _open(source)
+        # от большей к меньшей: каждая следующая считается из предыдущей
+        for size in sorted(AVATAR_SIZES, reverse=True):
+            image = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+            buffer = io.BytesIO()
+            image.save(buffer, THUMB_FORMAT, **THUMB_OPTIONS)
+            result[size] = buffer.getvalue()
+    except (OSError, Image.DecompressionBombError) as exc:
+        # обрезанный / битый файл падает уже при декодировании
+        raise AvatarError(f"Не удалось обработать картинку: {exc}") from exc
+    return result
+
+
+def _store(profile, base, thumbnails):
+    """Кладёт миниатюры в storage и записывает их имена в профиль."""
+    old = set((profile.avatar_thumbnails or {}).values())
+    names = {}
+    for size, data in thumbnails.items():
+        name = f"{base}.{size}.{THUMB_EXT}"
+        if default_storage.exists(name):
+            default_storage.delete(name)
+        names[str(size)] = default_storage.save(name, ContentFile(data))
+    for name in old - set(names.values()):
+        default_storage.delete(name)
+    profile.avatar_thumbnails = names
+
+
+def update_from_upload(profile):
+    """Миниатюры для загруженного Profile.avatar (или их удаление, если аватар снят)."""
+    if not profile.avatar:
+        clear(profile)
+        return
+    profile.avatar.open("rb")
+    try:
+        thumbnails = render_thumbnails(profile.avatar)
+    except AvatarError:
+        # без миниатюр покажется оригинал
+        clear(profile)
+        return
+    finally:
+        profile.avatar.close()
+    base, _ = posixpath.splitext(profile.avatar.name)
+    _store(profile, base, thumbnails)
+    profile.avatar_source = ""
+
+
+def update_from_url(profile, url):
+    """
+    Миниатюры из Google avatar_url. Своя загруженная картинка важнее —
+    её не трогаем. Повторно тот же URL не качаем.
+    """
+    if not needs_google_fetch(profile, url):
+        return False
+    request = Request(url, headers={"User-Agent": "webarchive-avatar/1.0"})
+    try:
+        with urlopen(request, timeout=DOWNLOAD_TIMEOUT) as response:
+            data = response.read(MAX_DOWNLOAD_BYTES + 1)
+    except (OSError, ValueError):
+        return False
+    if len(data) > MAX_DOWNLOAD_BYTES:
+        return False
+    try:
+        thumbnails = render_thumbnails(io.BytesIO(data))
+    except AvatarError:
+        return False
+    digest = hashlib.sha256(url.encode("utf-8")).hexdigest()[:12]
+    _store(profile, f"{GOOGLE_AVATARS_DIR}{profile.user_id}-{digest}", thumbnails)
+    profile.avatar_source = url
+    return True
+
+
+def clear(profile):
+    for name in (profile.avatar_thumbnails or {}).values():
+        default_storage.delete(name)
+    profile.avatar_thumbnails = {}
+    profile.avatar_source = ""
+
+
+def thumbnail_url(profile, size):
+    """
+    URL миниатюры для показа в size px (с запасом ×2), иначе оригинал
+    или Google URL, иначе "".
+    """
+    thumbnails = profile.avatar_thumbnails or {}
+    if thumbnails:
+        wanted = size * 2
+        available = sorted(int(key) for key in thumbnails)
+        chosen = next((side for side in available if side >= wanted), available[-1])
+        return default_storage.url(thumbnails[str(chosen)])
+    if profile.avatar:
+        return profile.avatar.url
+    return profile.avatar_url or ""
+
+
+# =========================
+# Фоновые задачи
+# =========================
+def _profile(profile_id):
+    from .models import Profile
+
+    return Profile.objects.filter(pk=profile_id).first()
+
+
+@task(max_attempts=3, retry_delay=60)
+def make_upload_thumbnails(profile_id):
+    profile = _profile(profile_id)
+    if profile is None:
+        return
+    update_from_upload(profile)
+    profile.save(update_fields=["avatar_thumbnails", "avatar_source"])
+
+
+@task(max_attempts=3, retry_delay=300)
+def fetch_google_avatar(profile_id, url):
+    profile = _profile(profile_id)
+    if profile is None or profile.avatar_url != url:
+        # пока задача ждала, аватар сменился — качать уже нечего
+        return
+    if update_from_url(profile, url):
+        profile.save(update_fields=["avatar_thumbnails", "avatar_source"])
+
+
+def needs_google_fetch(profile, url):
+    """Стоит ли ставить fetch_google_avatar: та же проверка, что в update_from_url."""
+    return bool(url) and not profile.avatar and not (
+        profile.avatar_source == url and profile.avatar_thumbnails
+    )
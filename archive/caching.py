@@ -0,0 +1,144 @@
+# archive/caching.py
+"""
+Кэширование блоков страниц и целых ответов с инвалидацией по сигналам.
+
+Вместо подбора TTL у каждой модели есть «версия» в кэше. Ключ блока
+включает версии всех моделей, от которых он зависит; archive/signals.py
+увеличивает версию при save / delete / изменении M2M, и старые ключи
+просто перестают запрашиваться. Версии хранятся без срока, сами блоки
+и ответы — DEFAULT_TIMEOUT бэкенда (CACHES["default"]["TIMEOUT"]):
+осиротевшие ключи уходят по TTL, а не копятся до вытеснения.
+
+Бэкенд кэша настраивается в settings.CACHES (locmem / file / redis).
+Версии должны быть общими для всех процессов: при нескольких воркерах
+gunicorn с locmem сохранение в одном воркере не сбросит кэш в остальных.
+Поэтому вне DEBUG нужен file или redis — об этом предупреждает проверка
+archive.W001 (archive/checks.py).
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.contrib.messages import get_messages
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.http import HttpResponse
+from django.utils.functional import SimpleLazyObject
+
+from .metrics import cache_result
+
+CACHE_ALIAS = "default"
+VERSION_KEY = "cachever:{label}"
+
+_MISSING = object()
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def _version_key(model):
+    return VERSION_KEY.format(label=model._meta.label_lower)
+
+
+def get_versions(*models):
+    """Текущие версии моделей одним get_many; отсутствующие заводятся заново."""
+    cache = _cache()
+    keys = [_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # время в наносекундах, а не 1: после вытеснения ключа версии
+            # нельзя случайно вернуться к старым закэшированным блокам
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def versioned_key(name, models, *parts):
+    versions = ".".join(str(v) for v in get_versions(*models))
+    suffix = ":".join(str(p) for p in parts)
+    return f"block:{name}:{suffix}:{versions}"
+
+
+def bump(*models):
+    """Инвалидирует все блоки, зависящие от переданных моделей."""
+    cache = _cache()
+    for model in models:
+        key = _version_key(model)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+
+
+def cached_value(name, models, builder, *parts, timeout=DEFAULT_TIMEOUT):
+    """Значение блока из кэша или builder() с сохранением."""
+    cache = _cache()
+    key = versioned_key(name, models, *parts)
+    value = cache.get(key, _MISSING)
+    cache_result("block", value is not _MISSING)
+    if value is _MISSING:
+        value = builder()
+        cache.set(key, value, timeout)
+    return value
+
+
+def cached_block(name, models, builder, *parts, timeout=DEFAULT_TIMEOUT):
+    """
+    Ленивый вариант cached_value для контекста шаблона: ни кэш, ни БД
+    не трогаются, пока шаблон действительно не обратится к блоку.
+    """
+    return SimpleLazyObject(lambda: cached_value(name, models, builder, *parts, timeout=timeout))
+
+
+def cache_response(*models, timeout=DEFAULT_TIMEOUT, query_params=()):
+    """
+    Декоратор вьюхи: кэширует готовый ответ для анонимных GET/HEAD-запросов.
+
+    Авторизованным пользователям страница собирается заново (в шапке их
+    профиль и CSRF-токен), как и любому запросу с непоказанными сообщениями.
+
+    Ключ — путь и только GET-параметры из query_params. Запрос с другими
+    параметрами (?utm_source=..., ?x=<случайное>) отдаётся без кэша: иначе
+    каждый вариант строки запроса заводил бы свою копию страницы.
+    """
+
+    allowed = set(query_params)
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            cacheable = (
+                request.method in ("GET", "HEAD")
+                and not request.user.is_authenticated
+                and set(request.GET) <= allowed
+                and not len(get_messages(request))
+            )
+            if not cacheable:
+                return view_func(request, *args, **kwargs)
+
+            params = sorted((name, request.GET.getlist(name)) for name in request.GET)
+            path_hash = hashlib.md5(f"{request.path}?{params}".encode()).hexdigest()
+            key = versioned_key("response", models, path_hash)
+            cache = _cache()
+            cached = cache.get(key)
+            cache_result("response", cached is not None)
+            if cached is not None:
+                status, content_type, content = cached
+                return HttpResponse(content, status=status, content_type=content_type)
+
+            response = view_func(request, *args, **kwargs)
+            if hasattr(response, "render") and callable(response.render):
+                response = response.render()
+            if response.status_code == 200 and not response.streaming:
+                cache.set(
+                    key,
+                    (response.status_code, response["Content-Type"], response.content),
+                    timeout,
+                )
+            return response
+
+        return wrapper
+
+    return decorator
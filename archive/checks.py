@@ -0,0 +1,29 @@
+# archive/checks.py
+from django.conf import settings
+from django.core.checks import Warning, register
+
+LOCAL_CACHE_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Версии моделей в кэше (archive/caching.py) сбрасываются сигналами в том
+    процессе, где сохранили модель. С кэшем внутри процесса остальные
+    воркеры gunicorn продолжат отдавать устаревшие блоки и ответы.
+    """
+    backend = settings.CACHES.get("default", {}).get("BACKEND", "")
+    if settings.DEBUG or backend not in LOCAL_CACHE_BACKENDS:
+        return []
+    return [
+        Warning(
+            "Кэш по умолчанию живёт внутри процесса — инвалидация блоков и "
+            "ответов не дойдёт до других воркеров.",
+            hint="DJANGO_CACHE_BACKEND=redis (или file) для продакшена.",
+            obj=backend,
+            id="archive.W001",
+        )
+    ]
@@ -0,0 +1,18 @@
+from django.utils.functional import SimpleLazyObject
+
+from .profiles import display_for
+
+
+def current_profile(request):
+    """
+    {{ current_profile.name }} / .avatar / .initial для шапки. Лениво:
+    кэш не трогается, пока шаблон не обратится к current_profile.
+    """
+    user = getattr(request, "user", None)
+    if user is None:
+        return {}
+    return {
+        "current_profile": SimpleLazyObject(
+            lambda: display_for(user) if user.is_authenticated else {}
+        )
+    }
@@ -0,0 +1,305 @@
+# archive/downloads.py
+"""
+Отдача файлов: вложения проектов (hub.views.project_download) и медиа
+(archive.views.serve_media вместо django.views.static.serve).
+
+- ETag / Last-Modified и условные запросы (If-None-Match,
+  If-Modified-Since, ...) — 304 без открытия файла;
+- Range: bytes=a-b → 206 с Content-Range, докачка после обрыва;
+  If-Range с устаревшим валидатором — файл целиком;
+- если перед приложением стоит прокси (DOWNLOADS_OFFLOAD), файл отдаёт он:
+  "x-accel" — nginx по X-Accel-Redirect (internal location с префиксом
+  DOWNLOADS_ACCEL_PREFIX), "x-sendfile" — Apache / lighttpd по X-Sendfile.
+  Воркер в этом случае освобождается сразу после заголовков;
+- без прокси файл целиком уходит через FileResponse (wsgi.file_wrapper →
+  sendfile у gunicorn), диапазон — потоком кусками по CHUNK_SIZE.
+
+Скачивания считаются в памяти процесса и сбрасываются в БД фоновым
+потоком раз в DOWNLOAD_COUNTER_FLUSH_SECONDS: на запрос нет ни одной
+записи в БД. Докачка (Range не с нулевого байта) скачиванием не считается.
+Считаются только скачивания через вьюхи записи (project_download,
+resource_download): один файл в storage может принадлежать нескольким
+записям (общие blob-ы archive/uploads.py), поэтому по пути /media/ не считаем.
+"""
+import atexit
+import logging
+import mimetypes
+import os
+import posixpath
+import re
+import threading
+from collections import Counter
+from urllib.parse import quote
+
+from django.apps import apps
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+RANGE_RE = re.compile(r"^\s*bytes\s*=\s*(\d*)\s*-\s*(\d*)\s*$", re.IGNORECASE)
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+# =========================
+# Метаданные файла
+# =========================
+class StoredFile:
+    """Файл в storage: размер, время изменения и валидаторы для кэшей."""
+
+    def __init__(self, storage, name):
+        self.storage = storage
+        self.name = name
+        try:
+            self.path = storage.path(name)
+        except NotImplementedError:
+            # удалённое хранилище — без X-Sendfile
+            self.path = None
+        try:
+            if self.path is not None:
+                stat = os.stat(self.path)
+                self.size = stat.st_size
+                self.mtime = stat.st_mtime
+            else:
+                self.size = storage.size(name)
+                self.mtime = storage.get_modified_time(name).timestamp()
+        except (FileNotFoundError, NotADirectoryError):
+            raise Http404("Файл не найден")
+        if self.path is not None and not os.path.isfile(self.path):
+            raise Http404("Файл не найден")
+
+        self.etag = f'"{self.size:x}-{int(self.mtime * 1000000):x}"'
+        self.last_modified = http_date(self.mtime)
+        content_type, encoding = mimetypes.guess_type(name)
+        if encoding:
+            # .tar.gz и т.п. отдаём как есть, без Content-Encoding
+            content_type = "application/octet-stream"
+        self.content_type = content_type or "application/octet-stream"
+
+    def open(self):
+        return self.storage.open(self.name, "rb")
+
+
+def parse_range(header, size):
+    """
+    (start, end) включительно для одиночного диапазона «bytes=…», None —
+    если заголовок не разобран или диапазонов несколько (тогда файл
+    отдаётся целиком, RFC 9110 это разрешает). RangeNotSatisfiable — если
+    диапазон за концом файла.
+    """
+    match = RANGE_RE.match(header or "")
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # bytes=-N — последние N байт
+        length = int(last)
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable
+        return max(size - length, 0), size - 1
+    start = int(first)
+    if start >= size:
+        raise RangeNotSatisfiable
+    end = int(last) if last else size - 1
+    if start > end:
+        return None
+    return start, min(end, size - 1)
+
+
+def _if_range_matches(request, stored):
+    value = request.META.get("HTTP_IF_RANGE")
+    if not value:
+        return True
+    if value.startswith('"') or value.startswith("W/"):
+        # слабый ETag для If-Range не годится
+        return value == stored.etag
+    since = parse_http_date_safe(value)
+    return since is not None and int(stored.mtime) <= since
+
+
+class RangeFileIterator:
+    """Кусок файла [start, start + length) кусками по CHUNK_SIZE."""
+
+    def __init__(self, file, start, length, chunk_size=CHUNK_SIZE):
+        self.file = file
+        self.start = start
+        self.remaining = length
+        self.chunk_size = chunk_size
+
+    def __iter__(self):
+        self.file.seek(self.start)
+        while self.remaining > 0:
+            chunk = self.file.read(min(self.chunk_size, self.remaining))
+            if not chunk:
+                break
+            self.remaining -= len(chunk)
+            yield chunk
+
+    def close(self):
+        self.file.close()
+
+
+# =========================
+# Ответ
+# =========================
+def _set_common_headers(response, stored, filename, as_attachment):
+    response["ETag"] = stored.etag
+    response["Last-Modified"] = stored.last_modified
+    response["Accept-Ranges"] = "bytes"
+    if filename or as_attachment:
+        disposition = content_disposition_header(
+            as_attachment, filename or posixpath.basename(stored.name)
+        )
+        if disposition:
+            response["Content-Disposition"] = disposition
+    return response
+
+
+def _offload(stored):
+    mode = getattr(settings, "DOWNLOADS_OFFLOAD", "")
+    if mode == "x-accel":
+        response = HttpResponse(content_type=stored.content_type)
+        prefix = settings.DOWNLOADS_ACCEL_PREFIX.rstrip("/")
+        response["X-Accel-Redirect"] = f"{prefix}/{quote(stored.name)}"
+        return response
+    if mode == "x-sendfile" and stored.path is not None:
+        response = HttpResponse(content_type=stored.content_type)
+        response["X-Sendfile"] = stored.path
+        return response
+    return None
+
+
+def serve_file(request, storage, name, *, filename=None, as_attachment=False, count=None):
+    """
+    Ответ на GET / HEAD за файлом name из storage.
+    count — ключ счётчика скачиваний (см. DownloadCounter.record) или None.
+    """
+    stored = StoredFile(storage, name)
+
+    conditional = get_conditional_response(
+        request, etag=stored.etag, last_modified=int(stored.mtime)
+    )
+    if conditional is not None:
+        return _set_common_headers(conditional, stored, None, False)
+
+    byte_range = None
+    range_header = request.META.get("HTTP_RANGE")
+    if range_header and _if_range_matches(request, stored):
+        try:
+            byte_range = parse_range(range_header, stored.size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{stored.size}"
+            return _set_common_headers(response, stored, None, False)
+
+    if count is not None and request.method == "GET" and (byte_range is None or byte_range[0] == 0):
+        download_counter.record(count)
+
+    response = _offload(stored)
+    if response is not None:
+        # прокси сам разберёт Range и условные заголовки
+        return _set_common_headers(response, stored, filename, as_attachment)
+
+    if request.method == "HEAD":
+        response = HttpResponse(content_type=stored.content_type)
+        response["Content-Length"] = str(stored.size)
+        return _set_common_headers(response, stored, filename, as_attachment)
+
+    if byte_range is None:
+        response = FileResponse(stored.open(), content_type=stored.content_type)
+        response["Content-Length"] = str(stored.size)
+        # Content-Disposition выставляем сами, единообразно с 206
+        if "Content-Disposition" in response:
+            del response["Content-Disposition"]
+        return _set_common_headers(response, stored, filename, as_attachment)
+
+    start, end = byte_range
+    length = end - start + 1
+    response = StreamingHttpResponse(
+        RangeFileIterator(stored.open(), start, length),
+        status=206,
+        content_type=stored.content_type,
+    )
+    response["Content-Length"] = str(length)
+    response["Content-Range"] = f"bytes {start}-{end}/{stored.size}"
+    return _set_common_headers(response, stored, filename, as_attachment)
+
+
+# =========================
+# Счётчики скачиваний
+# =========================
+class DownloadCounter:
+    """
+    Буфер скачиваний в памяти процесса. Ключ — (app_label.Model, поле,
+    значение) записи-владельца файла, обычно ("hub.Project", "pk", id):
+    +n уходит в её download_count одним UPDATE ... F() + n.
+    """
+
+    def __init__(self, interval=None):
+        self.interval = interval
+        self._pending = Counter()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def record(self, key, n=1):
+        with self._lock:
+            self._pending[key] += n
+            if self._thread is None:
+                self._start()
+
+    def _start(self):
+        self._thread = threading.Thread(target=self._run, name="download-counter", daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def _run(self):
+        interval = self.interval
+        if interval is None:
+            interval = getattr(settings, "DOWNLOAD_COUNTER_FLUSH_SECONDS", 10)
+        while True:
+            self._wakeup.wait(interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Не удалось записать счётчики скачиваний")
+            finally:
+                # у потока своё соединение с БД — не держим его вечно
+                close_old_connections()
+
+    def flush(self):
+        """Сбрасывает накопленное в БД. Возвращает число учтённых скачиваний."""
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+        flushed = 0
+        try:
+            for key, n in list(pending.items()):
+                label, field, value = key
+                model = apps.get_model(label)
+                model._default_manager.filter(**{field: value}).update(
+                    download_count=F("download_count") + n
+                )
+                del pending[key]
+                flushed += n
+        except Exception:
+            # незаписанное возвращаем в буфер — уйдёт следующим сбросом
+            with self._lock:
+                self._pending.update(pending)
+            raise
+        return flushed
+
+
+download_counter = DownloadCounter()
+
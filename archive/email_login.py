@@ -0,0 +1,169 @@
+# archive/email_login.py
+"""
+Вход по одноразовому коду на email (без пароля).
+
+1. request_code(email) — новый EmailLoginCode и письмо с ним. Письмо
+   уходит задачей очереди (archive.tasks.send_mail), запрос SMTP не ждёт;
+2. verify_code(email, code) — сверяет код с последним неиспользованным
+   кодом не старше EMAIL_LOGIN_CODE_TTL и гасит его. Поиск — один
+   запрос по индексу (email, is_used, created_at). Неверный ввод
+   увеличивает failed_attempts кода; после EMAIL_LOGIN_MAX_ATTEMPTS
+   промахов код гасится, и нужен новый;
+3. verified_user(email) — аккаунт, за которым этот email подтверждён
+   (VerifiedEmail: код из письма или вход через Google). User.email из
+   формы регистрации не подтверждён, и по нему вход не выполняется: иначе
+   можно заранее завести аккаунт с чужим адресом и получить вход его
+   владельца. Если такие аккаунты есть, владелец кода либо входит в один
+   из них паролем (и email становится подтверждённым), либо заводит
+   новый — см. archive.views.email_login_claim.
+
+Частоту запросов кода и попыток ввода ограничивают ведра ниже
+(archive/ratelimit.py) — по email и по IP; проверяют их представления.
+Просроченные коды удаляет manage.py purge_login_codes.
+"""
+import secrets
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+
+from .models import EmailLoginCode, VerifiedEmail
+from .ratelimit import TokenBucket
+from .slugs import unique_slug
+from .tasks import send_mail
+
+CODE_LENGTH = 6
+
+# Запрос кода: на email — 3 письма подряд, дальше одно в 5 минут;
+# с одного IP — 10 подряд, дальше одно в 2 минуты.
+request_by_email = TokenBucket("login-code:email", capacity=3, per=15 * 60)
+request_by_ip = TokenBucket("login-code:ip", capacity=10, per=20 * 60)
+# Ввод кода: ведро только задаёт темп — 5 попыток подряд, дальше одна в
+# 2 минуты на email; с одного IP — 20 попыток в 10 минут. Перебор
+# ограничивает сам код: после EMAIL_LOGIN_MAX_ATTEMPTS неверных вводов он
+# гасится, а новые коды выдаются не чаще request_by_email.
+verify_by_email = TokenBucket("login-verify:email", capacity=5, per=10 * 60)
+verify_by_ip = TokenBucket("login-verify:ip", capacity=20, per=10 * 60)
+# Пароль существующего аккаунта после подтверждённого кода
+claim_by_email = TokenBucket("login-claim:email", capacity=5, per=15 * 60)
+
+
+def code_ttl():
+    return timedelta(seconds=getattr(settings, "EMAIL_LOGIN_CODE_TTL", 600))
+
+
+def max_attempts():
+    return getattr(settings, "EMAIL_LOGIN_MAX_ATTEMPTS", 5)
+
+
+def normalize_email(email):
+    return (email or "").strip().lower()
+
+
+def generate_code():
+    return f"{secrets.randbelow(10 ** CODE_LENGTH):0{CODE_LENGTH}d}"
+
+
+def request_code(email):
+    email = normalize_email(email)
+    login_code = EmailLoginCode.objects.create(email=email, code=generate_code())
+    minutes = int(code_ttl().total_seconds() // 60)
+    send_mail.delay(
+        "Код для входа",
+        f"Ваш код для входа: {login_code.code}\n\n"
+        f"Код действует {minutes} мин. Если вы не запрашивали вход — просто проигнорируйте письмо.",
+        [email],
+    )
+    return login_code
+
+
+def verify_code(email, code):
+    """True, если код верный; код при этом становится использованным."""
+    email = normalize_email(email)
+    code = (code or "").strip()
+    login_code = (
+        EmailLoginCode.objects.filter(
+            email=email, is_used=False, created_at__gte=timezone.now() - code_ttl()
+        )
+        .order_by("-created_at")
+        .only("pk", "code")
+        .first()
+    )
+    if login_code is None:
+        return False
+    if not constant_time_compare(login_code.code, code):
+        # счётчик в том же UPDATE, что и гашение: параллельные попытки не
+        # проскочат мимо лимита
+        EmailLoginCode.objects.filter(pk=login_code.pk, is_used=False).update(
+            failed_attempts=F("failed_attempts") + 1,
+            is_used=Case(
+                When(failed_attempts__gte=max_attempts() - 1, then=Value(True)),
+                default=Value(False),
+            ),
+        )
+        return False
+    # условный UPDATE: один код — один вход, даже при двух параллельных запросах
+    return EmailLoginCode.objects.filter(pk=login_code.pk, is_used=False).update(is_used=True) == 1
+
+
+def verified_user(email):
+    """Аккаунт с подтверждённым email или None."""
+    row = VerifiedEmail.objects.select_related("user").filter(email=normalize_email(email)).first()
+    return row.user if row is not None else None
+
+
+def unverified_accounts(email):
+    """Аккаунты, указавшие email при регистрации, но не подтвердившие его."""
+    return get_user_model().objects.filter(email__iexact=normalize_email(email))
+
+
+def mark_verified(user, email):
+    """
+    Подтверждает email за user. False — адрес уже подтверждён за другим
+    аккаунтом (тогда ничего не меняется).
+    """
+    email = normalize_email(email)
+    row, _ = VerifiedEmail.objects.get_or_create(email=email, defaults={"user": user})
+    if row.user_id != user.pk:
+        return False
+    if not user.email:
+        user.email = email
+        user.save(update_fields=["email"])
+    return True
+
+
+def create_user(email):
+    """Новый аккаунт без пароля с подтверждённым email (username из части до @)."""
+    User = get_user_model()
+    email = normalize_email(email)
+    username = unique_slug(User, email.split("@", 1)[0], fallback="user", field="username")
+    with transaction.atomic():
+        user = User(username=username, email=email)
+        user.set_unusable_password()
+        user.save()
+        VerifiedEmail.objects.create(email=email, user=user)
+    return user
+
+
+def purge_expired(batch_size=1000, pause=0.0):
+    """
+    Удаляет коды старше EMAIL_LOGIN_CODE_TTL пачками по batch_size:
+    каждая пачка — отдельный короткий DELETE по первичному ключу, таблица
+    не блокируется надолго. Возвращает число удалённых строк.
+    """
+    cutoff = timezone.now() - code_ttl()
+    expired = EmailLoginCode.objects.filter(created_at__lt=cutoff).order_by("created_at")
+    deleted = 0
+    while True:
+        pks = list(expired.values_list("pk", flat=True)[:batch_size])
+        if not pks:
+            return deleted
+        count, _ = EmailLoginCode.objects.filter(pk__in=pks).delete()
+        deleted += count
+        if pause:
+            time.sleep(pause)
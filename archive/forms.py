@@ -2,7 +2,8 @@ from django import forms
 from django.contrib.auth import get_user_model
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 
-from .models import Resource, Category, Profile
+from .models import LinkStatus, Resource, Category, Profile, UploadSession, VerifiedEmail
+from .uploads import attach
 from hub.models import Post
 
 
@@ -24,6 +25,14 @@ class StyledRegistrationForm(UserCreationForm):
         ),
     )
 
+    def clean_email(self):
+        email = self.cleaned_data["email"].strip().lower()
+        # подтверждённый адрес принадлежит одному аккаунту; неподтверждённый
+        # в форме ничего не даёт — вход по коду его не учитывает
+        if VerifiedEmail.objects.filter(email=email).exists():
+            raise forms.ValidationError("Этот email уже используется другим аккаунтом.")
+        return email
+
     class Meta:
         model = User
         fields = ("username", "email", "password1", "password2")
@@ -72,6 +81,36 @@ class StyledAuthenticationForm(AuthenticationForm):
         )
 
 
+class EmailLoginRequestForm(forms.Form):
+    email = forms.EmailField(
+        label="Email",
+        widget=forms.EmailInput(
+            attrs={
+                "class": "auth-input",
+                "placeholder": "Email",
+                "autocomplete": "email",
+            }
+        ),
+    )
+
+
+class EmailLoginVerifyForm(forms.Form):
+    code = forms.RegexField(
+        label="Код из письма",
+        regex=r"^\s*\d{6}\s*$",
+        error_messages={"invalid": "Код — 6 цифр из письма."},
+        widget=forms.TextInput(
+            attrs={
+                "class": "auth-input",
+                "placeholder": "123456",
+                "inputmode": "numeric",
+                "autocomplete": "one-time-code",
+                "maxlength": 6,
+            }
+        ),
+    )
+
+
 # =========================
 #  ФИЛЬТР РЕСУРСОВ (если понадобится)
 # =========================
@@ -120,6 +159,13 @@ class ResourceFilterForm(forms.Form):
         ),
     )
 
+    links = forms.ChoiceField(
+        label="Ссылки",
+        required=False,
+        choices=[("", "Любые ссылки")] + list(LinkStatus.choices),
+        widget=forms.Select(attrs={"class": "input-control"}),
+    )
+
     ordering = forms.ChoiceField(
         label="Сортировать",
         required=False,
@@ -159,11 +205,57 @@ class ProfileForm(forms.ModelForm):
         }
 
 
+# =========================
+#  ЧАНКОВАЯ ЗАГРУЗКА (archive/uploads.py)
+# =========================
+
+class ChunkedUploadMixin:
+    """
+    Скрытое поле upload_id: файл, загруженный по кускам через api/uploads/,
+    привязывается к модели при save(). Форме нужен owner — чужую сессию
+    подставить нельзя.
+    """
+
+    upload_target = None
+
+    def __init__(self, *args, owner=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.upload_owner = owner
+
+    def clean_upload_id(self):
+        upload_id = self.cleaned_data.get("upload_id")
+        if not upload_id:
+            return None
+        session = (
+            UploadSession.objects.filter(
+                pk=upload_id, target=self.upload_target, blob__isnull=False
+            )
+            .select_related("blob")
+            .first()
+        )
+        if session is None or self.upload_owner is None or session.owner_id != self.upload_owner.pk:
+            raise forms.ValidationError("Загрузка файла не завершена — попробуйте ещё раз.")
+        return session
+
+    def save(self, commit=True):
+        session = self.cleaned_data.get("upload_id")
+        if session is not None:
+            attach(self.instance, session)
+        return super().save(commit)
+
+
+def upload_id_field():
+    return forms.UUIDField(required=False, widget=forms.HiddenInput())
+
+
 # =========================
 #  ЗАГРУЗКА ПРОЕКТА (Resource как проект)
 # =========================
 
-class ResourceUploadForm(forms.ModelForm):
+class ResourceUploadForm(ChunkedUploadMixin, forms.ModelForm):
+    upload_target = UploadSession.RESOURCE
+    upload_id = upload_id_field()
+
     github_url = forms.URLField(
         label="GitHub URL (если есть)",
         required=False,
@@ -178,7 +270,7 @@ class ResourceUploadForm(forms.ModelForm):
     class Meta:
         model = Resource
         # 👇 только то, что показываем в форме
-        fields = ["title", "full_description", "github_url"]
+        fields = ["title", "full_description", "github_url", "upload_id"]
 
         widgets = {
             "title": forms.TextInput(
@@ -0,0 +1,459 @@
+# archive/importing.py
+"""
+Массовый импорт ресурсов в архив (manage.py import_resources).
+
+Всё, что при поштучном save() стоило бы запроса на строку, делается
+в памяти или пачкой:
+- занятые slug-и и url_key загружаются один раз, новые slug-и выдаются
+  из множества в памяти (SlugAllocator);
+- дубли внутри файла отсекаются по нормализованному URL;
+- категории создаются одним bulk_create на пачку, теги — через общий
+  TagService (hub/tags.py);
+- ресурсы — upsert (INSERT ... ON CONFLICT) по уникальному url_key,
+  т.е. повторный импорт обновляет, а не дублирует (с update_existing=False —
+  ON CONFLICT DO NOTHING: уже известный URL не трогается);
+- связи с тегами — INSERT ... ON CONFLICT DO NOTHING в through-таблицу.
+
+Запись идёт мимо сигналов, поэтому кэш блоков и похожие ресурсы
+пересчитывает последний шаг команды (id новых ресурсов — created_ids).
+"""
+import csv
+import hashlib
+import json
+import re
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from hub.tags import tag_service
+
+from .models import Category, Resource, Tag
+from .slugs import slug_base
+
+DEFAULT_BATCH_SIZE = 1000
+
+WHITESPACE_RE = re.compile(r"\s*")
+
+# Что обновляется у уже импортированного ресурса при повторном импорте
+UPSERT_FIELDS = ("title", "description", "category", "external_url", "source_name", "updated_at")
+
+# utm_* и прочие трекинговые параметры не меняют ресурс. Префиксом
+# отсекается только utm_, остальные — по точному имени: ?reference=,
+# ?refresh= и т.п. — часть адреса
+TRACKING_PREFIXES = ("utm_",)
+TRACKING_PARAMS = frozenset({"fbclid", "gclid", "yclid", "ref"})
+
+
+def is_tracking_param(key):
+    key = key.lower()
+    return key in TRACKING_PARAMS or key.startswith(TRACKING_PREFIXES)
+
+
+# =========================
+# URL
+# =========================
+def normalize_url(url):
+    """
+    Канонический вид URL для дедупликации: схема и хост в нижнем
+    регистре, без www., фрагмента, трекинговых параметров и хвостового «/».
+    Для относительных ссылок (без хоста) возвращает пустую строку.
+    """
+    url = (url or "").strip()
+    if not url:
+        return ""
+    parts = urlsplit(url)
+    if not parts.netloc:
+        return ""
+    scheme = (parts.scheme or "http").lower()
+    if scheme == "http":
+        scheme = "https"
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if host.endswith(":443") or host.endswith(":80"):
+        host = host.rsplit(":", 1)[0]
+    path = parts.path.rstrip("/")
+    query = ""
+    if parts.query:
+        query = urlencode(
+            sorted(
+                (key, value)
+                for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                if not is_tracking_param(key)
+            )
+        )
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+def url_key(url):
+    """Ключ уникальности ресурса (Resource.url_key) — sha256 нормализованного URL."""
+    normalized = normalize_url(url)
+    if not normalized:
+        return None
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+# =========================
+# SLUG
+# =========================
+class SlugAllocator:
+    """
+    Выдаёт уникальные slug-и без запроса в БД на каждый: занятые
+    значения загружаются один раз, счётчик на базу хранится в памяти
+    (схема суффиксов та же, что у форм: base, base-1, base-2, ...).
+    """
+
+    def __init__(self, taken, max_length, fallback):
+        self.taken = set(taken)
+        self.max_length = max_length
+        self.fallback = fallback
+        self._counters = {}
+
+    @classmethod
+    def for_model(cls, model, fallback, field="slug"):
+        max_length = model._meta.get_field(field).max_length
+        taken = model.objects.values_list(field, flat=True).iterator(chunk_size=10000)
+        return cls(taken, max_length, fallback)
+
+    def allocate(self, text):
+        base = slug_base(text, self.max_length, self.fallback)
+        slug = base
+        counter = self._counters.get(base, 0)
+        while slug in self.taken:
+            counter += 1
+            slug = f"{base}-{counter}"
+        self._counters[base] = counter
+        self.taken.add(slug)
+        return slug
+
+
+# =========================
+# ЧТЕНИЕ ВХОДНЫХ ФАЙЛОВ
+# =========================
+def _skip_space(buffer, pos):
+    return WHITESPACE_RE.match(buffer, pos).end()
+
+
+def _iter_json_array(stream, chunk_size=1 << 16):
+    """Потоково читает JSON-массив объектов, не загружая файл целиком."""
+    decoder = json.JSONDecoder()
+    buffer = stream.read(chunk_size)
+    pos = _skip_space(buffer, 0)
+    if pos >= len(buffer):
+        return
+    if buffer[pos] != "[":
+        raise ValueError("Ожидался JSON-массив")
+    pos += 1
+    eof = False
+
+    while True:
+        # двигаем позицию, а не режем строку: срез на каждый объект
+        # превращал бы чтение в O(n * размер буфера)
+        if not eof and len(buffer) - pos < chunk_size:
+            chunk = stream.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+        pos = _skip_space(buffer, pos)
+        if pos >= len(buffer):
+            if eof:
+                raise ValueError("JSON-массив оборван")
+            continue
+        if buffer[pos] == ",":
+            pos += 1
+            continue
+        if buffer[pos] == "]":
+            return
+        try:
+            item, pos = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            # объект не поместился в буфер — дочитываем
+            chunk = stream.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+        yield item
+
+
+def _iter_ndjson(stream):
+    for line in stream:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def iter_rows(path):
+    """
+    Строки выгрузки parse_professional_programming.py:
+    JSON-массив, NDJSON (по объекту на строку) или CSV.
+    """
+    with open(path, encoding="utf-8", newline="") as stream:
+        if str(path).lower().endswith(".csv"):
+            yield from csv.DictReader(stream)
+            return
+
+        head = stream.read(1)
+        while head and head.isspace():
+            head = stream.read(1)
+        stream.seek(0)
+        if head == "[":
+            yield from _iter_json_array(stream)
+        else:
+            yield from _iter_ndjson(stream)
+
+
+# =========================
+# ИМПОРТ
+# =========================
+def _truncate(text, max_length):
+    text = (text or "").strip()
+    if len(text) <= max_length:
+        return text
+    return text[: max_length - 1].rstrip() + "…"
+
+
+class ImportStats:
+    def __init__(self):
+        self.read = 0
+        self.created = 0
+        self.updated = 0
+        self.duplicates = 0
+        self.skipped = 0
+        self.categories = 0
+        self.tags = 0
+
+
+class ResourceImporter:
+    """
+    Импорт пачками. Каждая пачка — отдельная транзакция, поэтому
+    прерванный импорт можно просто перезапустить: уже загруженное
+    обновится по url_key.
+
+    Ресурсы и связи с тегами пишутся через executemany с
+    INSERT ... ON CONFLICT (синтаксис общий у PostgreSQL и SQLite):
+    bulk_create готовит каждое значение каждого поля через ORM, и на
+    20+ колонках Resource это съедало большую часть времени импорта.
+    """
+
+    def __init__(
+        self,
+        *,
+        batch_size=DEFAULT_BATCH_SIZE,
+        category_field="category_h1",
+        tag_fields=("category_h2", "category_h3"),
+        source_name="",
+        publish=True,
+        update_existing=True,
+    ):
+        self.batch_size = batch_size
+        self.update_existing = update_existing
+        self.category_field = category_field
+        self.tag_fields = tag_fields
+        self.source_name = source_name
+        self.publish = publish
+        self.stats = ImportStats()
+        # id ресурсов, созданных этим импортом, — для пересчёта похожих
+        self.created_ids = set()
+
+        self.title_length = Resource._meta.get_field("title").max_length
+        self.description_length = Resource._meta.get_field("description").max_length
+        self.url_length = Resource._meta.get_field("external_url").max_length
+        self.category_length = Category._meta.get_field("name").max_length
+        self.tag_length = Tag._meta.get_field("name").max_length
+
+        # Всё, что иначе потребовало бы запроса на строку, — один раз в память
+        self.existing_keys = set(
+            Resource.objects.exclude(url_key=None)
+            .values_list("url_key", flat=True)
+            .iterator(chunk_size=10000)
+        )
+        # ресурсы, заведённые вручную (без url_key), обновить по ключу нельзя —
+        # их URL просто не импортируем повторно
+        self.unkeyed_keys = set()
+        for urls in Resource.objects.filter(url_key=None).values_list(
+            "external_url", "source_url"
+        ).iterator(chunk_size=10000):
+            self.unkeyed_keys.update(filter(None, map(url_key, urls)))
+        self.seen_keys = set()
+        self.resource_slugs = SlugAllocator.for_model(Resource, "resource")
+        self.category_slugs = SlugAllocator.for_model(Category, "category")
+        self.tag_service = tag_service(Tag)
+        self.category_ids = dict(Category.objects.values_list("name", "id"))
+        self.tag_ids = dict(Tag.objects.values_list("name", "id"))
+
+        self._build_sql()
+
+    def _build_sql(self):
+        qn = connection.ops.quote_name
+        fields = [field for field in Resource._meta.concrete_fields if not field.primary_key]
+        self._columns = [field.attname for field in fields]
+        # значения по умолчанию в виде, готовом для БД, — считаются один раз
+        self._defaults = {
+            field.attname: field.get_db_prep_save(field.get_default(), connection)
+            for field in fields
+        }
+        if self.update_existing:
+            updates = ", ".join(
+                f"{qn(column)} = excluded.{qn(column)}"
+                for column in (Resource._meta.get_field(name).column for name in UPSERT_FIELDS)
+            )
+            on_conflict = f"DO UPDATE SET {updates}"
+        else:
+            # ресурс мог появиться (или быть отредактирован на сайте) уже после
+            # старта импорта — existing_keys его не знает, а перезаписывать нельзя
+            on_conflict = "DO NOTHING"
+        self._resource_sql = (
+            f"INSERT INTO {qn(Resource._meta.db_table)} "
+            f"({', '.join(qn(field.column) for field in fields)}) "
+            f"VALUES ({', '.join(['%s'] * len(fields))}) "
+            f"ON CONFLICT ({qn(Resource._meta.get_field('url_key').column)}) {on_conflict}"
+        )
+
+        through = Resource.tags.through
+        self._tags_sql = (
+            f"INSERT INTO {qn(through._meta.db_table)} "
+            f"({qn('resource_id')}, {qn('tag_id')}) VALUES (%s, %s) ON CONFLICT DO NOTHING"
+        )
+
+    # --- разбор строки ---
+    def _prepare(self, row):
+        url = (row.get("url") or "").strip()
+        key = url_key(url)
+        # url_key пустой и для строк без хоста (относительные ссылки README)
+        if not key or len(url) > self.url_length:
+            self.stats.skipped += 1
+            return None
+        if (
+            key in self.seen_keys
+            or key in self.unkeyed_keys
+            or (not self.update_existing and key in self.existing_keys)
+        ):
+            self.stats.duplicates += 1
+            return None
+        self.seen_keys.add(key)
+
+        source_url = (row.get("source_url") or "").strip()
+        tags = []
+        for name in self.row_tags(row):
+            name = _truncate(name, self.tag_length)
+            if name and name not in tags:
+                tags.append(name)
+        return {
+            "key": key,
+            "url": url,
+            "title": _truncate(row.get("title") or url, self.title_length),
+            "description": _truncate(row.get("description"), self.description_length),
+            "category": _truncate(row.get(self.category_field), self.category_length),
+            "source_url": source_url if len(source_url) <= self.url_length else "",
+            "tags": tags,
+        }
+
+    def row_tags(self, row):
+        return [row.get(field) for field in self.tag_fields]
+
+    # --- справочники ---
+    def _ensure(self, model, names, ids, allocator):
+        missing = [name for name in dict.fromkeys(names) if name and name not in ids]
+        if not missing:
+            return 0
+        model.objects.bulk_create(
+            [model(name=name, slug=allocator.allocate(name)) for name in missing],
+            ignore_conflicts=True,
+        )
+        # ignore_conflicts не возвращает id — дочитываем одним запросом
+        ids.update(model.objects.filter(name__in=missing).values_list("name", "id"))
+        return len(missing)
+
+    # --- пачка ---
+    def _flush(self, batch):
+        if not batch:
+            return
+        with transaction.atomic():
+            self.stats.categories += self._ensure(
+                Category, [item["category"] for item in batch], self.category_ids, self.category_slugs
+            )
+            new_tags = [
+                name for name in dict.fromkeys(name for item in batch for name in item["tags"])
+                if name not in self.tag_ids
+            ]
+            if new_tags:
+                self.tag_ids.update(self.tag_service.resolve(new_tags))
+                self.stats.tags += len(new_tags)
+
+            now = connection.ops.adapt_datetimefield_value(timezone.now())
+            params = []
+            new_keys = []
+            for item in batch:
+                is_new = item["key"] not in self.existing_keys
+                values = dict(self._defaults)
+                values.update(
+                    url_key=item["key"],
+                    title=item["title"],
+                    # у существующей записи slug не обновляется (его нет в UPSERT_FIELDS),
+                    # поэтому вместо выдачи нового подставляем заглушку — сам url_key
+                    slug=self.resource_slugs.allocate(item["title"]) if is_new else item["key"],
+                    description=item["description"],
+                    category_id=self.category_ids.get(item["category"]),
+                    external_url=item["url"],
+                    source_name=self.source_name,
+                    source_url=item["source_url"],
+                    is_published=self.publish,
+                    created_at=now,
+                    updated_at=now,
+                )
+                params.append([values[column] for column in self._columns])
+                if is_new:
+                    self.stats.created += 1
+                    self.existing_keys.add(item["key"])
+                    new_keys.append(item["key"])
+                else:
+                    self.stats.updated += 1
+
+            with connection.cursor() as cursor:
+                cursor.executemany(self._resource_sql, params)
+
+            # executemany не возвращает id — добираем одним запросом по url_key
+            ids = dict(
+                Resource.objects.filter(url_key__in=[item["key"] for item in batch]).values_list(
+                    "url_key", "id"
+                )
+            )
+            self.created_ids.update(ids[key] for key in new_keys)
+            with connection.cursor() as cursor:
+                cursor.executemany(
+                    self._tags_sql,
+                    [
+                        (ids[item["key"]], self.tag_ids[name])
+                        for item in batch
+                        for name in item["tags"]
+                    ],
+                )
+
+    def import_batch(self, rows):
+        """Импортирует готовую пачку строк одной транзакцией."""
+        batch = []
+        for row in rows:
+            self.stats.read += 1
+            item = self._prepare(row)
+            if item is not None:
+                batch.append(item)
+        self._flush(batch)
+        return self.stats
+
+    def run(self, rows):
+        batch = []
+        for row in rows:
+            self.stats.read += 1
+            item = self._prepare(row)
+            if item is None:
+                continue
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                self._flush(batch)
+                batch = []
+        self._flush(batch)
+        return self.stats
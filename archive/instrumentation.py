@@ -0,0 +1,265 @@
+# archive/instrumentation.py
+"""
+Замеры запросов: сколько SQL и сколько времени тратит каждое представление.
+
+InstrumentationMiddleware (первым в MIDDLEWARE) на каждый запрос считает:
+- число SQL-запросов и их суммарное время (execute_wrapper на соединениях);
+- время рендера шаблонов (верхнего уровня: render(), TemplateResponse,
+  render_to_string; {% include %} входит во время родителя);
+- общее время и маршрут (шаблон URL из urls.py, а не конкретный путь).
+
+Куда это попадает:
+- заголовок Server-Timing (db, tpl, app) — вкладка Network в DevTools.
+  INSTRUMENTATION_SERVER_TIMING: "all" / "staff" / "off";
+- лог archive.instrumentation (WARNING), если запрос дольше
+  INSTRUMENTATION_SLOW_MS или сделал больше INSTRUMENTATION_SLOW_QUERIES
+  SQL — так видны N+1;
+- статистика по маршрутам в памяти процесса (route_stats): число
+  запросов, перцентили времени и числа SQL по последним
+  INSTRUMENTATION_SAMPLES запросам. Её отдаёт staff-only
+  /_stats/requests/ (archive.views.request_stats). У каждого воркера
+  gunicorn статистика своя;
+- /metrics (archive/metrics.py) — счётчики и гистограммы по имени URL,
+  общие для всех воркеров.
+
+SQL внутри шаблона считается и в db, и в tpl: ленивые QuerySet'ы
+выполняются во время рендера.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import Template as DjangoBackendTemplate
+from django.utils.functional import SimpleLazyObject, empty
+
+from . import metrics as prometheus
+
+logger = logging.getLogger(__name__)
+
+UNRESOLVED_ROUTE = "<unresolved>"
+PERCENTILES = (50, 90, 99)
+
+
+# =========================
+# Замер одного запроса
+# =========================
+_local = threading.local()
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.template_seconds = 0.0
+        self._template_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        # execute_wrapper: время каждого SQL
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_seconds += time.perf_counter() - start
+            self.queries += 1
+
+
+def current_metrics():
+    """Замер текущего запроса этого потока или None."""
+    return getattr(_local, "metrics", None)
+
+
+_original_render = DjangoBackendTemplate.render
+_template_timer_lock = threading.Lock()
+
+
+def _timed_render(self, context=None, request=None):
+    metrics = current_metrics()
+    if metrics is None:
+        return _original_render(self, context, request)
+    # render_to_string внутри тега шаблона не считаем дважды
+    metrics._template_depth += 1
+    start = time.perf_counter()
+    try:
+        return _original_render(self, context, request)
+    finally:
+        metrics._template_depth -= 1
+        if metrics._template_depth == 0:
+            metrics.template_seconds += time.perf_counter() - start
+
+
+def install_template_timer():
+    with _template_timer_lock:
+        if DjangoBackendTemplate.render is not _timed_render:
+            DjangoBackendTemplate.render = _timed_render
+
+
+# =========================
+# Статистика по маршрутам
+# =========================
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0
+    index = round(pct / 100 * (len(sorted_values) - 1))
+    return sorted_values[index]
+
+
+class RouteStats:
+    """
+    Счётчики и выборка последних samples запросов для каждого маршрута.
+    Перцентили считаются по выборке при чтении (snapshot), на запросе —
+    только append в deque под замком.
+    """
+
+    def __init__(self, samples=None):
+        self.samples = samples
+        self._lock = threading.Lock()
+        self._routes = {}
+        self.started_at = time.time()
+
+    def _new_route(self):
+        samples = self.samples or getattr(settings, "INSTRUMENTATION_SAMPLES", 500)
+        return {
+            "count": 0,
+            "errors": 0,
+            "queries_total": 0,
+            "queries_max": 0,
+            "seconds_total": 0.0,
+            "recent": deque(maxlen=samples),  # (секунды, SQL, секунды SQL, секунды шаблонов)
+        }
+
+    def record(self, route, method, status, seconds, metrics):
+        key = f"{method} {route}"
+        with self._lock:
+            stats = self._routes.get(key)
+            if stats is None:
+                stats = self._routes[key] = self._new_route()
+            stats["count"] += 1
+            stats["errors"] += status >= 500
+            stats["queries_total"] += metrics.queries
+            stats["queries_max"] = max(stats["queries_max"], metrics.queries)
+            stats["seconds_total"] += seconds
+            stats["recent"].append(
+                (seconds, metrics.queries, metrics.sql_seconds, metrics.template_seconds)
+            )
+
+    def snapshot(self):
+        """{маршрут: сводка} — для JSON; времена в миллисекундах."""
+        with self._lock:
+            routes = {key: (dict(stats), list(stats["recent"])) for key, stats in self._routes.items()}
+        result = {}
+        for key, (stats, recent) in sorted(routes.items()):
+            durations = sorted(sample[0] * 1000 for sample in recent)
+            queries = sorted(sample[1] for sample in recent)
+            sql_ms = sorted(sample[2] * 1000 for sample in recent)
+            template_ms = sorted(sample[3] * 1000 for sample in recent)
+            result[key] = {
+                "count": stats["count"],
+                "errors": stats["errors"],
+                "queries_avg": round(stats["queries_total"] / stats["count"], 2),
+                "queries_max": stats["queries_max"],
+                "ms_avg": round(stats["seconds_total"] * 1000 / stats["count"], 2),
+                "samples": len(recent),
+                **{f"ms_p{p}": round(_percentile(durations, p), 2) for p in PERCENTILES},
+                **{f"queries_p{p}": _percentile(queries, p) for p in PERCENTILES},
+                **{f"sql_ms_p{p}": round(_percentile(sql_ms, p), 2) for p in PERCENTILES},
+                **{f"template_ms_p{p}": round(_percentile(template_ms, p), 2) for p in PERCENTILES},
+            }
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+            self.started_at = time.time()
+
+
+route_stats = RouteStats()
+
+
+def route_name(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return UNRESOLVED_ROUTE
+    # шаблон URL группирует /posts/1/ и /posts/2/ в один маршрут
+    return "/" + match.route if match.route else (match.view_name or UNRESOLVED_ROUTE)
+
+
+def view_name(request):
+    """Имя URL (app:name) — метка для /metrics (archive/metrics.py)."""
+    match = getattr(request, "resolver_match", None)
+    return (match.view_name if match else "") or UNRESOLVED_ROUTE
+
+
+# =========================
+# Middleware
+# =========================
+class InstrumentationMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        install_template_timer()
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        _local.metrics = metrics
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            _local.metrics = None
+        seconds = time.perf_counter() - start
+
+        route = route_name(request)
+        route_stats.record(route, request.method, response.status_code, seconds, metrics)
+        prometheus.observe_request(
+            view_name(request), request.method, response.status_code,
+            seconds, metrics.queries, metrics.sql_seconds,
+        )
+        self._log_slow(request, route, response, seconds, metrics)
+        if self._timing_allowed(request):
+            response["Server-Timing"] = server_timing(seconds, metrics)
+        return response
+
+    @staticmethod
+    def _timing_allowed(request):
+        mode = getattr(settings, "INSTRUMENTATION_SERVER_TIMING", "staff")
+        if mode == "all":
+            return True
+        if mode == "staff":
+            user = getattr(request, "user", None)
+            if isinstance(user, SimpleLazyObject) and user._wrapped is empty:
+                # пользователь запросу не понадобился — не грузим его ради заголовка
+                return False
+            return bool(user is not None and user.is_authenticated and user.is_staff)
+        return False
+
+    @staticmethod
+    def _log_slow(request, route, response, seconds, metrics):
+        slow_ms = getattr(settings, "INSTRUMENTATION_SLOW_MS", 500)
+        slow_queries = getattr(settings, "INSTRUMENTATION_SLOW_QUERIES", 50)
+        if seconds * 1000 < slow_ms and metrics.queries <= slow_queries:
+            return
+        logger.warning(
+            "Медленный запрос %s %s (%s): %.0f мс, SQL: %d за %.0f мс, шаблоны: %.0f мс, статус %d",
+            request.method,
+            request.path,
+            route,
+            seconds * 1000,
+            metrics.queries,
+            metrics.sql_seconds * 1000,
+            metrics.template_seconds * 1000,
+            response.status_code,
+        )
+
+
+def server_timing(seconds, metrics):
+    return ", ".join([
+        f'db;dur={metrics.sql_seconds * 1000:.1f};desc="SQL x{metrics.queries}"',
+        f"tpl;dur={metrics.template_seconds * 1000:.1f}",
+        f"app;dur={seconds * 1000:.1f}",
+    ])
@@ -0,0 +1,410 @@
+# archive/linkcheck.py
+"""
+Проверка живости ссылок ресурсов и проектов (manage.py check_links).
+
+Сетевая часть — asyncio без сторонних библиотек: HEAD-запросы поверх
+asyncio.open_connection, пул keep-alive соединений и семафор на каждый
+хост (чтобы не долбить один сайт сотней запросов), общий лимит
+одновременных проверок, повторы с экспоненциальной задержкой.
+
+Результат по каждому URL хранится в LinkCheck вместе с ETag /
+Last-Modified: следующая проверка отправляет условный запрос, и
+неизменившаяся страница отвечает коротким 304. Худший статус ссылок
+денормализуется в Resource.link_status / Project.link_status — по нему
+фильтруются списки.
+"""
+import asyncio
+import hashlib
+import random
+import ssl
+from collections import defaultdict
+from urllib.parse import urljoin, urlsplit
+
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import LinkCheck, LinkStatus, Resource
+
+USER_AGENT = "webarchive-linkcheck/1.0"
+
+DEFAULT_CONCURRENCY = 50
+DEFAULT_PER_HOST = 4
+DEFAULT_TIMEOUT = 10.0
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF = 0.5
+MAX_REDIRECTS = 5
+# сколько простаивающих соединений держать на хост
+POOL_SIZE = 4
+
+RESOURCE_URL_FIELDS = ("download_url", "external_url", "affiliate_url", "source_url", "github_url")
+
+# от худшего к лучшему — денормализованный статус объекта берётся по худшей ссылке
+STATUS_ORDER = (LinkStatus.BROKEN, LinkStatus.ERROR, LinkStatus.OK, LinkStatus.UNKNOWN)
+
+# окончательно мёртвые ссылки; остальные 4xx (401, 403, 429...) — сайт жив, но не пускает бота
+BROKEN_CODES = {404, 410, 451}
+RETRY_CODES = {429, 500, 502, 503, 504}
+
+
+class ProbeResult:
+    def __init__(self, url, status, status_code=None, final_url="", etag="", last_modified="", error=""):
+        self.url = url
+        self.status = status
+        self.status_code = status_code
+        self.final_url = final_url
+        self.etag = etag
+        self.last_modified = last_modified
+        self.error = error
+        self.not_modified = status_code == 304
+
+    def __repr__(self):
+        return f"<ProbeResult {self.url} {self.status} {self.status_code}>"
+
+
+class _Response:
+    def __init__(self, status_code, headers, keep_alive):
+        self.status_code = status_code
+        self.headers = headers
+        self.keep_alive = keep_alive
+
+
+class _TransientError(Exception):
+    """Ошибка, после которой имеет смысл повторить запрос."""
+
+
+# =========================
+# Пул соединений
+# =========================
+class ConnectionPool:
+    def __init__(self, timeout, per_host_size=POOL_SIZE):
+        self.timeout = timeout
+        self.per_host_size = per_host_size
+        self._idle = defaultdict(list)
+        self._ssl = ssl.create_default_context()
+
+    async def acquire(self, scheme, host, port):
+        key = (scheme, host, port)
+        while self._idle[key]:
+            reader, writer = self._idle[key].pop()
+            if not reader.at_eof() and not writer.is_closing():
+                return reader, writer, True
+            writer.close()
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(
+                host,
+                port,
+                ssl=self._ssl if scheme == "https" else None,
+                server_hostname=host if scheme == "https" else None,
+            ),
+            self.timeout,
+        )
+        return reader, writer, False
+
+    def release(self, scheme, host, port, reader, writer, keep_alive):
+        idle = self._idle[(scheme, host, port)]
+        if keep_alive and len(idle) < self.per_host_size and not writer.is_closing():
+            idle.append((reader, writer))
+        else:
+            writer.close()
+
+    async def close(self):
+        for connections in self._idle.values():
+            for _, writer in connections:
+                writer.close()
+        self._idle.clear()
+
+
+# =========================
+# Проверка
+# =========================
+class LinkChecker:
+    def __init__(
+        self,
+        *,
+        concurrency=DEFAULT_CONCURRENCY,
+        per_host=DEFAULT_PER_HOST,
+        timeout=DEFAULT_TIMEOUT,
+        retries=DEFAULT_RETRIES,
+        backoff=DEFAULT_BACKOFF,
+    ):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.per_host = per_host
+        self.pool = ConnectionPool(timeout)
+        self._global = asyncio.Semaphore(concurrency)
+        self._hosts = defaultdict(lambda: asyncio.Semaphore(self.per_host))
+
+    async def close(self):
+        await self.pool.close()
+
+    async def _request(self, method, url, headers):
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError("неподдерживаемый URL")
+        host = parts.hostname
+        port = parts.port or (443 if scheme == "https" else 80)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+
+        lines = [
+            f"{method} {path} HTTP/1.1",
+            f"Host: {parts.netloc.rsplit('@', 1)[-1]}",
+            f"User-Agent: {USER_AGENT}",
+            "Accept: */*",
+            # тело GET-фолбэка не нужно, соединение после него не переиспользуем
+            "Connection: keep-alive" if method == "HEAD" else "Connection: close",
+        ]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        request = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1", "replace")
+
+        # сначала — переиспользованное соединение; если сервер успел его закрыть,
+        # повторяем на свежем без траты попытки
+        for _ in range(2):
+            reader, writer, reused = await self.pool.acquire(scheme, host, port)
+            try:
+                writer.write(request)
+                await writer.drain()
+                status_line = await asyncio.wait_for(reader.readline(), self.timeout)
+                if not status_line:
+                    raise ConnectionResetError("пустой ответ")
+                response_headers = {}
+                while True:
+                    line = await asyncio.wait_for(reader.readline(), self.timeout)
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    response_headers[name.strip().lower()] = value.strip()
+            except (ConnectionError, asyncio.IncompleteReadError):
+                writer.close()
+                if reused:
+                    continue
+                raise
+            except BaseException:
+                writer.close()
+                raise
+
+            try:
+                status_code = int(status_line.split()[1])
+            except (IndexError, ValueError):
+                writer.close()
+                raise _TransientError(f"некорректный ответ: {status_line[:60]!r}")
+
+            keep_alive = (
+                method == "HEAD"
+                and response_headers.get("connection", "").lower() != "close"
+                and status_line.startswith(b"HTTP/1.1")
+            )
+            self.pool.release(scheme, host, port, reader, writer, keep_alive)
+            return _Response(status_code, response_headers, keep_alive)
+        raise _TransientError("соединение сброшено")
+
+    async def _probe_once(self, url, etag, last_modified):
+        """Один проход с редиректами. HEAD, при 405/501 — GET первого байта."""
+        conditional = {}
+        if etag:
+            conditional["If-None-Match"] = etag
+        if last_modified:
+            conditional["If-Modified-Since"] = last_modified
+
+        current = url
+        for _ in range(MAX_REDIRECTS + 1):
+            host = urlsplit(current).hostname or ""
+            async with self._hosts[host]:
+                response = await self._request("HEAD", current, conditional)
+                if response.status_code in (405, 501):
+                    response = await self._request("GET", current, {"Range": "bytes=0-0", **conditional})
+
+            code = response.status_code
+            if code in (301, 302, 303, 307, 308) and response.headers.get("location"):
+                current = urljoin(current, response.headers["location"])
+                # условные заголовки относятся к исходному URL
+                conditional = {}
+                continue
+            if code in RETRY_CODES:
+                raise _TransientError(f"HTTP {code}")
+            if code < 400:
+                status = LinkStatus.OK
+            elif code in BROKEN_CODES:
+                status = LinkStatus.BROKEN
+            elif code < 500:
+                # 401 / 403 и т.п.: сайт жив, просто не пускает бота
+                status = LinkStatus.OK
+            else:
+                status = LinkStatus.ERROR
+            return ProbeResult(
+                url,
+                status,
+                status_code=code,
+                final_url=current if current != url else "",
+                etag=response.headers.get("etag", ""),
+                last_modified=response.headers.get("last-modified", ""),
+            )
+        return ProbeResult(url, LinkStatus.BROKEN, error="слишком много редиректов")
+
+    async def check(self, url, etag="", last_modified=""):
+        async with self._global:
+            attempt = 0
+            while True:
+                try:
+                    return await asyncio.wait_for(
+                        self._probe_once(url, etag, last_modified), self.timeout * 3
+                    )
+                except ValueError as exc:
+                    return ProbeResult(url, LinkStatus.BROKEN, error=str(exc))
+                except (_TransientError, OSError, asyncio.TimeoutError) as exc:
+                    if attempt >= self.retries:
+                        code = None
+                        message = str(exc) or exc.__class__.__name__
+                        if message.startswith("HTTP "):
+                            code = int(message[5:])
+                        return ProbeResult(url, LinkStatus.ERROR, status_code=code, error=message[:255])
+                    # экспоненциальная задержка с джиттером
+                    await asyncio.sleep(self.backoff * (2**attempt) * (1 + random.random()))
+                    attempt += 1
+
+    async def check_many(self, items):
+        """items: [(url, etag, last_modified)] → список ProbeResult в том же порядке."""
+        return await asyncio.gather(*(self.check(*item) for item in items))
+
+
+# =========================
+# Связь с БД
+# =========================
+def collect_urls():
+    """{url: [(модель, pk), ...]} по всем ссылкам ресурсов и проектов."""
+    from hub.models import Project
+
+    owners = defaultdict(list)
+    for row in Resource.objects.values_list("pk", *RESOURCE_URL_FIELDS).iterator(chunk_size=5000):
+        pk, urls = row[0], row[1:]
+        for url in urls:
+            if url:
+                owners[url.strip()].append((Resource, pk))
+    for pk, url in Project.objects.exclude(github_url="").values_list("pk", "github_url").iterator(chunk_size=5000):
+        owners[url.strip()].append((Project, pk))
+    return owners
+
+
+def link_key(url):
+    """
+    LinkCheck.url_hash: URL не укладывается в индексируемое поле, поэтому
+    строки ищутся по sha256 от него.
+    """
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+def _checks_by_url(urls, *fields):
+    keys = {link_key(url): url for url in urls}
+    queryset = LinkCheck.objects.filter(url_hash__in=list(keys))
+    if fields:
+        queryset = queryset.only("url_hash", *fields)
+    return {keys[check.url_hash]: check for check in queryset}
+
+
+def due_urls(urls, max_age, force=False):
+    """Отбирает URL без свежей проверки; возвращает [(url, etag, last_modified)]."""
+    known = _checks_by_url(urls, "etag", "last_modified", "checked_at")
+    threshold = timezone.now() - max_age
+    due = []
+    for url in urls:
+        check = known.get(url)
+        if check is None:
+            due.append((url, "", ""))
+        elif force or check.checked_at is None or check.checked_at < threshold:
+            due.append((url, check.etag, check.last_modified))
+    return due
+
+
+def store_results(results):
+    """Сохраняет результаты пачки в LinkCheck одним upsert-ом."""
+    now = timezone.now()
+    previous = _checks_by_url([result.url for result in results])
+    rows = []
+    for result in results:
+        old = previous.get(result.url)
+        if result.not_modified and old is not None:
+            # 304: страница не менялась — статус и валидаторы прежние
+            status, etag, last_modified = old.status, old.etag, old.last_modified
+            if status == LinkStatus.UNKNOWN:
+                status = LinkStatus.OK
+        else:
+            status, etag, last_modified = result.status, result.etag, result.last_modified
+        failures = (old.failures if old else 0) + 1 if status != LinkStatus.OK else 0
+        rows.append(
+            LinkCheck(
+                url=result.url,
+                url_hash=link_key(result.url),
+                status=status,
+                status_code=result.status_code,
+                final_url=result.final_url[:500],
+                error=result.error,
+                etag=etag[:255],
+                last_modified=last_modified[:64],
+                failures=failures,
+                checked_at=now,
+            )
+        )
+    LinkCheck.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=["url_hash"],
+        update_fields=[
+            "status",
+            "status_code",
+            "final_url",
+            "error",
+            "etag",
+            "last_modified",
+            "failures",
+            "checked_at",
+        ],
+    )
+
+
+def worst_status(statuses):
+    for status in STATUS_ORDER:
+        if status in statuses:
+            return status
+    return LinkStatus.UNKNOWN
+
+
+def refresh_owner_statuses(owners, urls):
+    """Пересчитывает link_status у ресурсов / проектов, чьи ссылки проверены."""
+    statuses = {url: check.status for url, check in _checks_by_url(urls, "status").items()}
+    touched = defaultdict(set)
+    for url in urls:
+        for model, pk in owners[url]:
+            touched[model].add(pk)
+
+    # все ссылки объекта, а не только проверенные в этой пачке
+    by_object = defaultdict(set)
+    for url, object_owners in owners.items():
+        for model, pk in object_owners:
+            if pk in touched.get(model, ()):
+                by_object[(model, pk)].add(url)
+    missing = {url for object_urls in by_object.values() for url in object_urls} - statuses.keys()
+    if missing:
+        statuses.update(
+            (url, check.status) for url, check in _checks_by_url(missing, "status").items()
+        )
+
+    now = timezone.now()
+    grouped = defaultdict(list)
+    for (model, pk), object_urls in by_object.items():
+        status = worst_status({statuses.get(url, LinkStatus.UNKNOWN) for url in object_urls})
+        grouped[(model, status)].append(pk)
+    for (model, status), pks in grouped.items():
+        update = {"link_status": status}
+        if model is Resource:
+            update["link_checked_at"] = now
+        model.objects.filter(pk__in=pks).update(**update)
+
+
+def link_status_filter(status):
+    """Q для фильтра списков по ?links=ok|broken|error|unknown."""
+    if status in LinkStatus.values:
+        return Q(link_status=status)
+    return Q()
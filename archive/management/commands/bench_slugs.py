@@ -0,0 +1,71 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils.text import slugify
+
+from archive.models import Resource
+from archive.slugs import save_with_slug
+from hub.models import Project
+
+User = get_user_model()
+
+
+def _legacy_save(instance, title, fallback):
+    """Прежний подбор slug-а: exists() на каждое совпадение."""
+    model = type(instance)
+    base = slugify(title)[:200] or fallback
+    slug = base
+    counter = 1
+    while model.objects.filter(slug=slug).exists():
+        slug = f"{base}-{counter}"
+        counter += 1
+    instance.slug = slug
+    instance.save()
+
+
+class _QueryCounter:
+    # CaptureQueriesContext хранит не больше 9000 запросов — прежнему циклу мало
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        "Бенчмарк выдачи уникальных slug-ов: сохраняет --count объектов с одинаковым "
+        "названием прежним циклом exists() и через archive.slugs (в транзакции, "
+        "которая откатывается), печатает время и число запросов."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=1000)
+        parser.add_argument("--title", default="Telegram bot")
+        parser.add_argument("--model", choices=("resource", "project"), default="resource")
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'способ':<8} {'объектов':>9} {'запросов':>9} {'на объект':>10} {'время, с':>9}")
+        for name, save in (("legacy", _legacy_save), ("prefix", save_with_slug)):
+            with transaction.atomic():
+                make = self._factory(options["model"])
+                counter = _QueryCounter()
+                started = time.perf_counter()
+                with connection.execute_wrapper(counter):
+                    for _ in range(options["count"]):
+                        save(make(options["title"]), options["title"], options["model"])
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"{name:<8} {options['count']:>9} {counter.count:>9} "
+                    f"{counter.count / options['count']:>10.1f} {elapsed:>9.2f}"
+                )
+                transaction.set_rollback(True)
+
+    def _factory(self, model):
+        if model == "resource":
+            return lambda title: Resource(title=title)
+        owner = User.objects.create(username=f"bench-{time.time_ns()}")
+        return lambda title: Project(owner=owner, title=title)
@@ -0,0 +1,90 @@
+import asyncio
+import time
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.core.management.base import BaseCommand
+
+from archive.linkcheck import (
+    DEFAULT_BACKOFF,
+    DEFAULT_CONCURRENCY,
+    DEFAULT_PER_HOST,
+    DEFAULT_RETRIES,
+    DEFAULT_TIMEOUT,
+    LinkChecker,
+    collect_urls,
+    due_urls,
+    refresh_owner_statuses,
+    store_results,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Проверяет ссылки ресурсов и проектов (HEAD-запросы, asyncio) и сохраняет "
+        "статус в LinkCheck / link_status."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+        parser.add_argument("--per-host", type=int, default=DEFAULT_PER_HOST)
+        parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT)
+        parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES)
+        parser.add_argument("--backoff", type=float, default=DEFAULT_BACKOFF)
+        parser.add_argument(
+            "--max-age",
+            type=float,
+            default=24,
+            help="Не перепроверять ссылки, проверенные менее N часов назад",
+        )
+        parser.add_argument("--force", action="store_true", help="Проверить все ссылки")
+        parser.add_argument("--limit", type=int, help="Проверить не больше N ссылок")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def _checker(self, options):
+        return LinkChecker(
+            concurrency=options["concurrency"],
+            per_host=options["per_host"],
+            timeout=options["timeout"],
+            retries=options["retries"],
+            backoff=options["backoff"],
+        )
+
+    def handle(self, *args, **options):
+        owners = collect_urls()
+        urls = list(owners)
+        due = []
+        for start in range(0, len(urls), options["batch_size"]):
+            due += due_urls(
+                urls[start:start + options["batch_size"]],
+                timedelta(hours=options["max_age"]),
+                force=options["force"],
+            )
+        if options["limit"]:
+            due = due[: options["limit"]]
+        self.stdout.write(f"Ссылок всего: {len(urls)}, к проверке: {len(due)}")
+
+        started = time.perf_counter()
+        totals = asyncio.run(self.run_checks(due, owners, options))
+        elapsed = time.perf_counter() - started
+        summary = ", ".join(f"{status}: {count}" for status, count in sorted(totals.items()))
+        self.stdout.write(
+            self.style.SUCCESS(f"Проверено {len(due)} за {elapsed:.1f} с ({summary or 'нет'})")
+        )
+
+    async def run_checks(self, due, owners, options):
+        checker = self._checker(options)
+        totals = {}
+        try:
+            for start in range(0, len(due), options["batch_size"]):
+                batch = due[start:start + options["batch_size"]]
+                results = await checker.check_many(batch)
+                # ORM — синхронный, пишем пачку из потока
+                await sync_to_async(store_results)(results)
+                await sync_to_async(refresh_owner_statuses)(owners, [url for url, _, _ in batch])
+                for result in results:
+                    key = "not_modified" if result.not_modified else result.status
+                    totals[key] = totals.get(key, 0) + 1
+        finally:
+            await checker.close()
+        return totals
@@ -0,0 +1,94 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from archive.caching import bump
+from archive.importing import DEFAULT_BATCH_SIZE, ResourceImporter, iter_rows
+from archive.models import Category, Resource, Tag
+from archive.related import rebuild_all
+
+
+class Command(BaseCommand):
+    help = (
+        "Импортирует ресурсы из выгрузки parse_professional_programming.py "
+        "(JSON, NDJSON или CSV). Повторный импорт обновляет записи по URL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Файл .json / .ndjson / .csv")
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument(
+            "--category-field",
+            default="category_h1",
+            choices=["category_h1", "category_h2", "category_h3", "category_path"],
+            help="Какой заголовок считать категорией (по умолчанию: %(default)s)",
+        )
+        parser.add_argument(
+            "--tag-field",
+            action="append",
+            dest="tag_fields",
+            help="Поля, из которых берутся теги (по умолчанию: category_h2 и category_h3)",
+        )
+        parser.add_argument("--source-name", default="professional-programming")
+        parser.add_argument(
+            "--draft", action="store_true", help="Импортировать неопубликованными"
+        )
+        parser.add_argument(
+            "--rebuild-related",
+            action="store_true",
+            help="После импорта перестроить таблицу похожих ресурсов",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size должен быть положительным")
+
+        importer = ResourceImporter(
+            batch_size=options["batch_size"],
+            category_field=options["category_field"],
+            tag_fields=tuple(options["tag_fields"] or ("category_h2", "category_h3")),
+            source_name=options["source_name"],
+            publish=not options["draft"],
+        )
+
+        started = time.perf_counter()
+        try:
+            stats = importer.run(iter_rows(options["path"]))
+        except FileNotFoundError:
+            raise CommandError(f"Файл не найден: {options['path']}")
+        except ValueError as exc:
+            raise CommandError(f"Не удалось разобрать файл: {exc}")
+        finally:
+            # пачки до ошибки уже закоммичены — последний шаг нужен и им;
+            # его собственная ошибка не глотается
+            if importer.stats.created or importer.stats.updated:
+                self.finish(importer, options)
+        elapsed = time.perf_counter() - started
+
+        rate = stats.read / elapsed if elapsed else 0
+        self.stdout.write(
+            f"Прочитано строк: {stats.read}\n"
+            f"Создано: {stats.created}, обновлено: {stats.updated}\n"
+            f"Дубли в файле: {stats.duplicates}, пропущено: {stats.skipped}\n"
+            f"Новых категорий: {stats.categories}, новых тегов: {stats.tags}"
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Готово за {elapsed:.2f} с ({rate:,.0f} строк/с)")
+        )
+
+    def finish(self, importer, options):
+        """Кэш блоков и похожие ресурсы: upsert идёт мимо сигналов."""
+        bump(Resource, Category, Tag)
+
+        if options["rebuild_related"]:
+            started = time.perf_counter()
+            with transaction.atomic():
+                total = rebuild_all()
+            self.stdout.write(
+                f"Похожие ресурсы: {total} связей за {time.perf_counter() - started:.2f} с"
+            )
+        else:
+            self.stdout.write(
+                "Похожие ресурсы не пересчитаны: manage.py rebuild_related_resources"
+            )
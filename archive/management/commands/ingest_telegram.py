@@ -0,0 +1,95 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from archive.caching import bump
+from archive.importing import DEFAULT_BATCH_SIZE, ImportStats
+from archive.models import Category, Resource, Tag
+from archive.related import refresh_resource
+from archive.telegram_ingest import JsonlTail, TelegramImporter, message_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Загружает ссылки из выгрузки telegram_export.py в ресурсы архива. "
+        "Читает только дописанное с прошлого запуска (байтовый checkpoint)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", nargs="?", default="devs_storage_messages.jsonl")
+        parser.add_argument("--checkpoint", help="Файл checkpoint (по умолчанию: <path>.ingest.json)")
+        parser.add_argument("--channel", default="devs_storage", help="username канала для ссылки на пост")
+        parser.add_argument("--category", default="", help="Категория для всех ресурсов")
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument("--draft", action="store_true", help="Импортировать неопубликованными")
+        parser.add_argument(
+            "--follow",
+            action="store_true",
+            help="Не выходить на конце файла, а ждать новые строки (как tail -f)",
+        )
+        parser.add_argument("--interval", type=float, default=5.0, help="Пауза в режиме --follow, сек")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size должен быть положительным")
+
+        tail = JsonlTail(options["path"], options["checkpoint"])
+        importer = TelegramImporter(
+            batch_size=options["batch_size"],
+            source_name=f"Telegram @{options['channel'].lstrip('@')}" if options["channel"] else "Telegram",
+            publish=not options["draft"],
+        )
+
+        try:
+            while True:
+                started = time.perf_counter()
+                messages = self.ingest(tail, importer, options)
+                if messages:
+                    stats = importer.stats
+                    elapsed = time.perf_counter() - started
+                    self.stdout.write(
+                        f"Сообщений: {messages}, ссылок: {stats.read}, новых ресурсов: {stats.created}, "
+                        f"дублей: {stats.duplicates}, пропущено: {stats.skipped} "
+                        f"({elapsed:.2f} с, смещение {tail.offset})"
+                    )
+                if tail.rotated_missed:
+                    self.stderr.write(
+                        "Файл был ротирован, а ротированная копия не найдена — часть строк пропущена"
+                    )
+                    tail.rotated_missed = False
+                if not options["follow"]:
+                    break
+                time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f"Готово, смещение {tail.offset}"))
+
+    def ingest(self, tail, importer, options):
+        importer.stats = ImportStats()
+        messages = 0
+        try:
+            for batch, position in tail.batches(options["batch_size"]):
+                rows = []
+                for message in batch:
+                    for row in message_rows(message, options["channel"]):
+                        row["category"] = options["category"]
+                        rows.append(row)
+                importer.import_batch(rows)
+                # смещение — только после коммита пачки
+                tail.commit(position)
+                messages += len(batch)
+        finally:
+            # закоммиченные до ошибки пачки тоже доводим до конца;
+            # ошибка самого шага не глотается
+            self.finish(importer)
+        return messages
+
+    def finish(self, importer):
+        """Кэш блоков и похожие ресурсы для новых ресурсов: upsert идёт мимо сигналов."""
+        if not importer.created_ids:
+            return
+        bump(Resource, Category, Tag)
+        for pk in sorted(importer.created_ids):
+            refresh_resource(pk)
+        importer.created_ids.clear()
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from archive.avatars import update_from_upload, update_from_url
+from archive.models import Profile
+
+
+class Command(BaseCommand):
+    help = (
+        "Делает миниатюры аватаров (archive/avatars.py) для профилей, у которых их ещё нет: "
+        "из загруженного avatar, а без него — из Google avatar_url. --force — пересоздать все."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true")
+        parser.add_argument("--no-download", action="store_true", help="не качать avatar_url")
+
+    def handle(self, *args, **options):
+        has_avatar = Q(avatar__isnull=False) & ~Q(avatar="")
+        has_url = Q(avatar_url__isnull=False) & ~Q(avatar_url="")
+        profiles = Profile.objects.filter(has_avatar | has_url)
+        if not options["force"]:
+            profiles = profiles.filter(avatar_thumbnails={})
+
+        done = 0
+        for profile in profiles.iterator(chunk_size=200):
+            if profile.avatar:
+                update_from_upload(profile)
+            elif options["no_download"]:
+                continue
+            else:
+                if options["force"]:
+                    profile.avatar_source = ""
+                update_from_url(profile, profile.avatar_url)
+            profile.save(update_fields=["avatar_thumbnails", "avatar_source"])
+            done += bool(profile.avatar_thumbnails)
+        self.stdout.write(f"Профилей с миниатюрами: {done}")
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from archive.email_login import purge_expired
+
+
+class Command(BaseCommand):
+    help = (
+        "Удаляет просроченные коды входа по email (старше EMAIL_LOGIN_CODE_TTL) пачками "
+        "по --batch-size строк: каждая пачка — короткий DELETE по первичному ключу."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0.0,
+            help="Пауза между пачками, секунд (разгрузить БД при большом хвосте)",
+        )
+
+    def handle(self, *args, **options):
+        deleted = purge_expired(batch_size=options["batch_size"], pause=options["pause"])
+        self.stdout.write(f"Удалено кодов: {deleted}")
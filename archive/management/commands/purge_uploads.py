@@ -0,0 +1,20 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from archive.uploads import purge_stale
+
+
+class Command(BaseCommand):
+    help = (
+        "Удаляет брошенные чанковые загрузки (archive/uploads.py): сессии, которые не "
+        "менялись дольше --hours часов, и их staging-файлы. Готовые файлы не трогает."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hours", type=float, default=24)
+
+    def handle(self, *args, **options):
+        sessions, files = purge_stale(timezone.now() - timedelta(hours=options["hours"]))
+        self.stdout.write(f"Удалено сессий: {sessions}, staging-файлов: {files}")
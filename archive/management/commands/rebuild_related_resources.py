@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from archive.related import RELATED_STORED, rebuild_all, refresh_resource
+
+
+class Command(BaseCommand):
+    help = (
+        "Перестраивает таблицу похожих ресурсов. Без аргументов — целиком, "
+        "с --resource — только для указанных ресурсов."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=RELATED_STORED)
+        parser.add_argument("--resource", type=int, action="append", default=[])
+
+    def handle(self, *args, **options):
+        if options["resource"]:
+            for pk in options["resource"]:
+                refresh_resource(pk, limit=options["limit"])
+            self.stdout.write(
+                self.style.SUCCESS(f"Обновлено ресурсов: {len(options['resource'])}")
+            )
+            return
+
+        with transaction.atomic():
+            total = rebuild_all(limit=options["limit"])
+        self.stdout.write(self.style.SUCCESS(f"Записано связей: {total}"))
@@ -0,0 +1,127 @@
+import os
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from archive.tasks import (
+    HEARTBEAT_INTERVAL,
+    claim,
+    execute,
+    forget_worker,
+    heartbeat,
+    purge_finished,
+    requeue_stale,
+)
+
+# как часто возвращать зависшие задачи и чистить выполненные, секунд
+HOUSEKEEPING_INTERVAL = 60
+
+
+class Command(BaseCommand):
+    help = (
+        "Воркер очереди фоновых задач (archive/tasks.py): забирает готовые задачи из БД "
+        "и выполняет их в пуле из --concurrency потоков. Останавливается по SIGTERM / "
+        "Ctrl+C, дождавшись уже начатых задач."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=getattr(settings, "TASKS_WORKER_CONCURRENCY", 2),
+            help="Сколько задач выполнять одновременно",
+        )
+        parser.add_argument(
+            "--queues",
+            default="default",
+            help="Очереди через запятую",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=getattr(settings, "TASKS_POLL_INTERVAL", 2),
+            help="Пауза между опросами пустой очереди, секунд",
+        )
+        parser.add_argument("--once", action="store_true", help="Выполнить готовые задачи и выйти")
+        parser.add_argument("--max-tasks", type=int, default=0, help="Выйти после N задач (0 — без ограничения)")
+
+    def handle(self, *args, **options):
+        concurrency = max(options["concurrency"], 1)
+        queues = [q.strip() for q in options["queues"].split(",") if q.strip()]
+        poll_interval = options["poll_interval"]
+        max_tasks = options["max_tasks"]
+        worker_id = f"{socket.gethostname()}:{os.getpid()}"[:100]
+
+        stop = threading.Event()
+        if threading.current_thread() is threading.main_thread():
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                signal.signal(signum, lambda *_: stop.set())
+
+        self.stdout.write(f"Воркер {worker_id}: очереди {', '.join(queues)}, потоков {concurrency}")
+        done = failed = 0
+        running = set()
+        next_housekeeping = next_heartbeat = 0.0
+
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="task") as pool:
+            while not stop.is_set():
+                if time.monotonic() >= next_housekeeping:
+                    self._housekeeping()
+                    next_housekeeping = time.monotonic() + HOUSEKEEPING_INTERVAL
+                if time.monotonic() >= next_heartbeat:
+                    heartbeat(worker_id, queues)
+                    next_heartbeat = time.monotonic() + HEARTBEAT_INTERVAL
+
+                free = concurrency - len(running)
+                if max_tasks:
+                    free = min(free, max_tasks - done - failed - len(running))
+                claimed = claim(worker_id, queues, free) if free > 0 else []
+                for task_row in claimed:
+                    running.add(pool.submit(self._run, task_row))
+
+                if not running:
+                    if options["once"] or (max_tasks and done + failed >= max_tasks):
+                        break
+                    stop.wait(poll_interval)
+                    continue
+
+                finished, running = wait(
+                    running, timeout=poll_interval, return_when=FIRST_COMPLETED
+                )
+                running = set(running)
+                for future in finished:
+                    if future.result():
+                        done += 1
+                    else:
+                        failed += 1
+
+            for future in running:
+                if future.result():
+                    done += 1
+                else:
+                    failed += 1
+
+        forget_worker(worker_id)
+        close_old_connections()
+        self.stdout.write(f"Выполнено: {done}, с ошибкой: {failed}")
+
+    @staticmethod
+    def _run(task_row):
+        try:
+            return execute(task_row)
+        finally:
+            # у каждого потока пула своё соединение с БД
+            close_old_connections()
+
+    def _housekeeping(self):
+        requeued, dead = requeue_stale(getattr(settings, "TASKS_LOCK_TIMEOUT", 600))
+        purged = purge_finished(getattr(settings, "TASKS_KEEP_DONE_HOURS", 24 * 7))
+        if requeued or dead or purged:
+            self.stdout.write(
+                f"Возвращено в очередь: {requeued}, в dead: {dead}, удалено выполненных: {purged}"
+            )
@@ -0,0 +1,278 @@
+# archive/metrics.py
+"""
+Метрики в формате Prometheus: /metrics (archive.views.metrics_view).
+
+Что собирается:
+- запросы по имени URL (view_name): счётчик по статусу, гистограммы
+  времени, числа SQL и времени SQL — из InstrumentationMiddleware
+  (archive/instrumentation.py);
+- попадания / промахи кэшей: блоки и ответы (archive/caching.py),
+  шапка профиля (archive/profiles.py), LRU тегов (hub/tags.py);
+- воркеры gunicorn: живые процессы, их время старта;
+- предметные показатели: сколько постов / ресурсов / проектов создано за
+  последнюю минуту — считается запросом в БД в момент опроса.
+
+Хранение. Каждый процесс копит значения в памяти (registry). У gunicorn
+несколько воркеров, а /metrics попадает в один из них, поэтому при
+заданном METRICS_MULTIPROC_DIR процесс раз в METRICS_FLUSH_SECONDS (и при
+выходе) пишет свои значения в <dir>/<pid>.json, а на опросе складывает
+файлы всех процессов. Счётчики умерших воркеров продолжают суммироваться,
+чтобы total не убывал; в «живые» показатели попадают только процессы,
+которые есть в системе. Каталог очищает gunicorn.conf.py при старте
+мастера. Без METRICS_MULTIPROC_DIR (runserver, один процесс) — только
+память.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.utils import timezone
+
+PREFIX = "webarchive"
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+HELP = {
+    "http_requests_total": ("counter", "HTTP-запросы по имени URL, методу и статусу"),
+    "http_request_duration_seconds": ("histogram", "Время обработки запроса"),
+    "db_queries_per_request": ("histogram", "Число SQL-запросов на HTTP-запрос"),
+    "db_duration_seconds_per_request": ("histogram", "Суммарное время SQL на HTTP-запрос"),
+    "cache_requests_total": ("counter", "Обращения к кэшам: result=hit|miss"),
+    "cache_hit_ratio": ("gauge", "Доля попаданий кэша с запуска"),
+    "worker_up": ("gauge", "Живой процесс приложения (воркер gunicorn)"),
+    "worker_start_time_seconds": ("gauge", "Время запуска процесса, unix"),
+    "workers": ("gauge", "Число живых процессов приложения"),
+    "objects_created_last_minute": ("gauge", "Создано объектов за последнюю минуту"),
+}
+
+# метка model → (модель, поле времени создания)
+CREATED_MODELS = {
+    "posts": ("hub.Post", "created_at"),
+    "resources": ("archive.Resource", "created_at"),
+    "projects": ("hub.Project", "created_at"),
+}
+
+
+# =========================
+# Хранилище процесса
+# =========================
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}    # (имя, метки) → число
+        self.histograms = {}  # (имя, метки) → [счётчики корзин..., сумма, количество]
+        self.buckets = {}     # имя гистограммы → границы
+        self.started_at = time.time()
+        self._thread = None
+
+    def inc(self, name, labels, n=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + n
+            self._ensure_flusher()
+
+    def observe(self, name, labels, value, buckets):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.buckets.setdefault(name, buckets)
+            row = self.histograms.get(key)
+            if row is None:
+                row = self.histograms[key] = [0] * len(buckets) + [0.0, 0]
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    row[i] += 1
+                    break
+            row[-2] += value
+            row[-1] += 1
+            self._ensure_flusher()
+
+    def state(self):
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "started_at": self.started_at,
+                "counters": [[name, list(labels), value] for (name, labels), value in self.counters.items()],
+                "histograms": [[name, list(labels), list(row)] for (name, labels), row in self.histograms.items()],
+                "buckets": dict(self.buckets),
+            }
+
+    # --- запись в METRICS_MULTIPROC_DIR ---
+    def _ensure_flusher(self):
+        if self._thread is None and multiproc_dir() is not None:
+            self._thread = threading.Thread(target=self._run, name="metrics-flush", daemon=True)
+            self._thread.start()
+            atexit.register(self.flush)
+
+    def _run(self):
+        interval = getattr(settings, "METRICS_FLUSH_SECONDS", 5)
+        while True:
+            time.sleep(interval)
+            self.flush()
+
+    def flush(self):
+        directory = multiproc_dir()
+        if directory is None:
+            return
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{os.getpid()}.json"
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.state()))
+        # атомарно: читатель не увидит недописанный файл
+        os.replace(tmp, path)
+
+
+registry = Registry()
+
+
+def multiproc_dir():
+    value = getattr(settings, "METRICS_MULTIPROC_DIR", "")
+    return Path(value) if value else None
+
+
+# =========================
+# Точки сбора
+# =========================
+def observe_request(view_name, method, status, seconds, queries, sql_seconds):
+    labels = {"view": view_name, "method": method}
+    registry.inc("http_requests_total", {**labels, "status": str(status)})
+    registry.observe("http_request_duration_seconds", labels, seconds, DURATION_BUCKETS)
+    registry.observe("db_queries_per_request", labels, queries, QUERY_BUCKETS)
+    registry.observe("db_duration_seconds_per_request", labels, sql_seconds, DURATION_BUCKETS)
+
+
+def cache_result(cache, hit, n=1):
+    if n:
+        registry.inc("cache_requests_total", {"cache": cache, "result": "hit" if hit else "miss"}, n)
+
+
+# =========================
+# Сборка ответа
+# =========================
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def collect_states():
+    """Состояния всех процессов: из файлов METRICS_MULTIPROC_DIR или только своё."""
+    directory = multiproc_dir()
+    if directory is None:
+        return [registry.state()]
+    registry.flush()
+    states = []
+    for path in directory.glob("*.json"):
+        try:
+            states.append(json.loads(path.read_text()))
+        except (OSError, ValueError):
+            # файл удалён / перезаписан между glob и чтением
+            continue
+    return states
+
+
+def merge(states):
+    counters, histograms, buckets = {}, {}, {}
+    for state in states:
+        buckets.update(state["buckets"])
+        for name, labels, value in state["counters"]:
+            key = (name, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, row in state["histograms"]:
+            key = (name, tuple(map(tuple, labels)))
+            merged = histograms.get(key)
+            histograms[key] = row if merged is None else [a + b for a, b in zip(merged, row)]
+    return counters, histograms, buckets
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+def _number(value):
+    if isinstance(value, float):
+        return repr(round(value, 6))
+    return str(value)
+
+
+def _format_bound(bound):
+    return "+Inf" if bound == float("inf") else repr(float(bound))
+
+
+def objects_created_last_minute():
+    since = timezone.now() - timedelta(minutes=1)
+    result = {}
+    for label, (model_label, field) in CREATED_MODELS.items():
+        model = apps.get_model(model_label)
+        result[label] = model._default_manager.filter(**{f"{field}__gte": since}).count()
+    return result
+
+
+def render():
+    """Текст в формате Prometheus exposition 0.0.4."""
+    states = collect_states()
+    counters, histograms, buckets = merge(states)
+    samples = {}  # имя → [строки]
+
+    def add(name, pairs, value):
+        samples.setdefault(name, []).append(f"{PREFIX}_{name}{_labels(pairs)} {_number(value)}")
+
+    for (name, pairs), value in sorted(counters.items()):
+        add(name, pairs, value)
+
+    for (name, pairs), row in sorted(histograms.items()):
+        bounds = list(buckets[name]) + [float("inf")]
+        cumulative = 0
+        # последняя корзина (+Inf) — всё, что не попало в конечные
+        counts = row[:-2] + [row[-1] - sum(row[:-2])]
+        for bound, count in zip(bounds, counts):
+            cumulative += count
+            samples.setdefault(name, []).append(
+                f"{PREFIX}_{name}_bucket{_labels(pairs + (('le', _format_bound(bound)),))} {cumulative}"
+            )
+        samples[name].append(f"{PREFIX}_{name}_sum{_labels(pairs)} {_number(row[-2])}")
+        samples[name].append(f"{PREFIX}_{name}_count{_labels(pairs)} {row[-1]}")
+
+    # доля попаданий по каждому кэшу
+    totals = {}
+    for (name, pairs), value in counters.items():
+        if name == "cache_requests_total":
+            labels = dict(pairs)
+            hits, all_ = totals.get(labels["cache"], (0, 0))
+            totals[labels["cache"]] = (hits + value * (labels["result"] == "hit"), all_ + value)
+    for cache, (hits, all_) in sorted(totals.items()):
+        add("cache_hit_ratio", (("cache", cache),), hits / all_ if all_ else 0.0)
+
+    alive = [state for state in states if _pid_alive(state["pid"])]
+    for state in sorted(alive, key=lambda s: s["pid"]):
+        add("worker_up", (("pid", state["pid"]),), 1)
+        add("worker_start_time_seconds", (("pid", state["pid"]),), float(state["started_at"]))
+    add("workers", (), len(alive))
+
+    for label, count in objects_created_last_minute().items():
+        add("objects_created_last_minute", (("model", label),), count)
+
+    lines = []
+    for name, rows in samples.items():
+        kind, help_text = HELP[name]
+        lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+        lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+        lines.extend(rows)
+    return "\n".join(lines) + "\n"
+
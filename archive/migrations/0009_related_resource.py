@@ -0,0 +1,43 @@
+# Generated by Django 5.0.14 on 2026-10-18 02:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_related(apps, schema_editor):
+    from archive.related import rebuild_all
+
+    rebuild_all(
+        apps.get_model('archive', 'Resource'),
+        apps.get_model('archive', 'RelatedResource'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('archive', '0008_emaillogincode'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedResource',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('shared_tags', models.PositiveIntegerField(default=0)),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='archive.resource')),
+                ('resource', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_links', to='archive.resource')),
+            ],
+            options={
+                'verbose_name': 'Похожий ресурс',
+                'verbose_name_plural': 'Похожие ресурсы',
+                'indexes': [models.Index(fields=['resource', '-score'], name='archive_related_score_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='relatedresource',
+            constraint=models.UniqueConstraint(fields=('resource', 'related'), name='archive_related_resource_uniq'),
+        ),
+        migrations.RunPython(build_related, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.0.14 on 2026-10-18 02:30
+
+from django.db import migrations, models
+
+
+def backfill_url_key(apps, schema_editor):
+    # Уже заведённые ресурсы тоже участвуют в дедупликации импорта;
+    # при совпадении URL ключ получает самый ранний ресурс.
+    from archive.importing import url_key
+
+    Resource = apps.get_model('archive', 'Resource')
+    seen = set()
+    batch = []
+    for resource in Resource.objects.exclude(external_url='').order_by('id').only('id', 'external_url'):
+        key = url_key(resource.external_url)
+        if not key or key in seen:
+            continue
+        seen.add(key)
+        resource.url_key = key
+        batch.append(resource)
+    Resource.objects.bulk_update(batch, ['url_key'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('archive', '0009_related_resource'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resource',
+            name='url_key',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True),
+        ),
+        migrations.RunPython(backfill_url_key, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.0.14 on 2026-10-18 02:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('archive', '0010_resource_url_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LinkCheck',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.URLField(max_length=500, unique=True)),
+                ('status', models.CharField(choices=[('unknown', 'Не проверялась'), ('ok', 'Работает'), ('broken', 'Битая'), ('error', 'Недоступна')], db_index=True, default='unknown', max_length=10)),
+                ('status_code', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('final_url', models.URLField(blank=True, max_length=500)),
+                ('error', models.CharField(blank=True, max_length=255)),
+                ('etag', models.CharField(blank=True, max_length=255)),
+                ('last_modified', models.CharField(blank=True, max_length=64)),
+                ('failures', models.PositiveIntegerField(default=0)),
+                ('checked_at', models.DateTimeField(blank=True, db_index=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Проверка ссылки',
+                'verbose_name_plural': 'Проверки ссылок',
+            },
+        ),
+        migrations.AddField(
+            model_name='resource',
+            name='link_checked_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='resource',
+            name='link_status',
+            field=models.CharField(choices=[('unknown', 'Не проверялась'), ('ok', 'Работает'), ('broken', 'Битая'), ('error', 'Недоступна')], db_index=True, default='unknown', max_length=10),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-18 02:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('archive', '0011_link_checks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resource',
+            name='download_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.14 on 2026-10-18 03:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('archive', '0013_chunked_uploads'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='avatar_source',
+            field=models.URLField(blank=True, editable=False, max_length=500),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='avatar_thumbnails',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.0.14 on 2026-10-18 03:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('archive', '0015_task_queue'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='emaillogincode',
+            index=models.Index(fields=['email', 'is_used', '-created_at'], name='archive_logincode_lookup_idx'),
+        ),
+        # старый индекс по email убираем после создания нового
+        migrations.RemoveIndex(
+            model_name='emaillogincode',
+            name='archive_ema_email_bad61d_idx',
+        ),
+    ]
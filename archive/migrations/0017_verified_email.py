@@ -0,0 +1,45 @@
+# Generated by Django 5.0.14 on 2026-10-18 03:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_google_emails(apps, schema_editor):
+    """Email пользователей, входивших через Google, Google уже подтвердил."""
+    UserSocialAuth = apps.get_model("social_django", "UserSocialAuth")
+    VerifiedEmail = apps.get_model("archive", "VerifiedEmail")
+    seen = set()
+    rows = (
+        UserSocialAuth.objects.filter(provider="google-oauth2")
+        .exclude(user__email="")
+        .order_by("user_id")
+        .values_list("user_id", "user__email")
+    )
+    for user_id, email in rows:
+        email = email.strip().lower()
+        if email and email not in seen:
+            seen.add(email)
+            VerifiedEmail.objects.create(email=email, user_id=user_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('archive', '0016_email_login_code_lookup_index'),
+        ('social_django', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VerifiedEmail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email', models.EmailField(max_length=254, unique=True)),
+                ('verified_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='verified_emails', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(backfill_google_emails, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-18 03:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('archive', '0017_verified_email'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emaillogincode',
+            name='failed_attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+    ]
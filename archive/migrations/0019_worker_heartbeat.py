@@ -0,0 +1,31 @@
+# Generated by Django 5.0.14 on 2026-10-18 03:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('archive', '0018_emaillogincode_failed_attempts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkerHeartbeat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('worker_id', models.CharField(max_length=100)),
+                ('queue', models.CharField(max_length=50)),
+                ('seen_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Воркер очереди',
+                'verbose_name_plural': 'Воркеры очереди',
+                'indexes': [models.Index(fields=['queue', 'seen_at'], name='archive_heartbeat_queue_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='workerheartbeat',
+            constraint=models.UniqueConstraint(fields=('worker_id', 'queue'), name='archive_heartbeat_unique'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+from django.db import migrations
+
+
+def rekey_url_keys(apps, schema_editor):
+    # Параметры вида ?reference= / ?refresh= раньше отсекались как трекинговые
+    # (префикс «ref»): у таких ресурсов ключ совпадал с адресом без них.
+    # Пересчитываем ключи ресурсов, у которых они есть (созданные вручную
+    # остаются без ключа); при совпадении ключ — у самого раннего, как в 0010.
+    from archive.importing import url_key
+
+    Resource = apps.get_model('archive', 'Resource')
+    seen = set()
+    changed = []
+    for resource in Resource.objects.exclude(url_key=None).order_by('id').only('id', 'external_url', 'url_key'):
+        key = url_key(resource.external_url)
+        if not key or key in seen:
+            key = None
+        else:
+            seen.add(key)
+        if key != resource.url_key:
+            resource.url_key = key
+            changed.append(resource)
+    if not changed:
+        return
+    # сначала снимаем старые ключи: ключи могут переходить между ресурсами,
+    # а уникальность проверяется построчно
+    Resource.objects.filter(pk__in=[r.pk for r in changed]).update(url_key=None)
+    Resource.objects.bulk_update(changed, ['url_key'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('archive', '0019_worker_heartbeat'),
+    ]
+
+    operations = [
+        migrations.RunPython(rekey_url_keys, migrations.RunPython.noop),
+    ]
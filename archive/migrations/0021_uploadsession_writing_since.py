@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-18 03:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('archive', '0020_rekey_tracking_params'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadsession',
+            name='writing_since',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,44 @@
+import hashlib
+
+from django.db import migrations, models
+
+
+def fill_url_hash(apps, schema_editor):
+    # URL длиннее 500 символов раньше обрезались и не находились при следующем
+    # запуске; такие строки просто перепроверятся под полным URL
+    LinkCheck = apps.get_model('archive', 'LinkCheck')
+    batch = []
+    for check in LinkCheck.objects.only('id', 'url').iterator(chunk_size=1000):
+        check.url_hash = hashlib.sha256(check.url.encode('utf-8')).hexdigest()
+        batch.append(check)
+        if len(batch) >= 1000:
+            LinkCheck.objects.bulk_update(batch, ['url_hash'])
+            batch = []
+    if batch:
+        LinkCheck.objects.bulk_update(batch, ['url_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('archive', '0021_uploadsession_writing_since'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='linkcheck',
+            name='url_hash',
+            field=models.CharField(editable=False, max_length=64, null=True),
+        ),
+        migrations.RunPython(fill_url_hash, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='linkcheck',
+            name='url_hash',
+            field=models.CharField(editable=False, max_length=64, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='linkcheck',
+            name='url',
+            field=models.TextField(),
+        ),
+    ]
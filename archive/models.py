@@ -1,3 +1,5 @@
+import uuid
+
 from django.conf import settings
 from django.db import models
 from django.urls import reverse
@@ -33,6 +35,13 @@ class Tag(models.Model):
         return self.name
 
 
+class LinkStatus(models.TextChoices):
+    UNKNOWN = "unknown", "Не проверялась"
+    OK = "ok", "Работает"
+    BROKEN = "broken", "Битая"
+    ERROR = "error", "Недоступна"
+
+
 class Resource(models.Model):
     MANUAL = "manual"
     SCRIPT = "script"
@@ -94,7 +103,21 @@ class Resource(models.Model):
     source_name = models.CharField(max_length=200, blank=True)
     source_url = models.URLField(blank=True)
 
+    # sha256 нормализованного URL — ключ дедупликации при импорте
+    # (archive/importing.py); у созданных вручную ресурсов пустой
+    url_key = models.CharField(
+        max_length=64, unique=True, null=True, blank=True, editable=False
+    )
+
+    # худший статус среди ссылок ресурса (archive/linkcheck.py)
+    link_status = models.CharField(
+        max_length=10, choices=LinkStatus.choices, default=LinkStatus.UNKNOWN, db_index=True
+    )
+    link_checked_at = models.DateTimeField(null=True, blank=True)
+
     uploaded_file = models.FileField(upload_to="uploads/", blank=True, null=True)
+    # пишется пачками из archive/downloads.py (DownloadCounter)
+    download_count = models.PositiveIntegerField(default=0, editable=False)
 
     # 👇 Новое поле для GitHub (можно использовать именно под проекты)
     github_url = models.URLField(blank=True, null=True)
@@ -117,6 +140,187 @@ class Resource(models.Model):
         return reverse("resource_detail", args=[self.slug])
 
 
+class RelatedResource(models.Model):
+    """
+    Предрасчитанная похожесть ресурсов (см. archive/related.py).
+    Для каждого ресурса хранится ограниченный топ соседей по score.
+    """
+    resource = models.ForeignKey(
+        Resource, on_delete=models.CASCADE, related_name="related_links"
+    )
+    related = models.ForeignKey(
+        Resource, on_delete=models.CASCADE, related_name="+"
+    )
+    score = models.FloatField()
+    shared_tags = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Похожий ресурс"
+        verbose_name_plural = "Похожие ресурсы"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["resource", "related"], name="archive_related_resource_uniq"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["resource", "-score"], name="archive_related_score_idx"
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.resource_id} → {self.related_id} ({self.score})"
+
+
+class LinkCheck(models.Model):
+    """Результат последней проверки одного URL (manage.py check_links)."""
+
+    # URL целиком (без ограничения длины); ключ — sha256 от него (link_key)
+    url = models.TextField()
+    url_hash = models.CharField(max_length=64, unique=True, editable=False)
+    status = models.CharField(
+        max_length=10, choices=LinkStatus.choices, default=LinkStatus.UNKNOWN, db_index=True
+    )
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    final_url = models.URLField(max_length=500, blank=True)
+    error = models.CharField(max_length=255, blank=True)
+    # для условного запроса при следующей проверке
+    etag = models.CharField(max_length=255, blank=True)
+    last_modified = models.CharField(max_length=64, blank=True)
+    failures = models.PositiveIntegerField(default=0)
+    checked_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    class Meta:
+        verbose_name = "Проверка ссылки"
+        verbose_name_plural = "Проверки ссылок"
+
+    def __str__(self) -> str:
+        return f"{self.url} — {self.status}"
+
+
+class UploadedBlob(models.Model):
+    """
+    Файл, собранный чанковой загрузкой (archive/uploads.py). Одинаковое
+    содержимое в одном каталоге upload_to хранится один раз.
+    """
+
+    sha256 = models.CharField(max_length=64)
+    # upload_to поля-владельца: «uploads/», «project_files/»
+    prefix = models.CharField(max_length=100)
+    name = models.CharField(max_length=255, unique=True)
+    size = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Загруженный файл"
+        verbose_name_plural = "Загруженные файлы"
+        constraints = [
+            models.UniqueConstraint(fields=["sha256", "prefix"], name="archive_blob_sha256_prefix_uniq"),
+        ]
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class UploadSession(models.Model):
+    """Незавершённая (или завершённая) чанковая загрузка одного файла."""
+
+    PROJECT = "project"
+    RESOURCE = "resource"
+    TARGET_CHOICES = [
+        (PROJECT, "Архив проекта"),
+        (RESOURCE, "Файл ресурса"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="upload_sessions"
+    )
+    target = models.CharField(max_length=20, choices=TARGET_CHOICES)
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    received = models.BigIntegerField(default=0)
+    # когда PUT занял смещение received и начал писать кусок (None — никто не пишет)
+    writing_since = models.DateTimeField(null=True, blank=True)
+    blob = models.ForeignKey(UploadedBlob, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        verbose_name = "Чанковая загрузка"
+        verbose_name_plural = "Чанковые загрузки"
+
+    def __str__(self) -> str:
+        return f"{self.filename} ({self.received}/{self.size})"
+
+    @property
+    def is_complete(self):
+        return self.blob_id is not None
+
+
+class Task(models.Model):
+    """Отложенный вызов функции (archive/tasks.py, manage.py run_worker)."""
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    DEAD = "dead"
+    STATUS_CHOICES = [
+        (PENDING, "В очереди"),
+        (RUNNING, "Выполняется"),
+        (DONE, "Выполнена"),
+        (DEAD, "Не выполнена (исчерпаны попытки)"),
+    ]
+
+    # dotted path функции, объявленной через @task
+    name = models.CharField(max_length=200)
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    queue = models.CharField(max_length=50, default="default")
+    priority = models.SmallIntegerField(default=0)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    run_at = models.DateTimeField()
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Фоновая задача"
+        verbose_name_plural = "Фоновые задачи"
+        indexes = [
+            # выборка воркером: очередь → готовые к запуску по приоритету
+            models.Index(fields=["status", "queue", "run_at"], name="archive_task_due_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.name} [{self.status}]"
+
+
+class WorkerHeartbeat(models.Model):
+    """Отметка живого воркера очереди: manage.py run_worker обновляет её раз в несколько секунд."""
+
+    worker_id = models.CharField(max_length=100)
+    queue = models.CharField(max_length=50)
+    seen_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Воркер очереди"
+        verbose_name_plural = "Воркеры очереди"
+        constraints = [
+            models.UniqueConstraint(fields=["worker_id", "queue"], name="archive_heartbeat_unique"),
+        ]
+        indexes = [
+            models.Index(fields=["queue", "seen_at"], name="archive_heartbeat_queue_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.worker_id} [{self.queue}]"
+
+
 class DonationLink(models.Model):
     title = models.CharField(max_length=150)
     url = models.URLField()
@@ -163,6 +367,10 @@ class Profile(models.Model):
     bio = models.TextField("Описание", max_length=500, blank=True)
     avatar = models.ImageField("Аватар", upload_to="avatars/", blank=True, null=True)
     avatar_url = models.URLField("Аватар (Google URL)", blank=True, null=True)
+    # миниатюры аватара {сторона: имя файла} — archive/avatars.py
+    avatar_thumbnails = models.JSONField(default=dict, blank=True, editable=False)
+    # URL, из которого сделаны миниатюры (Google), чтобы не качать его повторно
+    avatar_source = models.URLField(max_length=500, blank=True, editable=False)
 
     def __str__(self):
         return self.nickname or self.user.username
@@ -198,6 +406,25 @@ class Comment(models.Model):
         return f"Comment by {self.author} on {self.post}"
 
 
+class VerifiedEmail(models.Model):
+    """
+    Email, владение которым подтверждено: кодом из письма
+    (archive/email_login.py) или входом через Google. Вход по коду
+    находит аккаунт только через эту таблицу — User.email из формы
+    регистрации ничего не доказывает. Один адрес — один аккаунт.
+    """
+    email = models.EmailField(unique=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="verified_emails",
+    )
+    verified_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.email} → {self.user}"
+
+
 class EmailLoginCode(models.Model):
     """
     Одноразовый код для входа по email.
@@ -206,10 +433,18 @@ class EmailLoginCode(models.Model):
     code = models.CharField(max_length=6)
     created_at = models.DateTimeField(auto_now_add=True)
     is_used = models.BooleanField(default=False)
+    # неверные вводы; после EMAIL_LOGIN_MAX_ATTEMPTS код гасится (is_used)
+    failed_attempts = models.PositiveSmallIntegerField(default=0)
 
     class Meta:
         indexes = [
-            models.Index(fields=["email"]),
+            # проверка кода: email + is_used=False, самый свежий.
+            # Покрывает и поиск по одному email, отдельный индекс не нужен.
+            models.Index(
+                fields=["email", "is_used", "-created_at"],
+                name="archive_logincode_lookup_idx",
+            ),
+            # purge_login_codes: created_at < now - TTL
             models.Index(fields=["created_at"]),
         ]
         ordering = ["-created_at"]
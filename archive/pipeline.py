@@ -1,5 +1,7 @@
 from django.contrib.auth import get_user_model
-from .models import Profile
+from .avatars import fetch_google_avatar, needs_google_fetch
+from .email_login import mark_verified
+from .profiles import get_profile
 
 User = get_user_model()
 
@@ -9,6 +11,9 @@ def save_profile(backend, user, response, *args, **kwargs):
     После логина через Google:
     - обновляем user.email / first_name / last_name
     - создаём/обновляем Profile (nickname, avatar_url)
+
+    Пишем только изменившиеся поля и только если что-то изменилось:
+    обычный повторный вход не делает ни одного UPDATE.
     """
     details = kwargs.get("details") or {}
 
@@ -18,8 +23,9 @@ def save_profile(backend, user, response, *args, **kwargs):
     last_name = details.get("last_name")
 
     # ---- обновляем User ----
+    user_changes = {}
     if email and not user.email:
-        user.email = email
+        user_changes["email"] = email
 
     if not first_name and fullname:
         parts = fullname.split(" ", 1)
@@ -27,23 +33,49 @@ def save_profile(backend, user, response, *args, **kwargs):
         last_name = parts[1] if len(parts) > 1 else ""
 
     if first_name:
-        user.first_name = first_name
+        user_changes["first_name"] = first_name
     if last_name:
-        user.last_name = last_name
-    user.save()
+        user_changes["last_name"] = last_name
+
+    changed = _apply(user, user_changes)
+    if changed:
+        user.save(update_fields=changed)
+
+    # Google отдаёт только подтверждённые адреса — вход по коду на этот
+    # email будет попадать в этот аккаунт (archive/email_login.py)
+    if backend.name == "google-oauth2" and email and response.get("email_verified", True):
+        mark_verified(user, email)
 
     # ---- профиль ----
-    profile, _ = Profile.objects.get_or_create(user=user)
+    # тот же путь, что у сигнала: новому пользователю профиль уже создан
+    profile = get_profile(user)
+    profile_changes = {}
 
     # если ник пустой — ставим полное имя или username
     if not profile.nickname:
-        profile.nickname = fullname or user.username
+        profile_changes["nickname"] = fullname or user.username
 
     picture_url = None
     if backend.name == "google-oauth2":
         picture_url = response.get("picture")  # Google обычно кладёт URL сюда
 
     if picture_url:
-        profile.avatar_url = picture_url
+        profile_changes["avatar_url"] = picture_url
+
+    changed = _apply(profile, profile_changes)
+    if changed:
+        profile.save(update_fields=changed)
+
+    # миниатюры из картинки Google (если своей аватарки нет) — в воркере
+    if needs_google_fetch(profile, picture_url):
+        fetch_google_avatar.delay(profile.pk, picture_url)
+
 
-    profile.save()
\ No newline at end of file
+def _apply(instance, values):
+    """Присваивает отличающиеся значения, возвращает список изменённых полей."""
+    changed = []
+    for field, value in values.items():
+        if getattr(instance, field) != value:
+            setattr(instance, field, value)
+            changed.append(field)
+    return changed
@@ -0,0 +1,74 @@
+# archive/profiles.py
+"""
+Профиль пользователя.
+
+get_profile(user) — единственный путь «профиль есть или создаётся»:
+им пользуются сигнал post_save(User), social-auth pipeline и страница
+профиля. Профиль, созданный сигналом, кладётся в кэш user.profile,
+поэтому pipeline сразу после создания пользователя не делает ни SELECT,
+ни второго INSERT.
+
+display_for(user) — то, что шапка base.html показывает о текущем
+пользователе (имя, миниатюра аватара, буква-заглушка). Запись лежит в
+кэше под ключом пользователя и сбрасывается сигналами при сохранении
+Profile (ProfileForm, pipeline, задачи миниатюр) и User, так что на
+обычной странице профиль из БД не читается. С CACHE_BACKEND=locmem
+сброс виден только процессу, сохранившему профиль; остальные покажут
+старое не дольше PROFILE_DISPLAY_CACHE_TIMEOUT.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from .avatars import thumbnail_url
+from .metrics import cache_result
+from .models import Profile
+
+# сторона аватара в шапке, px
+HEADER_AVATAR_SIZE = 28
+DISPLAY_KEY = "profile-display:{user_id}"
+
+
+def get_profile(user, created=False):
+    """created=True — пользователь только что создан, профиля у него точно нет."""
+    if not created:
+        try:
+            return user.profile
+        except Profile.DoesNotExist:
+            pass
+    # get_or_create: профиль мог успеть создать параллельный запрос
+    profile, _ = Profile.objects.get_or_create(user=user)
+    user.profile = profile
+    return profile
+
+
+def _display_key(user_id):
+    return DISPLAY_KEY.format(user_id=user_id)
+
+
+def build_display(user, profile):
+    name = (profile.nickname if profile else "") or user.get_username()
+    return {
+        "name": name,
+        "initial": name[:1].upper(),
+        "avatar": thumbnail_url(profile, HEADER_AVATAR_SIZE) if profile else "",
+    }
+
+
+def display_for(user):
+    """{name, initial, avatar} текущего пользователя — из кэша или одним запросом."""
+    key = _display_key(user.pk)
+    display = cache.get(key)
+    cache_result("profile_display", display is not None)
+    if display is None:
+        profile = (
+            Profile.objects.filter(user_id=user.pk)
+            .only("user_id", "nickname", "avatar", "avatar_url", "avatar_thumbnails")
+            .first()
+        )
+        display = build_display(user, profile)
+        cache.set(key, display, getattr(settings, "PROFILE_DISPLAY_CACHE_TIMEOUT", 600))
+    return display
+
+
+def forget_display(user_id):
+    cache.delete(_display_key(user_id))
@@ -0,0 +1,67 @@
+# archive/ratelimit.py
+"""
+Ограничение частоты запросов — token bucket в кэше Django.
+
+    bucket = TokenBucket("login-code:email", capacity=3, per=600)
+    allowed, retry_after = bucket.take(email)
+
+В ведре capacity жетонов, полностью оно наполняется за per секунд
+(равномерно, по жетону в per / capacity секунд). Запрос забирает жетон;
+пустое ведро — отказ и retry_after, через сколько секунд появится
+следующий жетон. Состояние ведра — пара (жетоны, время) под одним ключом
+кэша, поэтому лимит общий для всех воркеров, если кэш общий
+(DJANGO_CACHE_BACKEND=redis / file). Чтение и запись не атомарны: при
+гонке параллельные запросы могут пройти с одним жетоном — для защиты от
+перебора это допустимо, лишние единицы запросов погоды не делают.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+class TokenBucket:
+    def __init__(self, scope, capacity, per):
+        self.scope = scope
+        self.capacity = capacity
+        self.per = per
+        self.rate = capacity / per  # жетонов в секунду
+
+    def _key(self, ident):
+        # email / IP в ключ кэша не кладём как есть: длина и спецсимволы
+        digest = hashlib.sha256(str(ident).lower().encode("utf-8")).hexdigest()[:32]
+        return f"ratelimit:{self.scope}:{digest}"
+
+    def _state(self, key, now):
+        tokens, updated = cache.get(key, (self.capacity, now))
+        return min(self.capacity, tokens + (now - updated) * self.rate)
+
+    def take(self, ident, cost=1):
+        """(разрешено, секунд до следующей попытки)."""
+        key = self._key(ident)
+        now = time.time()
+        tokens = self._state(key, now)
+        if tokens < cost:
+            return False, max(int((cost - tokens) / self.rate) + 1, 1)
+        # ведро наполнится за per секунд — дольше хранить незачем
+        cache.set(key, (tokens - cost, now), timeout=int(self.per) + 1)
+        return True, 0
+
+    def reset(self, ident):
+        cache.delete(self._key(ident))
+
+
+def client_ip(request):
+    """
+    IP клиента. За обратным прокси (Render, nginx) REMOTE_ADDR — адрес
+    прокси; тогда TRUSTED_PROXY_COUNT > 0 и адрес берётся из
+    X-Forwarded-For: N-й справа — тот, что дописал ближайший доверенный
+    прокси (левые значения клиент может подставить сам).
+    """
+    proxies = getattr(settings, "TRUSTED_PROXY_COUNT", 0)
+    if proxies:
+        forwarded = [ip.strip() for ip in request.META.get("HTTP_X_FORWARDED_FOR", "").split(",") if ip.strip()]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.META.get("REMOTE_ADDR", "")
@@ -0,0 +1,353 @@
+# archive/related.py
+"""
+Предрасчитанные «похожие материалы» для страницы ресурса.
+
+Похожесть двух опубликованных ресурсов:
+- +SHARED_TAG_WEIGHT за каждый общий тег;
+- +SAME_CATEGORY_WEIGHT за общую категорию;
+- +SAME_TYPE_WEIGHT за одинаковый тип;
+- +DIFFICULTY_WEIGHT за одинаковую сложность (половина — за соседнюю).
+
+Кандидаты — только ресурсы с общим тегом или категорией. Для каждого
+ресурса в RelatedResource лежит топ RELATED_STORED соседей, так что
+блок на странице — один запрос по индексу (resource, -score).
+
+Таблица обновляется инкрементально сигналами (archive/signals.py) при
+изменении ресурса или его тегов; полная перестройка —
+manage.py rebuild_related_resources.
+"""
+import heapq
+import threading
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Min, Q, Window
+from django.db.models.functions import RowNumber
+
+SHARED_TAG_WEIGHT = 3.0
+SAME_CATEGORY_WEIGHT = 2.0
+SAME_TYPE_WEIGHT = 1.0
+DIFFICULTY_WEIGHT = 1.0
+
+DIFFICULTY_ORDER = ("beginner", "intermediate", "advanced")
+
+# Сколько соседей хранить на ресурс (на странице показывается меньше)
+RELATED_STORED = 12
+
+BULK_BATCH_SIZE = 1000
+
+
+def _models():
+    from .models import RelatedResource, Resource
+
+    return Resource, RelatedResource
+
+
+def difficulty_affinity(a, b):
+    if a == b:
+        return 1.0
+    try:
+        distance = abs(DIFFICULTY_ORDER.index(a) - DIFFICULTY_ORDER.index(b))
+    except ValueError:
+        return 0.0
+    return 0.5 if distance == 1 else 0.0
+
+
+def score(shared_tags, same_category, same_type, difficulty_a, difficulty_b):
+    return (
+        SHARED_TAG_WEIGHT * shared_tags
+        + (SAME_CATEGORY_WEIGHT if same_category else 0.0)
+        + (SAME_TYPE_WEIGHT if same_type else 0.0)
+        + DIFFICULTY_WEIGHT * difficulty_affinity(difficulty_a, difficulty_b)
+    )
+
+
+def _bucket_category(members):
+    """members: [(id, type, difficulty)] → {(type, difficulty): [id, ...]}."""
+    buckets = defaultdict(list)
+    for pk, type_, difficulty in members:
+        buckets[(type_, difficulty)].append(pk)
+    return buckets
+
+
+def rank_candidates(target, shared_counts, attrs, category_buckets, limit=RELATED_STORED):
+    """
+    Топ-limit соседей ресурса: [(related_id, score, shared_tags)] по убыванию score.
+
+    target          — (id, category_id, type, difficulty);
+    shared_counts   — {id: число общих тегов} для ресурсов с общими тегами;
+    attrs           — {id: (category_id, type, difficulty)} для них же;
+    category_buckets — участники категории target, сгруппированные по
+                       (type, difficulty): внутри группы score одинаковый,
+                       поэтому огромную категорию не приходится обходить целиком.
+    """
+    pk, category_id, type_, difficulty = target
+    scored = []
+    for other_id, shared in shared_counts.items():
+        other_category, other_type, other_difficulty = attrs[other_id]
+        same_category = category_id is not None and other_category == category_id
+        scored.append(
+            (
+                score(shared, same_category, other_type == type_, difficulty, other_difficulty),
+                other_id,
+                shared,
+            )
+        )
+
+    if category_id is not None and category_buckets:
+        # Только категория: группы с лучшим score первыми, пока не наберём limit
+        groups = sorted(
+            (
+                (score(0, True, bucket_type == type_, difficulty, bucket_difficulty), ids)
+                for (bucket_type, bucket_difficulty), ids in category_buckets.items()
+            ),
+            key=lambda group: group[0],
+            reverse=True,
+        )
+        taken = 0
+        for group_score, ids in groups:
+            for other_id in sorted(ids, reverse=True):
+                if other_id == pk or other_id in shared_counts:
+                    continue
+                scored.append((group_score, other_id, 0))
+                taken += 1
+                if taken >= limit:
+                    break
+            if taken >= limit:
+                break
+
+    # при равном score выше более новые ресурсы
+    best = heapq.nlargest(limit, scored)
+    return [(other_id, value, shared) for value, other_id, shared in best]
+
+
+# =========================
+# Полная перестройка
+# =========================
+def rebuild_all(resource_model=None, related_model=None, limit=RELATED_STORED):
+    """
+    Перестраивает таблицу целиком в памяти (модели можно передать
+    историческими — так функцию использует миграция). Возвращает число строк.
+    """
+    if resource_model is None:
+        resource_model, related_model = _models()
+    through = resource_model.tags.through
+
+    attrs = {}
+    by_category = defaultdict(list)
+    for pk, category_id, type_, difficulty in resource_model.objects.filter(
+        is_published=True
+    ).values_list("id", "category_id", "type", "difficulty"):
+        attrs[pk] = (category_id, type_, difficulty)
+        if category_id is not None:
+            by_category[category_id].append((pk, type_, difficulty))
+    buckets = {cat: _bucket_category(members) for cat, members in by_category.items()}
+
+    tags_of = defaultdict(list)
+    resources_of = defaultdict(list)
+    for resource_id, tag_id in through.objects.values_list("resource_id", "tag_id"):
+        if resource_id in attrs:
+            tags_of[resource_id].append(tag_id)
+            resources_of[tag_id].append(resource_id)
+
+    related_model.objects.all().delete()
+
+    batch = []
+    total = 0
+    for pk, (category_id, type_, difficulty) in attrs.items():
+        shared = Counter()
+        for tag_id in tags_of.get(pk, ()):
+            shared.update(resources_of[tag_id])
+        shared.pop(pk, None)
+
+        ranked = rank_candidates(
+            (pk, category_id, type_, difficulty),
+            shared,
+            attrs,
+            buckets.get(category_id),
+            limit,
+        )
+        for related_id, value, shared_tags in ranked:
+            batch.append(
+                related_model(
+                    resource_id=pk, related_id=related_id, score=value, shared_tags=shared_tags
+                )
+            )
+        if len(batch) >= BULK_BATCH_SIZE:
+            related_model.objects.bulk_create(batch)
+            total += len(batch)
+            batch = []
+
+    if batch:
+        related_model.objects.bulk_create(batch)
+        total += len(batch)
+    return total
+
+
+# =========================
+# Инкрементальное обновление
+# =========================
+def _candidates(resource, limit=RELATED_STORED):
+    """
+    Кандидаты ресурса: {id: (score, shared_tags)} — все ресурсы с общими
+    тегами и лучшие limit участников категории. Категорию целиком не
+    читаем: её участники сгруппированы по (type, difficulty), и из групп
+    в порядке score берётся не больше limit новейших id — те же группы,
+    что у rank_candidates.
+    """
+    Resource, _ = _models()
+    through = Resource.tags.through
+
+    tag_ids = through.objects.filter(resource_id=resource.pk).values("tag_id")
+    shared_counts = dict(
+        through.objects.filter(tag_id__in=tag_ids, resource__is_published=True)
+        .exclude(resource_id=resource.pk)
+        .values("resource_id")
+        .annotate(n=Count("tag_id"))
+        .values_list("resource_id", "n")
+    )
+    attrs = {
+        pk: (category_id, type_, difficulty)
+        for pk, category_id, type_, difficulty in Resource.objects.filter(
+            id__in=list(shared_counts)
+        ).values_list("id", "category_id", "type", "difficulty")
+    }
+
+    buckets = {}
+    if resource.category_id is not None:
+        members = Resource.objects.filter(
+            category_id=resource.category_id, is_published=True
+        ).exclude(pk=resource.pk)
+        groups = sorted(
+            members.values_list("type", "difficulty").distinct().order_by(),
+            key=lambda group: score(0, True, group[0] == resource.type, resource.difficulty, group[1]),
+            reverse=True,
+        )
+        taken = 0
+        for type_, difficulty in groups:
+            ids = list(
+                members.filter(type=type_, difficulty=difficulty)
+                .order_by("-id")
+                .values_list("id", flat=True)[:limit]
+            )
+            buckets[(type_, difficulty)] = ids
+            taken += len(ids)
+            if taken >= limit:
+                break
+
+    target = (resource.pk, resource.category_id, resource.type, resource.difficulty)
+    ranked = rank_candidates(
+        target, shared_counts, attrs, buckets, limit=len(shared_counts) + limit
+    )
+    return {pk: (value, shared) for pk, value, shared in ranked}
+
+
+def refresh_resource(resource_id, limit=RELATED_STORED):
+    """
+    Пересчитывает соседей одного ресурса и его место в чужих топах.
+
+    Если ресурс стал менее похож на кого-то, у того в топе освобождается
+    место, которое заполнит только полная перестройка — поэтому
+    rebuild_related_resources стоит гонять периодически (например, раз в сутки).
+    Она же допишет ресурс в топы участников категории за пределами
+    лучших limit (см. _candidates).
+    """
+    Resource, RelatedResource = _models()
+
+    with transaction.atomic():
+        RelatedResource.objects.filter(Q(resource_id=resource_id) | Q(related_id=resource_id)).delete()
+
+        resource = (
+            Resource.objects.filter(pk=resource_id, is_published=True)
+            .only("id", "category_id", "type", "difficulty")
+            .first()
+        )
+        if resource is None:
+            return
+
+        candidates = _candidates(resource, limit)
+        if not candidates:
+            return
+
+        best = heapq.nlargest(limit, candidates.items(), key=lambda item: (item[1][0], item[0]))
+        rows = [
+            RelatedResource(resource_id=resource_id, related_id=pk, score=value, shared_tags=shared)
+            for pk, (value, shared) in best
+        ]
+
+        # Похожесть симметрична: ресурс может войти в топы кандидатов
+        stats = {
+            row["resource_id"]: row
+            for row in RelatedResource.objects.filter(resource_id__in=list(candidates))
+            .values("resource_id")
+            .annotate(n=Count("id"), low=Min("score"))
+        }
+        to_trim = []
+        for pk, (value, shared) in candidates.items():
+            current = stats.get(pk)
+            if current is not None and current["n"] >= limit:
+                if value <= current["low"]:
+                    continue
+                to_trim.append(pk)
+            rows.append(
+                RelatedResource(resource_id=pk, related_id=resource_id, score=value, shared_tags=shared)
+            )
+
+        RelatedResource.objects.bulk_create(rows, batch_size=BULK_BATCH_SIZE)
+
+        if to_trim:
+            overflow = (
+                RelatedResource.objects.filter(resource_id__in=to_trim)
+                .annotate(
+                    position=Window(
+                        RowNumber(),
+                        partition_by=[F("resource_id")],
+                        order_by=[F("score").desc(), F("related_id").desc()],
+                    )
+                )
+                .filter(position__gt=limit)
+                .values_list("id", flat=True)
+            )
+            RelatedResource.objects.filter(id__in=list(overflow)).delete()
+
+
+_pending = threading.local()
+
+
+def schedule_refresh(resource_ids):
+    """
+    Откладывает пересчёт до коммита транзакции и схлопывает повторы:
+    сохранение ресурса формой даёт post_save и m2m_changed подряд.
+
+    Каждый вызов регистрирует свой on_commit, а id копятся в общем для
+    потока множестве: первый выполнившийся callback пересчитывает всё
+    накопленное и очищает множество, остальные ничего не делают. При откате
+    Django выбрасывает callback'и транзакции, а её id дождутся следующего
+    коммита — лишний пересчёт безвреден, он читает текущее состояние БД.
+    """
+    ids = getattr(_pending, "ids", None)
+    if ids is None:
+        ids = _pending.ids = set()
+    ids.update(resource_ids)
+    # вне транзакции on_commit вызывает flush сразу
+    transaction.on_commit(_flush_pending)
+
+
+def _flush_pending():
+    ids = getattr(_pending, "ids", None)
+    if not ids:
+        return
+    _pending.ids = set()
+    for pk in sorted(ids):
+        refresh_resource(pk)
+
+
+def related_for(resource, limit=4):
+    """Готовый ранжированный список похожих ресурсов для шаблона."""
+    _, RelatedResource = _models()
+    links = (
+        RelatedResource.objects.filter(resource=resource, related__is_published=True)
+        .select_related("related__category")
+        .order_by("-score", "-related_id")[:limit]
+    )
+    return [link.related for link in links]
@@ -1,9 +1,102 @@
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from .models import Profile
+from .profiles import forget_display, get_profile
 
 @receiver(post_save, sender=User)
-def create_profile(sender, instance, created, **kwargs):
-    if created:
-        Profile.objects.create(user=instance)
\ No newline at end of file
+def create_profile(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        get_profile(instance, created=True)
+
+
+# =========================
+# Шапка текущего пользователя (archive/profiles.display_for)
+# =========================
+from django.db.models.signals import post_delete
+
+from .models import Profile
+
+
+@receiver(post_save, sender=User, dispatch_uid="profile-display-user")
+def forget_display_on_user_save(sender, instance, created, update_fields=None, **kwargs):
+    # вход обновляет только last_login — имя и аватар те же
+    if created or (update_fields and set(update_fields) <= {"last_login"}):
+        return
+    forget_display(instance.pk)
+
+
+@receiver(post_save, sender=Profile, dispatch_uid="profile-display-save")
+@receiver(post_delete, sender=Profile, dispatch_uid="profile-display-delete")
+def forget_display_on_profile_change(sender, instance, **kwargs):
+    forget_display(instance.user_id)
+
+# =========================
+# Инвалидация кэша блоков (archive/caching.py)
+# =========================
+from django.db.models.signals import m2m_changed, post_delete
+
+from .caching import bump
+from .models import Bundle, Category, DonationLink, Resource, Tag
+
+CACHED_MODELS = (Resource, Category, Tag, Bundle, DonationLink)
+
+
+def bump_model_version(sender, **kwargs):
+    bump(sender)
+
+
+for _model in CACHED_MODELS:
+    post_save.connect(bump_model_version, sender=_model, dispatch_uid=f"cache-save-{_model.__name__}")
+    post_delete.connect(bump_model_version, sender=_model, dispatch_uid=f"cache-delete-{_model.__name__}")
+
+
+@receiver(m2m_changed, sender=Resource.tags.through)
+def bump_resource_tags(sender, action, **kwargs):
+    if action.startswith("post_"):
+        bump(Resource)
+
+
+@receiver(m2m_changed, sender=Bundle.resources.through)
+def bump_bundle_resources(sender, action, **kwargs):
+    if action.startswith("post_"):
+        bump(Bundle)
+
+
+# =========================
+# Похожие ресурсы (archive/related.py)
+# =========================
+from .related import schedule_refresh
+
+
+@receiver(post_save, sender=Resource)
+def refresh_related_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    schedule_refresh([instance.pk])
+
+
+@receiver(m2m_changed, sender=Resource.tags.through)
+def refresh_related_on_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            schedule_refresh([instance.pk])
+        return
+
+    # tag.resources.add(...) / .clear(): instance — тег
+    if action == "pre_clear":
+        instance._related_cleared_ids = list(
+            instance.resources.values_list("pk", flat=True)
+        )
+    elif action in ("post_add", "post_remove"):
+        schedule_refresh(pk_set)
+    elif action == "post_clear":
+        schedule_refresh(getattr(instance, "_related_cleared_ids", []))
+
+
+# =========================
+# Кэш тегов (hub/tags.py)
+# =========================
+from hub.tags import forget_tag
+
+post_save.connect(forget_tag, sender=Tag, dispatch_uid="tag-cache-save-archive")
+post_delete.connect(forget_tag, sender=Tag, dispatch_uid="tag-cache-delete-archive")
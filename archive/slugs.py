@@ -0,0 +1,75 @@
+# archive/slugs.py
+"""
+Уникальные slug-и для ресурсов и проектов (схема base, base-1, base-2, ...).
+
+Раньше свободный slug искали циклом filter(slug=...).exists() — запрос на
+каждое совпадение, а у популярных названий («telegram bot») их десятки.
+Теперь все занятые base / base-N достаются одним запросом по префиксу
+(индекс по slug), свободный суффикс выбирается в памяти. Между выбором
+и INSERT-ом slug может занять параллельный запрос — тогда save_with_slug
+ловит IntegrityError и повторяет выбор.
+"""
+import re
+
+from django.db import IntegrityError, transaction
+from django.utils.text import slugify
+
+# запас под суффикс «-NNNNNN»
+SUFFIX_RESERVE = 8
+
+SAVE_ATTEMPTS = 5
+
+
+def slug_base(text, max_length, fallback):
+    return slugify(text)[: max_length - SUFFIX_RESERVE].strip("-") or fallback
+
+
+def first_free(base, taken):
+    """Первый свободный из base, base-1, base-2, ... (taken — множество)."""
+    if base not in taken:
+        return base
+    counter = 1
+    while f"{base}-{counter}" in taken:
+        counter += 1
+    return f"{base}-{counter}"
+
+
+def taken_slugs(queryset, base, field="slug"):
+    """Занятые base и base-N одним запросом (startswith идёт по индексу)."""
+    suffix_re = re.compile(rf"{re.escape(base)}-\d+")
+    return {
+        slug
+        for slug in queryset.filter(**{f"{field}__startswith": base}).values_list(field, flat=True)
+        if slug == base or suffix_re.fullmatch(slug)
+    }
+
+
+def unique_slug(model, text, fallback, field="slug", exclude_pk=None):
+    max_length = model._meta.get_field(field).max_length
+    base = slug_base(text, max_length, fallback)
+    queryset = model._default_manager.all()
+    if exclude_pk is not None:
+        queryset = queryset.exclude(pk=exclude_pk)
+    return first_free(base, taken_slugs(queryset, base, field))
+
+
+def save_with_slug(instance, text, fallback, field="slug", attempts=SAVE_ATTEMPTS):
+    """
+    Выдаёт instance уникальный slug и сохраняет его. Если параллельный
+    запрос успел занять тот же slug, выбирает заново (до attempts раз).
+    Прочие IntegrityError пробрасываются как есть.
+    """
+    model = type(instance)
+    for attempt in range(attempts):
+        slug = unique_slug(model, text, fallback, field, exclude_pk=instance.pk)
+        setattr(instance, field, slug)
+        try:
+            with transaction.atomic():
+                instance.save()
+            return slug
+        except IntegrityError:
+            conflict = (
+                model._default_manager.filter(**{field: slug}).exclude(pk=instance.pk).exists()
+            )
+            if not conflict or attempt == attempts - 1:
+                raise
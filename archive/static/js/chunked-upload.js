@@ -0,0 +1,114 @@
+/*
+ * Чанковая загрузка файла через api/uploads/ (archive/uploads.py).
+ *
+ * ChunkedUpload.bind(fileInput, {target, hiddenInput, form, onProgress}):
+ * выбранный файл уходит кусками, id завершённой загрузки кладётся в
+ * hiddenInput (поле upload_id формы), а сам input очищается — форма
+ * отправляется без файла. Id незавершённой загрузки запоминается в
+ * localStorage: после обрыва тот же файл докачивается с места остановки.
+ */
+(function () {
+  const HASH_LIMIT = 256 * 1024 * 1024;  // больше — sha256 считает только сервер
+  const RETRIES = 5;
+
+  function csrfToken(form) {
+    const field = form && form.querySelector('input[name="csrfmiddlewaretoken"]');
+    if (field) return field.value;
+    const match = document.cookie.match(/(?:^|;\s*)csrftoken=([^;]+)/);
+    return match ? decodeURIComponent(match[1]) : '';
+  }
+
+  async function sha256(file) {
+    if (!window.crypto || !crypto.subtle || file.size > HASH_LIMIT) return '';
+    const digest = await crypto.subtle.digest('SHA-256', await file.arrayBuffer());
+    return Array.from(new Uint8Array(digest)).map((b) => b.toString(16).padStart(2, '0')).join('');
+  }
+
+  async function request(url, options, token) {
+    const headers = Object.assign({'X-CSRFToken': token}, options.headers || {});
+    const response = await fetch(url, Object.assign({}, options, {headers, credentials: 'same-origin'}));
+    const data = await response.json().catch(() => ({}));
+    return {status: response.status, ok: response.ok, data};
+  }
+
+  function storageKey(target, file) {
+    return `chunked-upload:${target}:${file.name}:${file.size}:${file.lastModified}`;
+  }
+
+  async function upload(file, options) {
+    const token = csrfToken(options.form);
+    const key = storageKey(options.target, file);
+    const hash = await sha256(file);
+
+    let session = null;
+    const saved = localStorage.getItem(key);
+    if (saved) {
+      const found = await request(`/api/uploads/${saved}/`, {method: 'GET'}, token);
+      if (found.ok) session = found.data;
+    }
+    if (!session) {
+      const created = await request('/api/uploads/', {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify({target: options.target, filename: file.name, size: file.size}),
+      }, token);
+      if (!created.ok) throw new Error(created.data.error || 'Не удалось начать загрузку');
+      session = created.data;
+      localStorage.setItem(key, session.id);
+    }
+
+    let received = session.received;
+    let failures = 0;
+    while (!session.complete && received < file.size) {
+      const end = Math.min(received + session.chunk_size, file.size);
+      const result = await request(`/api/uploads/${session.id}/`, {
+        method: 'PUT',
+        headers: {'Content-Range': `bytes ${received}-${end - 1}/${file.size}`},
+        body: file.slice(received, end),
+      }, token).catch(() => ({ok: false, status: 0, data: {}}));
+
+      if (result.ok) {
+        received = result.data.received;
+        failures = 0;
+      } else if (result.data.received !== undefined) {
+        // сервер принял другое число байт — продолжаем с него
+        received = result.data.received;
+      } else if (++failures > RETRIES) {
+        throw new Error(result.data.error || 'Обрыв связи при загрузке');
+      } else {
+        await new Promise((resolve) => setTimeout(resolve, 1000 * 2 ** failures));
+      }
+      if (options.onProgress) options.onProgress(received, file.size);
+    }
+
+    const finished = await request(`/api/uploads/${session.id}/finish/`, {
+      method: 'POST',
+      headers: {'Content-Type': 'application/json'},
+      body: JSON.stringify({sha256: hash}),
+    }, token);
+    localStorage.removeItem(key);
+    if (!finished.ok) throw new Error(finished.data.error || 'Файл повреждён при передаче');
+    return finished.data.id;
+  }
+
+  function bind(input, options) {
+    const submit = options.form && options.form.querySelector('[type="submit"]');
+    input.addEventListener('change', async () => {
+      const file = input.files && input.files[0];
+      if (!file) return;
+      options.hiddenInput.value = '';
+      if (submit) submit.disabled = true;
+      try {
+        options.hiddenInput.value = await upload(file, options);
+        input.value = '';
+        if (options.onDone) options.onDone(file);
+      } catch (error) {
+        if (options.onError) options.onError(error);
+      } finally {
+        if (submit) submit.disabled = false;
+      }
+    });
+  }
+
+  window.ChunkedUpload = {bind, upload};
+})();
@@ -0,0 +1,271 @@
+# archive/tasks.py
+"""
+Очередь фоновых задач в БД — без внешнего брокера.
+
+    @task(max_attempts=5, retry_delay=60)
+    def send_something(user_id):
+        ...
+
+    send_something.delay(user.pk)                  # в очередь
+    send_something.enqueue(args=[user.pk], countdown=300)  # через 5 минут
+    send_something(user.pk)                        # обычный вызов, сразу
+
+Задача — строка Task с dotted path функции и JSON-аргументами. Постановка
+в очередь внутри транзакции запроса становится видна воркеру только после
+коммита, так что задача не увидит недосохранённых данных.
+
+manage.py run_worker забирает готовые задачи пачками: SELECT ... FOR UPDATE
+SKIP LOCKED (где поддерживается) и условный UPDATE status=pending →
+running, поэтому несколько воркеров не возьмут одну задачу дважды.
+Упавшая задача повторяется с экспоненциальной задержкой; после
+max_attempts она остаётся в статусе dead (dead letter) с текстом ошибки —
+её можно перезапустить из админки. Задачи воркера, умершего посреди
+выполнения, возвращаются в очередь через TASKS_LOCK_TIMEOUT.
+
+TASKS_EAGER = True выполняет .delay() сразу (разработка без воркера).
+
+Воркер — отдельный процесс (Procfile: worker; на Railway — второй сервис
+с railway.worker.json). Он раз в HEARTBEAT_INTERVAL отмечается в
+WorkerHeartbeat по каждой своей очереди. Если за TASKS_WORKER_TIMEOUT
+очередь никто не слушал, .delay() пишет ошибку в лог и, при
+TASKS_WORKER_FALLBACK, выполняет задачу сам после коммита — письма и
+миниатюры не копятся молча в таблице, пока воркер не поднят. Отложенные
+задачи (countdown / run_at) ждут воркера.
+"""
+import functools
+import logging
+import random
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import send_mail as django_send_mail
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Task, WorkerHeartbeat
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE = "default"
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_RETRY_DELAY = 30  # секунд до первого повтора, дальше ×2
+HEARTBEAT_INTERVAL = 15  # секунд между отметками воркера
+
+
+class TaskFunction:
+    """Обёртка функции: обычный вызов + постановка в очередь."""
+
+    def __init__(self, func, *, name, queue, max_attempts, retry_delay, priority):
+        functools.update_wrapper(self, func)
+        self.func = func
+        self.name = name
+        self.queue = queue
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.priority = priority
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, **kwargs):
+        return self.enqueue(args=args, kwargs=kwargs)
+
+    def enqueue(self, args=(), kwargs=None, *, run_at=None, countdown=None, priority=None, queue=None):
+        if getattr(settings, "TASKS_EAGER", False):
+            self.func(*args, **(kwargs or {}))
+            return None
+        if run_at is None:
+            run_at = timezone.now()
+            if countdown:
+                run_at += timedelta(seconds=countdown)
+        task_row = Task.objects.create(
+            name=self.name,
+            args=list(args),
+            kwargs=kwargs or {},
+            queue=queue or self.queue,
+            priority=self.priority if priority is None else priority,
+            max_attempts=self.max_attempts,
+            run_at=run_at,
+        )
+        if not worker_alive(task_row.queue):
+            logger.error(
+                "Очередь %s никто не слушает дольше TASKS_WORKER_TIMEOUT — запущен ли manage.py run_worker?",
+                task_row.queue,
+            )
+            if getattr(settings, "TASKS_WORKER_FALLBACK", True) and run_at <= timezone.now():
+                pk = task_row.pk
+                transaction.on_commit(lambda: run_inline(pk))
+        return task_row
+
+
+def task(func=None, *, queue=DEFAULT_QUEUE, max_attempts=DEFAULT_MAX_ATTEMPTS,
+         retry_delay=DEFAULT_RETRY_DELAY, priority=0):
+    """Декоратор: @task или @task(queue=..., max_attempts=..., retry_delay=..., priority=...)."""
+
+    def wrap(f):
+        return TaskFunction(
+            f,
+            name=f"{f.__module__}.{f.__qualname__}",
+            queue=queue,
+            max_attempts=max_attempts,
+            retry_delay=retry_delay,
+            priority=priority,
+        )
+
+    return wrap(func) if func is not None else wrap
+
+
+# =========================
+# Воркер
+# =========================
+def claim(worker_id, queues, limit):
+    """Забирает до limit готовых задач из queues. Возвращает список Task."""
+    now = timezone.now()
+    with transaction.atomic():
+        candidates = Task.objects.filter(status=Task.PENDING, queue__in=queues, run_at__lte=now)
+        if connection.features.has_select_for_update_skip_locked:
+            candidates = candidates.select_for_update(skip_locked=True)
+        ids = list(
+            candidates.order_by("-priority", "run_at", "id").values_list("id", flat=True)[:limit]
+        )
+        if not ids:
+            return []
+        # условный UPDATE — защита там, где SKIP LOCKED нет (SQLite)
+        Task.objects.filter(id__in=ids, status=Task.PENDING).update(
+            status=Task.RUNNING,
+            locked_by=worker_id,
+            locked_at=now,
+            attempts=F("attempts") + 1,
+        )
+    return list(
+        Task.objects.filter(
+            id__in=ids, status=Task.RUNNING, locked_by=worker_id, locked_at=now
+        ).order_by("-priority", "run_at", "id")
+    )
+
+
+def heartbeat(worker_id, queues):
+    now = timezone.now()
+    for queue in queues:
+        WorkerHeartbeat.objects.update_or_create(
+            worker_id=worker_id, queue=queue, defaults={"seen_at": now}
+        )
+
+
+def forget_worker(worker_id):
+    WorkerHeartbeat.objects.filter(worker_id=worker_id).delete()
+
+
+# очередь → время проверки (monotonic); кэшируем только «жив», чтобы
+# поднятый воркер сразу начинал получать задачи
+_alive_checked = {}
+
+
+def worker_alive(queue):
+    """Отмечался ли за TASKS_WORKER_TIMEOUT воркер, слушающий queue."""
+    checked = _alive_checked.get(queue)
+    if checked is not None and time.monotonic() - checked < HEARTBEAT_INTERVAL:
+        return True
+    timeout = getattr(settings, "TASKS_WORKER_TIMEOUT", 60)
+    deadline = timezone.now() - timedelta(seconds=timeout)
+    alive = WorkerHeartbeat.objects.filter(queue=queue, seen_at__gte=deadline).exists()
+    if alive:
+        _alive_checked[queue] = time.monotonic()
+    else:
+        _alive_checked.pop(queue, None)
+    return alive
+
+
+def run_inline(pk):
+    """Выполняет задачу в текущем процессе, если её ещё не взял воркер."""
+    taken = Task.objects.filter(pk=pk, status=Task.PENDING).update(
+        status=Task.RUNNING, locked_by="inline", locked_at=timezone.now(), attempts=F("attempts") + 1
+    )
+    if taken:
+        execute(Task.objects.get(pk=pk))
+
+
+def retry_delay_for(task_function, attempts):
+    base = task_function.retry_delay if task_function else DEFAULT_RETRY_DELAY
+    delay = base * 2 ** max(attempts - 1, 0)
+    # разброс, чтобы пачка упавших задач не вернулась одновременно
+    return delay * random.uniform(0.8, 1.2)
+
+
+def execute(task_row):
+    """Выполняет одну взятую задачу и записывает результат. True — успех."""
+    task_function = None
+    try:
+        task_function = import_string(task_row.name)
+        if not isinstance(task_function, TaskFunction):
+            raise TypeError(f"{task_row.name} не объявлена через @task")
+        task_function.func(*task_row.args, **task_row.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        now = timezone.now()
+        # неизвестная функция не появится от повторов
+        if task_function is None or task_row.attempts >= task_row.max_attempts:
+            updates = {"status": Task.DEAD, "finished_at": now}
+        else:
+            updates = {
+                "status": Task.PENDING,
+                "run_at": now + timedelta(seconds=retry_delay_for(task_function, task_row.attempts)),
+            }
+        Task.objects.filter(pk=task_row.pk).update(
+            last_error=error[-10000:], locked_by="", locked_at=None, **updates
+        )
+        return False
+
+    Task.objects.filter(pk=task_row.pk).update(
+        status=Task.DONE, finished_at=timezone.now(), locked_by="", locked_at=None
+    )
+    return True
+
+
+def requeue_stale(lock_timeout):
+    """Возвращает в очередь задачи, чей воркер пропал посреди выполнения."""
+    deadline = timezone.now() - timedelta(seconds=lock_timeout)
+    stale = Task.objects.filter(status=Task.RUNNING, locked_at__lt=deadline)
+    requeued = stale.filter(attempts__lt=F("max_attempts")).update(
+        status=Task.PENDING, locked_by="", locked_at=None, run_at=timezone.now()
+    )
+    dead = stale.update(
+        status=Task.DEAD,
+        locked_by="",
+        locked_at=None,
+        finished_at=timezone.now(),
+        last_error="Воркер не завершил задачу за TASKS_LOCK_TIMEOUT",
+    )
+    return requeued, dead
+
+
+def purge_finished(keep_hours):
+    """Удаляет выполненные задачи старше keep_hours (dead остаются для разбора)."""
+    deadline = timezone.now() - timedelta(hours=keep_hours)
+    deleted, _ = Task.objects.filter(status=Task.DONE, finished_at__lt=deadline).delete()
+    # отметки воркеров, пропавших без forget_worker (kill -9, падение машины)
+    WorkerHeartbeat.objects.filter(seen_at__lt=deadline).delete()
+    return deleted
+
+
+def retry(queryset):
+    """Снова ставит dead-задачи в очередь с чистым счётчиком попыток."""
+    return queryset.filter(status=Task.DEAD).update(
+        status=Task.PENDING, attempts=0, run_at=timezone.now(), finished_at=None
+    )
+
+
+# =========================
+# Общие задачи
+# =========================
+@task(max_attempts=5, retry_delay=60)
+def send_mail(subject, message, recipient_list, from_email=None, html_message=None):
+    """Письмо через EMAIL_BACKEND: SMTP-таймаут не держит запрос."""
+    django_send_mail(
+        subject, message, from_email, recipient_list,
+        html_message=html_message, fail_silently=False,
+    )
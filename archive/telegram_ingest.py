@@ -0,0 +1,238 @@
+# archive/telegram_ingest.py
+"""
+Загрузка ссылок из выгрузки telegram_export.py в архив
+(manage.py ingest_telegram).
+
+JSONL читается «хвостом»: в checkpoint-файле хранится байтовое смещение
+после последней обработанной строки, inode файла и имя последнего
+ротированного файла (см. JsonlTail). Каждый запуск (или
+каждый цикл в режиме --follow) читает только дописанное с прошлого раза.
+Смещение двигается лишь после коммита пачки, поэтому после падения
+пачка будет прочитана заново — дубли отсечёт url_key.
+"""
+import gzip
+import json
+import os
+import re
+from glob import glob
+
+from .importing import ResourceImporter
+
+HASHTAG_RE = re.compile(r"(?<![\w#])#(\w{2,})", re.UNICODE)
+URL_TAIL_RE = re.compile(r"https?://\S+")
+
+TITLE_FALLBACK_LENGTH = 120
+
+
+def hashtags(text):
+    """Хештеги сообщения без «#», в нижнем регистре, без повторов."""
+    return list(dict.fromkeys(tag.casefold() for tag in HASHTAG_RE.findall(text or "")))
+
+
+def message_links(message):
+    """
+    Ссылки сообщения. Берутся заново из текста: старые выгрузки писали
+    в "links" весь хвост сообщения после URL (регулярка [^\\s]+).
+    Поле "links" — запасной вариант для сообщений без текста.
+    """
+    text = message.get("text") or ""
+    found = URL_TAIL_RE.findall(text)
+    if not found:
+        found = [
+            match
+            for link in message.get("links") or []
+            for match in URL_TAIL_RE.findall(link)[:1]
+        ]
+    return list(dict.fromkeys(url.rstrip("),.;]") for url in found))
+
+
+def message_rows(message, channel=""):
+    """
+    Строки для ResourceImporter из одного сообщения: по строке на ссылку.
+    Заголовок — первая непустая строка текста без ссылок и хештегов.
+    """
+    text = message.get("text") or ""
+    links = message_links(message)
+    if not links:
+        return []
+
+    tags = hashtags(text)
+    title = ""
+    for line in text.splitlines():
+        line = HASHTAG_RE.sub("", URL_TAIL_RE.sub("", line)).strip(" \t-—:|")
+        if line:
+            title = line[:TITLE_FALLBACK_LENGTH]
+            break
+
+    source_url = ""
+    if channel and message.get("msg_id"):
+        source_url = f"https://t.me/{channel.lstrip('@')}/{message['msg_id']}"
+
+    return [
+        {
+            "url": url,
+            "title": title or url,
+            "description": URL_TAIL_RE.sub("", text).strip(),
+            "source_url": source_url,
+            "tags": tags,
+        }
+        for url in links
+    ]
+
+
+class TelegramImporter(ResourceImporter):
+    """
+    Ссылки из канала только добавляются: уже известный URL (в том числе
+    у ресурсов, созданных вручную) не перезаписывается сообщением.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("update_existing", False)
+        kwargs.setdefault("category_field", "category")
+        super().__init__(**kwargs)
+
+    def row_tags(self, row):
+        return row.get("tags") or []
+
+
+class JsonlTail:
+    """
+    Чтение дописанных строк JSONL с байтовым checkpoint-ом.
+
+    telegram_export.py ротирует файл переименованием в
+    <имя>.<дата-время>.jsonl и по умолчанию сжимает его в .jsonl.gz —
+    inode при сжатии меняется. Поэтому в checkpoint, кроме inode и
+    смещения, хранится имя последнего ротированного файла, который был
+    уже на диске (rotated). Имена сортируются в порядке записи: файл,
+    который мы дочитывали, — первый ротированный после rotated, за ним
+    идут ротации, случившиеся между запусками.
+    """
+
+    def __init__(self, path, checkpoint_path=None):
+        self.path = path
+        self.checkpoint_path = checkpoint_path or f"{path}.ingest.json"
+        self.offset = 0
+        self.inode = None
+        # "" — ротаций ещё не было; None — checkpoint старого формата
+        self.rotated = ""
+        # хвост ротированного файла не найден — его строки потеряны
+        self.rotated_missed = False
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.checkpoint_path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        self.offset = int(data.get("offset", 0))
+        self.inode = data.get("inode")
+        self.rotated = data.get("rotated")
+
+    def save(self):
+        tmp = f"{self.checkpoint_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(
+                {"path": self.path, "offset": self.offset, "inode": self.inode, "rotated": self.rotated},
+                f,
+            )
+        os.replace(tmp, self.checkpoint_path)
+
+    def _rotated_files(self):
+        """
+        [(имя без .gz, путь)] ротированных файлов в порядке записи. Пока
+        несжатый файл не удалён, читаем его: .gz рядом может быть недописан.
+        """
+        stem, ext = os.path.splitext(self.path)
+        found = {}
+        for candidate in glob(f"{stem}.*{ext}") + glob(f"{stem}.*{ext}.gz"):
+            name = candidate[:-3] if candidate.endswith(".gz") else candidate
+            if name not in found or candidate == name:
+                found[name] = candidate
+        return sorted(found.items())
+
+    def _unread_rotations(self, rotated_files):
+        """Ротированные файлы, которых ещё не было при прошлом checkpoint-е."""
+        if self.inode is None:
+            return []
+        if self.rotated is not None:
+            return [(name, path) for name, path in rotated_files if name > self.rotated]
+        # checkpoint старого формата: ищем несжатый файл по inode
+        for name, path in rotated_files:
+            if path == name and os.stat(path).st_ino == self.inode:
+                return [(name, path)]
+        return []
+
+    @staticmethod
+    def _open(path):
+        if path.endswith(".gz"):
+            return gzip.open(path, "rb")
+        try:
+            return open(path, "rb")
+        except FileNotFoundError:
+            # успели сжать между glob и open
+            return gzip.open(f"{path}.gz", "rb")
+
+    def _iter_file(self, path, offset, batch_size):
+        with self._open(path) as f:
+            f.seek(offset)
+            batch = []
+            while True:
+                line = f.readline()
+                # недописанную строку оставляем до следующего раза
+                if not line or not line.endswith(b"\n"):
+                    break
+                offset += len(line)
+                line = line.strip()
+                if line:
+                    try:
+                        batch.append(json.loads(line))
+                    except ValueError:
+                        pass
+                if len(batch) >= batch_size:
+                    yield batch, offset
+                    batch = []
+            # и пустую пачку: смещение уходит за пустые / битые строки
+            yield batch, offset
+
+    def batches(self, batch_size):
+        """
+        Отдаёт пачки сообщений. После обработки пачки вызывающий код
+        должен вызвать commit(), чтобы сохранить смещение.
+        """
+        # список ротаций — до stat: файл, ротированный после этой точки,
+        # получит имя больше всех, что в списке
+        rotated_files = self._rotated_files()
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return
+
+        rotated = self.rotated
+        unread = self._unread_rotations(rotated_files)
+        # новый ротированный файл — надёжнее inode: тот может достаться
+        # новому файлу, если сжатый оригинал уже удалён
+        if unread or (self.inode is not None and self.inode != stat.st_ino):
+            self.rotated_missed = not unread
+            offset = self.offset
+            for name, path in unread:
+                # inode в позиции — метка файла: при перезапуске посреди
+                # дочитывания он снова не совпадёт с текущим
+                for batch, end in self._iter_file(path, offset, batch_size):
+                    yield batch, (f"rotated:{name}", end, rotated)
+                rotated = name
+                offset = 0
+            self.offset = 0
+        elif stat.st_size < self.offset:
+            # файл пересоздан с тем же inode — читаем сначала
+            self.offset = 0
+
+        if rotated_files:
+            rotated = max(rotated or "", rotated_files[-1][0])
+        self.inode = stat.st_ino
+        for batch, offset in self._iter_file(self.path, self.offset, batch_size):
+            yield batch, (stat.st_ino, offset, rotated)
+
+    def commit(self, position):
+        self.inode, self.offset, self.rotated = position
+        self.save()
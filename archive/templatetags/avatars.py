@@ -0,0 +1,17 @@
+from django import template
+
+from archive.avatars import thumbnail_url
+
+register = template.Library()
+
+
+@register.simple_tag
+def avatar_url(profile, size=40):
+    """
+    {% avatar_url user.profile 34 as src %} — миниатюра аватара под показ
+    в size px (можно "30px"); "" — если аватара нет.
+    """
+    # у пользователя без Profile шаблон подставит пустую строку
+    if not profile:
+        return ""
+    return thumbnail_url(profile, int(str(size).removesuffix("px")))
@@ -0,0 +1,375 @@
+import asyncio
+import gzip
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError, transaction
+from django.db.models import QuerySet
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from hub.testing import FeedQueriesMixin
+
+from . import related, uploads
+from .downloads import DownloadCounter
+from .importing import url_key
+from .linkcheck import LinkChecker, ProbeResult, due_urls, refresh_owner_statuses, store_results
+from .models import Category, LinkStatus, Resource
+from .telegram_ingest import JsonlTail, TelegramImporter, message_rows
+
+
+# =========================
+# Похожие ресурсы (archive/related.py)
+# =========================
+class ScheduleRefreshTests(TestCase):
+    def setUp(self):
+        # в TestCase on_commit не выполняется: id прошлых тестов ещё ждут
+        related._pending.ids = set()
+
+    def test_refresh_runs_after_rolled_back_transaction(self):
+        # откат выбрасывает callback on_commit — накопленные id не должны
+        # остаться «в ожидании» и глотать следующие вызовы
+        with mock.patch.object(related, "refresh_resource") as refresh:
+            with self.captureOnCommitCallbacks(execute=True):
+                with self.assertRaises(RuntimeError):
+                    with transaction.atomic():
+                        related.schedule_refresh([1])
+                        raise RuntimeError
+            refresh.assert_not_called()
+
+            with self.captureOnCommitCallbacks(execute=True):
+                with transaction.atomic():
+                    related.schedule_refresh([2])
+                    related.schedule_refresh([2, 3])
+            # повторы схлопнуты; id отменённой транзакции пересчитан заодно
+            self.assertEqual([call.args[0] for call in refresh.call_args_list], [1, 2, 3])
+
+    def test_category_is_not_read_whole(self):
+        category = Category.objects.create(name="Большая", slug="big")
+        Resource.objects.bulk_create(
+            Resource(title=f"R{i}", slug=f"r{i}", category=category, is_published=True)
+            for i in range(30)
+        )
+        target = Resource.objects.filter(category=category).order_by("pk").first()
+        candidates = related._candidates(target, limit=5)
+        self.assertEqual(len(candidates), 5)
+        newest = Resource.objects.filter(category=category).order_by("-pk")[:5]
+        self.assertEqual(set(candidates), {resource.pk for resource in newest})
+
+
+# =========================
+# Лента проектов: число запросов не зависит от числа постов
+# =========================
+class ProjectFeedQueriesTests(FeedQueriesMixin, TestCase):
+    feed_url = "project_feed"
+    feed_page_size = 20
+
+    # посты с авторами и профилями одним JOIN; счётчики — поля поста
+    def test_short_feed(self):
+        self.assertFeedQueries(3, 1)
+
+    def test_many_pages(self):
+        self.assertFeedQueries(45, 1)
+
+
+# =========================
+# Импорт ресурсов (archive/importing.py)
+# =========================
+class ImporterConflictTests(TestCase):
+    def test_insert_only_import_keeps_resource_created_meanwhile(self):
+        url = "https://example.com/tool"
+        importer = TelegramImporter()
+        # ресурс появился на сайте уже после старта импорта
+        Resource.objects.create(title="С сайта", slug="s-saita", external_url=url, url_key=url_key(url))
+        importer.import_batch([{"url": url, "title": "Из канала", "description": "", "category": ""}])
+        self.assertEqual(Resource.objects.get(url_key=url_key(url)).title, "С сайта")
+
+
+# =========================
+# Чтение выгрузки Telegram (archive/telegram_ingest.py)
+# =========================
+class JsonlTailRotationTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, "messages.jsonl")
+        self.rotations = 0
+
+    def write(self, *ids):
+        with open(self.path, "a", encoding="utf-8") as f:
+            for msg_id in ids:
+                f.write(json.dumps({"msg_id": msg_id}) + "\n")
+
+    def rotate(self, compress=True):
+        # как JsonlWriter._rotate в telegram_export.py
+        self.rotations += 1
+        rotated = self.path.replace(".jsonl", f".20261018-0000{self.rotations:02d}-000000.jsonl")
+        os.replace(self.path, rotated)
+        if compress:
+            with open(rotated, "rb") as src, gzip.open(rotated + ".gz", "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(rotated)
+
+    def read(self):
+        tail = JsonlTail(self.path)
+        ids = []
+        for batch, position in tail.batches(2):
+            ids += [message["msg_id"] for message in batch]
+            tail.commit(position)
+        self.assertFalse(tail.rotated_missed)
+        return ids
+
+    def test_tail_of_compressed_rotation_is_read(self):
+        self.write(1, 2, 3)
+        self.assertEqual(self.read(), [1, 2, 3])
+        self.write(4, 5)
+        self.rotate()
+        self.write(6)
+        self.assertEqual(self.read(), [4, 5, 6])
+
+    def test_several_rotations_between_runs(self):
+        self.write(1)
+        self.assertEqual(self.read(), [1])
+        self.write(2)
+        self.rotate()
+        self.write(3)
+        self.rotate(compress=False)
+        self.write(4)
+        self.assertEqual(self.read(), [2, 3, 4])
+        self.assertEqual(self.read(), [])
+
+
+class MessageRowsTests(SimpleTestCase):
+    def test_url_ends_at_whitespace(self):
+        text = "https://github.com/foo крутая штука\nещё (см. https://example.com/bar)."
+        # "links" в том виде, как их писала старая регулярка экспорта
+        message = {"msg_id": 7, "text": text, "links": [text]}
+        rows = message_rows(message, channel="@devs_storage")
+        self.assertEqual(
+            [row["url"] for row in rows],
+            ["https://github.com/foo", "https://example.com/bar"],
+        )
+        self.assertEqual(rows[0]["title"], "крутая штука")
+
+
+# =========================
+# Чанковая загрузка (archive/uploads.py)
+# =========================
+class ChunkedUploadTests(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        settings_override = override_settings(MEDIA_ROOT=media)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        User = get_user_model()
+        self.alice = User.objects.create_user("alice")
+        self.bob = User.objects.create_user("bob")
+
+    def upload(self, user, data):
+        session = uploads.start_upload(user, "resource", "file.bin", len(data))
+        self.assertFalse(session.is_complete)
+        uploads.write_chunk(user, session.pk, f"bytes 0-{len(data) - 1}/{len(data)}", io.BytesIO(data))
+        return uploads.finish_upload(user, session.pk, hashlib.sha256(data).hexdigest())
+
+    def test_same_bytes_share_blob_only_after_upload(self):
+        data = b"secret" * 1000
+        first = self.upload(self.alice, data)
+        # хеш чужого файла сам по себе ничего не даёт: байты нужно передать
+        second = self.upload(self.bob, data)
+        self.assertEqual(first.blob_id, second.blob_id)
+
+    def test_busy_offset_is_refused(self):
+        session = uploads.start_upload(self.alice, "resource", "file.bin", 4)
+        session.writing_since = session.updated_at
+        session.save(update_fields=["writing_since"])
+        with self.assertRaises(uploads.UploadError) as caught:
+            uploads.write_chunk(self.alice, session.pk, "bytes 0-3/4", io.BytesIO(b"data"))
+        self.assertEqual(caught.exception.status, 409)
+
+
+# =========================
+# Счётчик скачиваний (archive/downloads.py)
+# =========================
+class DownloadCounterTests(TestCase):
+    def test_failed_flush_keeps_counts(self):
+        resource = Resource.objects.create(title="Файл", slug="fail")
+        counter = DownloadCounter()
+        key = ("archive.Resource", "pk", resource.pk)
+        # без record(): фоновый поток здесь не нужен
+        counter._pending[key] = 3
+        with mock.patch.object(QuerySet, "update", side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                counter.flush()
+        self.assertEqual(counter.flush(), 3)
+        resource.refresh_from_db()
+        self.assertEqual(resource.download_count, 3)
+
+
+# =========================
+# Проверка ссылок (archive/linkcheck.py)
+# =========================
+LINKCHECK_ETAG = '"v1"'
+
+# путь → ожидаемый статус LinkCheck (первый и повторный условный проход)
+LINKCHECK_EXPECTED = {
+    "/ok": "ok",
+    "/etag": "ok",
+    "/moved": "ok",
+    "/loop": "broken",
+    "/missing": "broken",
+    "/gone": "broken",
+    "/forbidden": "ok",
+    "/no-head": "ok",
+    "/flaky": "ok",
+    "/down": "error",
+    "/slow": "error",
+}
+
+
+class _LinkCheckHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, code, headers=None):
+        self.send_response(code)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_HEAD(self):
+        self.server.stats["requests"] += 1
+        path = self.path
+        if path == "/ok":
+            self._send(200)
+        elif path == "/etag":
+            if self.headers.get("If-None-Match") == LINKCHECK_ETAG:
+                self.server.stats["not_modified"] += 1
+                self._send(304, {"ETag": LINKCHECK_ETAG})
+            else:
+                self._send(200, {"ETag": LINKCHECK_ETAG})
+        elif path == "/moved":
+            self._send(301, {"Location": "/ok"})
+        elif path == "/loop":
+            self._send(302, {"Location": "/loop"})
+        elif path == "/missing":
+            self._send(404)
+        elif path == "/gone":
+            self._send(410)
+        elif path == "/forbidden":
+            self._send(403)
+        elif path == "/no-head":
+            self._send(405, {"Allow": "GET"})
+        elif path == "/flaky":
+            # первые два запроса — 503, дальше работает
+            self.server.stats["flaky"] += 1
+            self._send(503 if self.server.stats["flaky"] % 3 else 200)
+        elif path == "/down":
+            self._send(503)
+        elif path == "/slow":
+            time.sleep(self.server.slow_seconds)
+            self._send(200)
+        else:
+            self._send(404)
+
+    def do_GET(self):
+        self.server.stats["requests"] += 1
+        if self.path == "/no-head":
+            self._send(206, {"Content-Range": "bytes 0-0/1"})
+        else:
+            self.do_HEAD()
+
+
+class StandInServer:
+    """
+    Локальный HTTP-сервер без сети. Маршруты покрывают все ветки
+    классификации: редиректы, 404/410, 403, 405 на HEAD, временные 503,
+    ETag / 304 и зависание дольше таймаута.
+    """
+
+    def __init__(self, slow_seconds=2.0):
+        self.slow_seconds = slow_seconds
+        self.httpd = None
+        self.thread = None
+        self.connections = 0
+
+    def __enter__(self):
+        owner = self
+
+        class CountingServer(ThreadingHTTPServer):
+            daemon_threads = True
+
+            def get_request(self):
+                owner.connections += 1
+                return super().get_request()
+
+        self.httpd = CountingServer(("127.0.0.1", 0), _LinkCheckHandler)
+        self.httpd.stats = {"requests": 0, "not_modified": 0, "flaky": 0}
+        self.httpd.slow_seconds = self.slow_seconds
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    @property
+    def stats(self):
+        return self.httpd.stats
+
+    def url(self, path):
+        host, port = self.httpd.server_address
+        return f"http://{host}:{port}{path}"
+
+
+class LinkCheckStorageTests(TestCase):
+    def test_long_url_is_stored_and_found(self):
+        url = "https://example.com/" + "a" * 600
+        resource = Resource.objects.create(title="Длинная", slug="long", external_url=url)
+        owners = {url: [(Resource, resource.pk)]}
+        store_results([ProbeResult(url, LinkStatus.BROKEN, status_code=404)])
+
+        self.assertEqual(due_urls([url], timedelta(days=1)), [])
+        refresh_owner_statuses(owners, [url])
+        resource.refresh_from_db()
+        self.assertEqual(resource.link_status, LinkStatus.BROKEN)
+
+
+class LinkCheckerTests(SimpleTestCase):
+    def check(self, items):
+        async def run():
+            checker = LinkChecker(timeout=0.5, retries=2, backoff=0.01)
+            try:
+                return await checker.check_many(items)
+            finally:
+                await checker.close()
+
+        return asyncio.run(run())
+
+    def test_classification_and_conditional_recheck(self):
+        with StandInServer(slow_seconds=2.0) as server:
+            first = self.check([(server.url(path), "", "") for path in LINKCHECK_EXPECTED])
+            # второй проход — с валидаторами первого, как при повторном запуске
+            second = self.check([(r.url, r.etag, r.last_modified) for r in first])
+
+        for label, results in (("первый", first), ("второй", second)):
+            for path, result in zip(LINKCHECK_EXPECTED, results):
+                with self.subTest(pass_=label, path=path):
+                    self.assertEqual(result.status, LINKCHECK_EXPECTED[path])
+
+        etag = second[list(LINKCHECK_EXPECTED).index("/etag")]
+        self.assertTrue(etag.not_modified)
+        self.assertGreater(server.stats["not_modified"], 0)
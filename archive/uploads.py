@@ -0,0 +1,289 @@
+# archive/uploads.py
+"""
+Чанковая (докачиваемая) загрузка файлов для Project.attachment и
+Resource.uploaded_file.
+
+Протокол (archive/urls.py, api/uploads/...):
+1. POST api/uploads/ {target, filename, size} — сессия загрузки;
+2. PUT api/uploads/<id>/ с Content-Range: bytes a-b/size — очередной кусок.
+   Кусок пишется из потока запроса прямо в staging-файл в MEDIA_ROOT,
+   в память целиком не читается. Начало куска обязано совпасть с уже
+   принятым (received), иначе 409 с текущим received — клиент продолжает
+   с него. GET api/uploads/<id>/ — сколько уже принято;
+3. POST api/uploads/<id>/finish/ {sha256} — проверка размера и sha256,
+   перенос файла на место.
+
+Готовый файл хранится под именем от хеша содержимого
+(<upload_to>/ab/cdef.../<имя>), поэтому повторная загрузка того же файла
+место не занимает: finish находит существующий UploadedBlob по хешу
+реально принятых байт. Хешу, который клиент назвал заранее, не верим —
+иначе знание sha256 чужого файла давало бы доступ к самому файлу.
+К модели файл привязывается формой по id сессии (UploadSessionField).
+"""
+import hashlib
+import os
+import re
+from datetime import timedelta
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+
+from .models import UploadedBlob, UploadSession
+
+COPY_BUFFER = 64 * 1024
+
+CONTENT_RANGE_RE = re.compile(r"^bytes (\d+)-(\d+)/(\d+)$")
+
+# target сессии → (модель, FileField), куда файл потом привяжется
+UPLOAD_TARGETS = {
+    UploadSession.PROJECT: ("hub.Project", "attachment"),
+    UploadSession.RESOURCE: ("archive.Resource", "uploaded_file"),
+}
+
+# сколько символов sha256 идёт в каталог файла (остальное имя — исходное)
+NAME_HASH_LENGTH = 16
+
+
+class UploadError(Exception):
+    """Ошибка протокола: текст уходит клиенту, status — HTTP-код ответа."""
+
+    def __init__(self, message, status=400, **extra):
+        super().__init__(message)
+        self.status = status
+        self.extra = extra
+
+
+# =========================
+# Пути
+# =========================
+def staging_dir():
+    return Path(settings.MEDIA_ROOT) / settings.CHUNKED_UPLOAD_STAGING_DIR
+
+
+def staging_path(session):
+    return staging_dir() / f"{session.pk}.part"
+
+
+def target_field(target):
+    label, field_name = UPLOAD_TARGETS[target]
+    return apps.get_model(label)._meta.get_field(field_name)
+
+
+def blob_name(target, sha256, filename):
+    """<upload_to>/ab/cdef.../<имя>, укороченное под max_length поля."""
+    field = target_field(target)
+    directory = f"{field.upload_to}{sha256[:2]}/{sha256[2:NAME_HASH_LENGTH]}/"
+    stem, ext = os.path.splitext(get_valid_filename(filename) or "file")
+    room = max(field.max_length - len(directory) - len(ext), 1)
+    return f"{directory}{stem[:room]}{ext}"
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(COPY_BUFFER), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def parse_content_range(header):
+    """«bytes a-b/size» → (a, длина); UploadError, если заголовок кривой."""
+    match = CONTENT_RANGE_RE.match((header or "").strip())
+    if not match:
+        raise UploadError("Нужен заголовок Content-Range: bytes a-b/size")
+    start, end, total = map(int, match.groups())
+    if end < start:
+        raise UploadError("Некорректный Content-Range")
+    return start, end - start + 1, total
+
+
+# =========================
+# Сессия
+# =========================
+def start_upload(user, target, filename, size):
+    if target not in UPLOAD_TARGETS:
+        raise UploadError("Неизвестный target")
+    filename = os.path.basename(filename or "").strip()
+    if not filename:
+        raise UploadError("Не указано имя файла")
+    if size < 0 or size > settings.CHUNKED_UPLOAD_MAX_SIZE:
+        raise UploadError("Недопустимый размер файла", status=413)
+
+    return UploadSession.objects.create(
+        owner=user, target=target, filename=filename[:255], size=size
+    )
+
+
+def get_session(user, upload_id):
+    session = UploadSession.objects.filter(pk=upload_id, owner=user).select_related("blob").first()
+    if session is None:
+        raise UploadError("Загрузка не найдена", status=404)
+    return session
+
+
+def write_chunk(user, upload_id, content_range, stream):
+    """
+    Дописывает кусок из stream (file-like запроса) в staging-файл.
+    Возвращает сессию с обновлённым received.
+
+    Под блокировкой строки только занимается смещение (writing_since);
+    сам кусок читается от клиента уже вне транзакции, а received
+    сохраняется условным UPDATE — если за это время захват перехватил
+    другой PUT (наш истёк по CHUNKED_UPLOAD_CHUNK_LEASE), кусок не засчитывается.
+    """
+    start, length, total = parse_content_range(content_range)
+    max_chunk = settings.CHUNKED_UPLOAD_MAX_CHUNK
+    if length > max_chunk:
+        raise UploadError(f"Кусок больше {max_chunk} байт", status=413)
+
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().filter(pk=upload_id, owner=user).first()
+        if session is None:
+            raise UploadError("Загрузка не найдена", status=404)
+        if session.is_complete:
+            raise UploadError("Загрузка уже завершена", status=409, received=session.received)
+        if total != session.size or start + length > session.size:
+            raise UploadError("Кусок за пределами файла")
+        if start != session.received:
+            raise UploadError("Неверное смещение куска", status=409, received=session.received)
+        lease = timezone.now() - timedelta(seconds=settings.CHUNKED_UPLOAD_CHUNK_LEASE)
+        if session.writing_since is not None and session.writing_since > lease:
+            # received не отдаём: клиент повторит кусок с паузой, а не сразу
+            raise UploadError("Предыдущий кусок ещё передаётся", status=409)
+        claim = timezone.now()
+        session.writing_since = claim
+        session.save(update_fields=["writing_since", "updated_at"])
+
+    path = staging_path(session)
+    written = 0
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "r+b" if path.exists() else "wb") as f:
+            f.seek(start)
+            # хвост оборванного прошлого PUT сверх received не считается
+            f.truncate()
+            while written < length:
+                block = stream.read(min(COPY_BUFFER, length - written))
+                if not block:
+                    break
+                f.write(block)
+                written += len(block)
+    finally:
+        # даже оборванный кусок сохраняем: клиент продолжит с received
+        claimed = UploadSession.objects.filter(
+            pk=session.pk, received=start, writing_since=claim
+        ).update(received=start + written, writing_since=None, updated_at=timezone.now())
+
+    session.refresh_from_db(fields=["received", "writing_since", "updated_at"])
+    if not claimed:
+        raise UploadError(
+            "Кусок не принят: загрузку продолжил другой запрос", status=409, received=session.received
+        )
+    if written < length:
+        raise UploadError("Кусок передан не полностью", status=400, received=session.received)
+    return session
+
+
+def finish_upload(user, upload_id, sha256):
+    """Проверяет файл и переносит его на постоянное место (с дедупликацией)."""
+    with transaction.atomic():
+        # как в write_chunk: повторный finish той же сессии ждёт первый,
+        # а не переносит тот же staging-файл второй раз
+        session = (
+            UploadSession.objects.select_for_update()
+            .filter(pk=upload_id, owner=user)
+            .select_related("blob")
+            .first()
+        )
+        if session is None:
+            raise UploadError("Загрузка не найдена", status=404)
+        if session.is_complete:
+            if sha256 and sha256.lower() != session.blob.sha256:
+                raise UploadError("Контрольная сумма не совпадает", status=422)
+            return session
+        if session.received != session.size:
+            raise UploadError("Файл передан не полностью", status=409, received=session.received)
+
+        path = staging_path(session)
+        if session.size == 0:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.touch()
+        actual = file_sha256(path)
+        corrupted = sha256 and sha256.lower() != actual
+        if corrupted:
+            # битые данные: начинаем заново
+            path.unlink(missing_ok=True)
+            session.received = 0
+            session.save(update_fields=["received", "updated_at"])
+        else:
+            prefix = target_field(session.target).upload_to
+            blob = UploadedBlob.objects.filter(sha256=actual, prefix=prefix).first()
+            if blob is None:
+                blob = _store_blob(path, session, actual, prefix)
+            path.unlink(missing_ok=True)
+
+            session.blob = blob
+            session.save(update_fields=["blob", "updated_at"])
+
+    # после коммита: сброс received должен сохраниться
+    if corrupted:
+        raise UploadError("Контрольная сумма не совпадает", status=422, received=0)
+    return session
+
+
+def _store_blob(path, session, sha256, prefix):
+    name = blob_name(session.target, sha256, session.filename)
+    try:
+        final_path = Path(default_storage.path(name))
+    except NotImplementedError:
+        final_path = None
+
+    if final_path is not None:
+        # та же ФС: переименование вместо копирования
+        final_path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(path, final_path)
+    else:
+        with open(path, "rb") as f:
+            name = default_storage.save(name, File(f))
+
+    try:
+        with transaction.atomic():
+            return UploadedBlob.objects.create(
+                sha256=sha256, prefix=prefix, name=name, size=session.size
+            )
+    except IntegrityError:
+        # тот же файл параллельно завершила другая сессия: её blob остаётся,
+        # наша копия под другим именем (другое имя файла, суффикс storage)
+        # никому не принадлежит
+        blob = UploadedBlob.objects.get(sha256=sha256, prefix=prefix)
+        if blob.name != name:
+            default_storage.delete(name)
+        return blob
+
+
+def attach(instance, session):
+    """Привязывает файл завершённой сессии к FileField модели."""
+    label, field_name = UPLOAD_TARGETS[session.target]
+    getattr(instance, field_name).name = session.blob.name
+
+
+def purge_stale(older_than):
+    """
+    Удаляет сессии, не менявшиеся с older_than, и их staging-файлы.
+    Возвращает (сессий, файлов).
+    """
+    files = 0
+    sessions = UploadSession.objects.filter(updated_at__lt=older_than)
+    for pk in sessions.filter(blob=None).values_list("pk", flat=True).iterator():
+        path = staging_dir() / f"{pk}.part"
+        if path.exists():
+            path.unlink()
+            files += 1
+    deleted, _ = sessions.delete()
+    return deleted, files
@@ -27,6 +27,9 @@ urlpatterns = [
         ),
         name="login",
     ),
+    path("login/email/", views.email_login_request, name="email_login"),
+    path("login/email/code/", views.email_login_verify, name="email_login_verify"),
+    path("login/email/account/", views.email_login_claim, name="email_login_claim"),
 
     # Профиль
     path("profile/", views.profile_view, name="profile"),
@@ -38,6 +41,7 @@ urlpatterns = [
     # но можно скрывать в интерфейсе.
     path("resources/", views.ResourceListView.as_view(), name="resource_list"),
     path("resources/<slug:slug>/", views.ResourceDetailView.as_view(), name="resource_detail"),
+    path("resources/<slug:slug>/download/", views.resource_download, name="resource_download"),
     path("categories/", views.CategoryListView.as_view(), name="category_list"),
     path("categories/<slug:slug>/", views.CategoryDetailView.as_view(), name="category_detail"),
     path("bundles/", views.BundleListView.as_view(), name="bundle_list"),
@@ -45,5 +49,15 @@ urlpatterns = [
 
     # Загрузка ресурса
     path("upload/", views.resource_upload, name="resource_upload"),
+
+    # Чанковая загрузка файлов (archive/uploads.py)
+    path("api/uploads/", views.upload_start, name="upload_start"),
+    path("api/uploads/<uuid:upload_id>/", views.upload_chunk, name="upload_chunk"),
+    path("api/uploads/<uuid:upload_id>/finish/", views.upload_finish, name="upload_finish"),
+
+    # Статистика запросов по маршрутам (staff, archive/instrumentation.py)
+    path("_stats/requests/", views.request_stats, name="request_stats"),
+    # Метрики для Prometheus (archive/metrics.py)
+    path("metrics", views.metrics_view, name="metrics"),
 ]
 
@@ -5,6 +5,7 @@ from django.contrib import messages
 from django.contrib.auth import login
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.exceptions import ValidationError
 from django.db.models import Q, Count
 from django.shortcuts import get_object_or_404, render, redirect
 from django.urls import reverse_lazy
@@ -13,18 +14,19 @@ from django.contrib.auth import get_user_model, login
 
 from hub.models import Post
 from hub.forms import CommentForm
+from hub.services import create_comment
+from .caching import cache_response, cached_block, cached_value
+from .linkcheck import link_status_filter
+from .related import related_for
+from hub.threads import load_thread_for_request
 
 User = get_user_model()
 @login_required
 def post_detail(request, pk):
     post = get_object_or_404(Post, pk=pk)
 
-    # Все комментарии к посту
-    comments = (
-        post.comments.select_related("author", "author__profile")
-        .prefetch_related("replies__author", "replies__author__profile")
-        .order_by("created_at")
-    )
+    # Все комментарии к посту — одним запросом, дерево собирается в памяти
+    thread = load_thread_for_request(post, request)
 
     if request.method == "POST":
         form = CommentForm(request.POST)
@@ -37,9 +39,13 @@ def post_detail(request, pk):
                 parent = post.comments.filter(pk=parent_id).first()
                 if parent:
                     comment.parent = parent
-            comment.save()
-            # после отправки коммента перезагружаем страницу поста
-            return redirect("post_detail", pk=post.pk)
+            try:
+                create_comment(comment)
+            except ValidationError as error:
+                form.add_error(None, error)
+            else:
+                # после отправки коммента перезагружаем страницу поста
+                return redirect("post_detail", pk=post.pk)
     else:
         form = CommentForm()
 
@@ -48,7 +54,8 @@ def post_detail(request, pk):
         "hub/post_detail.html",   # <-- если шаблон у тебя по-другому называется/лежит, поменяй путь
         {
             "post": post,
-            "comments": comments,
+            "comments": thread.comments,
+            "thread": thread,
             "form": form,
         },
     )
@@ -59,7 +66,11 @@ def profile_view(request):
         "user": request.user,
     })
 
-from django.utils.text import slugify
+from django.http import Http404
+from django.utils.decorators import method_decorator
+from .avatars import clear as clear_avatar_thumbnails, make_upload_thumbnails
+from .profiles import get_profile
+from .slugs import save_with_slug, unique_slug
 from django.views.generic import (
 
     DetailView,
@@ -77,7 +88,6 @@ from .models import (
     Category,
     DonationLink,
     Resource,
-    Profile,
     Tag,
 )
 
@@ -110,27 +120,51 @@ class HomePageView(TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        context["categories"] = Category.objects.annotate(
-            resource_count=Count("resources")
-        ).order_by("name")
+        # Блоки кэшируются до изменения соответствующих моделей (см. archive/caching.py)
+        # и лениво: БД не трогается, если шаблон блок не выводит
+        context["categories"] = cached_block(
+            "home:categories",
+            [Category, Resource],
+            lambda: list(
+                Category.objects.annotate(resource_count=Count("resources")).order_by("name")
+            ),
+        )
 
-        context["featured_resources"] = (
-            Resource.objects.filter(is_published=True, is_featured=True)
-            .select_related("category")
-            .prefetch_related("tags")[:6]
+        context["featured_resources"] = cached_block(
+            "home:featured",
+            [Resource, Category, Tag],
+            lambda: list(
+                Resource.objects.filter(is_published=True, is_featured=True)
+                .select_related("category")
+                .prefetch_related("tags")[:6]
+            ),
         )
 
-        context["latest_resources"] = (
-            Resource.objects.filter(is_published=True)
-            .select_related("category")
-            .prefetch_related("tags")[:8]
+        context["latest_resources"] = cached_block(
+            "home:latest",
+            [Resource, Category, Tag],
+            lambda: list(
+                Resource.objects.filter(is_published=True)
+                .select_related("category")
+                .prefetch_related("tags")[:8]
+            ),
         )
 
-        context["donation_links"] = DonationLink.objects.filter(is_active=True)
-        context["ai_tools"] = Resource.objects.filter(
-            type=Resource.AI_TOOLS,
-            is_published=True,
-        )[:6]
+        context["donation_links"] = cached_block(
+            "home:donation_links",
+            [DonationLink],
+            lambda: list(DonationLink.objects.filter(is_active=True)),
+        )
+        context["ai_tools"] = cached_block(
+            "home:ai_tools",
+            [Resource],
+            lambda: list(
+                Resource.objects.filter(
+                    type=Resource.AI_TOOLS,
+                    is_published=True,
+                )[:6]
+            ),
+        )
 
         return context
 
@@ -177,6 +211,9 @@ class ResourceListView(ListView):
             if data.get("language"):
                 queryset = queryset.filter(language__iexact=data["language"])
 
+            if data.get("links"):
+                queryset = queryset.filter(link_status_filter(data["links"]))
+
             if data.get("ordering"):
                 queryset = queryset.order_by(data["ordering"])
 
@@ -209,34 +246,28 @@ class ResourceDetailView(DetailView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        resource = self.object
-
-        tag_ids = list(resource.tags.values_list("id", flat=True))
-        queryset = Resource.objects.filter(is_published=True).exclude(id=resource.id)
-
-        if resource.category:
-            queryset = queryset.filter(
-                Q(category=resource.category) | Q(tags__in=tag_ids)
-            ).distinct()
-        else:
-            queryset = queryset.filter(tags__in=tag_ids).distinct()
-
-        context["related_resources"] = queryset[:4]
+        # топ похожих предрасчитан в RelatedResource (см. archive/related.py)
+        context["related_resources"] = related_for(self.object, limit=4)
         return context
 
 
 # -------------------------------
 # КАТЕГОРИИ
 # -------------------------------
+@method_decorator(cache_response(Category, Resource), name="dispatch")
 class CategoryListView(ListView):
     model = Category
     template_name = "archive/category_list.html"
     context_object_name = "categories"
 
     def get_queryset(self):
-        return Category.objects.annotate(
-            resource_count=Count("resources")
-        ).order_by("name")
+        return cached_value(
+            "category_list",
+            [Category, Resource],
+            lambda: list(
+                Category.objects.annotate(resource_count=Count("resources")).order_by("name")
+            ),
+        )
 
 
 class CategoryDetailView(ListView):
@@ -301,19 +332,22 @@ class CategoryDetailView(ListView):
 # -------------------------------
 # BUNDLES
 # -------------------------------
+@method_decorator(cache_response(Bundle), name="dispatch")
 class BundleListView(ListView):
     model = Bundle
     template_name = "archive/bundle_list.html"
     context_object_name = "bundles"
 
     def get_queryset(self):
-        return (
-            Bundle.objects.filter(is_active=True)
-            .prefetch_related("resources")
-            .order_by("title")
+        # шаблон списка выводит только поля подборки — ресурсы не подтягиваем
+        return cached_value(
+            "bundle_list",
+            [Bundle],
+            lambda: list(Bundle.objects.filter(is_active=True).order_by("title")),
         )
 
 
+@method_decorator(cache_response(Bundle, Resource, Category, Tag), name="dispatch")
 class BundleDetailView(DetailView):
     model = Bundle
     template_name = "archive/bundle_detail.html"
@@ -327,6 +361,20 @@ class BundleDetailView(DetailView):
             .prefetch_related("resources__category", "resources__tags")
         )
 
+    def get_object(self, queryset=None):
+        # Подборка вместе с prefetch ресурсов кэшируется целиком;
+        # None тоже кэшируется, чтобы несуществующий slug не долбил БД
+        slug = self.kwargs.get(self.slug_url_kwarg)
+        bundle = cached_value(
+            "bundle_detail",
+            [Bundle, Resource, Category, Tag],
+            lambda: self.get_queryset().filter(slug=slug).first(),
+            slug,
+        )
+        if bundle is None:
+            raise Http404("Подборка не найдена")
+        return bundle
+
 
 # -------------------------------
 # ДОНАТ
@@ -367,24 +415,20 @@ class ResourceUploadView(LoginRequiredMixin, FormView):
     success_url = reverse_lazy("resource_list")
     login_url = reverse_lazy("login")
 
-    def generate_slug(self, title):
-        base = slugify(title)[:200] or "resource"
-        slug = base
-        counter = 1
-
-        while Resource.objects.filter(slug=slug).exists():
-            slug = f"{base}-{counter}"
-            counter += 1
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs["owner"] = self.request.user
+        return kwargs
 
-        return slug
+    def generate_slug(self, title):
+        return unique_slug(Resource, title, "resource")
 
     def form_valid(self, form):
         resource = form.save(commit=False)
-        resource.slug = self.generate_slug(resource.title)
         resource.is_published = True
         resource.source_name = self.request.user.username
 
-        resource.save()
+        save_with_slug(resource, resource.title, "resource")
         form.save_m2m()
 
         messages.success(self.request, "Материал опубликован.")
@@ -411,12 +455,19 @@ class RegisterView(FormView):
 # -------------------------------
 @login_required
 def profile_view(request):
-    profile, _ = Profile.objects.get_or_create(user=request.user)
+    profile = get_profile(request.user)
 
     if request.method == "POST":
         form = ProfileForm(request.POST, request.FILES, instance=profile)
         if form.is_valid():
-            form.save()
+            avatar_changed = "avatar" in form.changed_data
+            if avatar_changed:
+                # миниатюры прежней картинки убираем сразу: до воркера
+                # шапка покажет новый оригинал, а не старый аватар
+                clear_avatar_thumbnails(form.instance)
+            profile = form.save()
+            if avatar_changed:
+                make_upload_thumbnails.delay(profile.pk)
             messages.success(request, "Профиль обновлён.")
             return redirect("profile")
     else:
@@ -432,6 +483,8 @@ from django.views.generic import FormView, ListView
 from django.contrib import messages
 from django.shortcuts import redirect
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.exceptions import ValidationError
+from django.core.exceptions import ValidationError
 from django.db.models import Q
 
 from hub.models import Post
@@ -443,12 +496,13 @@ from archive.forms import PostForm
 # ЛЕНТА ПОСТОВ
 # -------------------------------
 from django.views.generic import ListView
-from django.db.models import Q
 
 from hub.models import Post
+from hub.pagination import CursorPaginationMixin
+from hub.search import search_posts
 
 
-class ProjectFeedView(ListView):
+class ProjectFeedView(CursorPaginationMixin, ListView):
     """
     Лента постов (как реддит / инста, просто список Post)
     """
@@ -457,42 +511,22 @@ class ProjectFeedView(ListView):
     context_object_name = "posts"
     paginate_by = 20
 
+    def use_cursor_pagination(self, queryset):
+        # Поисковая выдача отсортирована по релевантности — для неё обычные страницы
+        return not self.request.GET.get("q")
+
     def get_queryset(self):
+        # Лайки и дизлайки берутся из счётчиков поста — реакции подтягивать не нужно
         qs = (
             Post.objects
             .select_related("author", "author__profile")
-            .prefetch_related("reactions")
             .order_by("-created_at")
         )
 
         q = self.request.GET.get("q")
         if q:
-            # Базовый поиск в БД
-            qs_db = qs.filter(
-                Q(title__icontains=q) |
-                Q(body__icontains=q) |
-                Q(author__username__icontains=q)
-                # | Q(tags__name__icontains=q)  # <-- ТОЖЕ УБРАЛИ
-            ).distinct()
-
-            # Дополнительно — Python casefold для кириллицы (SQLite не всегда делает icontains без учёта регистра)
-            q_cf = q.casefold()
-            ids_py = []
-            for p in qs:
-                title = (p.title or "").casefold()
-                body = (p.body or "").casefold()
-                nick = (getattr(p.author.profile, "nickname", "") or "").casefold()
-                username = (p.author.username or "").casefold()
-                if (
-                    q_cf in title
-                    or q_cf in body
-                    or q_cf in nick
-                    or q_cf in username
-                ):
-                    ids_py.append(p.id)
-
-            ids_all = list(qs_db.values_list("id", flat=True)) + ids_py
-            qs = qs.filter(id__in=ids_all).distinct()
+            # Полнотекстовый индекс (hub/search.py): ранжирование и пагинация в БД
+            qs = search_posts(qs, q)
 
         return qs
 
@@ -512,6 +546,7 @@ from django.shortcuts import get_object_or_404
 
 from hub.models import Post, PostLike
 from hub.forms import PostForm, CommentForm
+from hub.services import create_comment, toggle_reaction
 
 
 class PostCreateView(LoginRequiredMixin, CreateView):
@@ -536,7 +571,9 @@ class PostDetailView(DetailView):
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
-        ctx["comments"] = self.object.comments.all()
+        thread = load_thread_for_request(self.object, self.request)
+        ctx["thread"] = thread
+        ctx["comments"] = thread.comments
         ctx["form"] = CommentForm()
         return ctx
 
@@ -552,7 +589,7 @@ class PostDetailView(DetailView):
             comment = form.save(commit=False)
             comment.post = self.object
             comment.author = request.user
-            comment.save()
+            create_comment(comment)
             return redirect("project_feed")
 
         ctx = self.get_context_data()
@@ -575,24 +612,12 @@ from django.views.decorators.http import require_POST
 from django.utils.decorators import method_decorator
 
 
-def _recalc_likes(post):
-    likes = PostLike.objects.filter(post=post, value=PostLike.LIKE).count()
-    Post.objects.filter(pk=post.pk).update(likes_count=likes)
-
-
 @login_required
 @require_POST
 def post_like(request, pk):
     post = get_object_or_404(Post, pk=pk)
-    reaction, created = PostLike.objects.get_or_create(
-        post=post,
-        user=request.user,
-        defaults={"value": PostLike.LIKE},
-    )
-    if not created and reaction.value != PostLike.LIKE:
-        reaction.value = PostLike.LIKE
-        reaction.save(update_fields=["value"])
-    _recalc_likes(post)
+    # счётчики обновляются F()-дельтами внутри сервиса, без COUNT(*) по реакциям
+    toggle_reaction(post, request.user, PostLike.LIKE)
     return redirect("project_feed")
 
 
@@ -600,15 +625,7 @@ def post_like(request, pk):
 @require_POST
 def post_dislike(request, pk):
     post = get_object_or_404(Post, pk=pk)
-    reaction, created = PostLike.objects.get_or_create(
-        post=post,
-        user=request.user,
-        defaults={"value": PostLike.DISLIKE},
-    )
-    if not created and reaction.value != PostLike.DISLIKE:
-        reaction.value = PostLike.DISLIKE
-        reaction.save(update_fields=["value"])
-    _recalc_likes(post)
+    toggle_reaction(post, request.user, PostLike.DISLIKE)
     return redirect("project_feed")
     
 # archive/views.py
@@ -620,13 +637,13 @@ from .forms import ResourceUploadForm  # у тебя такая форма уж
 @login_required
 def resource_upload(request):
     if request.method == "POST":
-        form = ResourceUploadForm(request.POST, request.FILES)
+        form = ResourceUploadForm(request.POST, request.FILES, owner=request.user)
         if form.is_valid():
             resource = form.save()
             # если у модели Resource есть get_absolute_url — отправляем туда
             return redirect(resource.get_absolute_url())
     else:
-        form = ResourceUploadForm()
+        form = ResourceUploadForm(owner=request.user)
 
     return render(request, "archive/resource_upload.html", {"form": form})
 
@@ -638,3 +655,311 @@ class DonateView(ListView):
     def get_queryset(self):
         # показываем только активные ссылки
         return DonationLink.objects.filter(is_active=True).order_by("title")
+
+
+# -------------------------------
+# МЕДИА (при SERVE_MEDIA)
+# -------------------------------
+import posixpath
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.views.decorators.http import require_safe
+
+from .downloads import serve_file
+
+
+@require_safe
+def serve_media(request, path):
+    """Замена django.views.static.serve: Range, ETag, X-Accel-Redirect / X-Sendfile."""
+    name = posixpath.normpath(path).lstrip("/")
+    # staging/ — недокачанные куски archive/uploads.py
+    if name in ("", ".") or name.startswith(("../", settings.CHUNKED_UPLOAD_STAGING_DIR)):
+        raise Http404("Файл не найден")
+    return serve_file(request, default_storage, name)
+
+
+@require_safe
+def resource_download(request, slug):
+    """Файл ресурса со счётчиком скачиваний (как hub.views.project_download)."""
+    resource = get_object_or_404(
+        Resource.objects.filter(is_published=True).only("id", "uploaded_file"), slug=slug
+    )
+    if not resource.uploaded_file:
+        raise Http404("Файл не прикреплён")
+    return serve_file(
+        request,
+        resource.uploaded_file.storage,
+        resource.uploaded_file.name,
+        as_attachment=True,
+        count=("archive.Resource", "pk", resource.pk),
+    )
+
+
+# -------------------------------
+# ЧАНКОВАЯ ЗАГРУЗКА (archive/uploads.py)
+# -------------------------------
+import json
+
+from django.http import JsonResponse
+from django.views.decorators.http import require_http_methods, require_POST
+
+from . import uploads
+
+
+def _upload_payload(session):
+    return {
+        "id": str(session.pk),
+        "received": session.received,
+        "size": session.size,
+        "complete": session.is_complete,
+        "chunk_size": settings.CHUNKED_UPLOAD_CHUNK_SIZE,
+    }
+
+
+def _upload_error(error):
+    return JsonResponse({"error": str(error), **error.extra}, status=error.status)
+
+
+def _json_body(request):
+    try:
+        return json.loads(request.body or b"{}")
+    except ValueError:
+        raise uploads.UploadError("Ожидается JSON")
+
+
+@login_required
+@require_POST
+def upload_start(request):
+    try:
+        data = _json_body(request)
+        try:
+            size = int(data.get("size"))
+        except (TypeError, ValueError):
+            raise uploads.UploadError("Не указан размер файла")
+        session = uploads.start_upload(request.user, data.get("target"), data.get("filename"), size)
+    except uploads.UploadError as error:
+        return _upload_error(error)
+    return JsonResponse(_upload_payload(session), status=201)
+
+
+@login_required
+@require_http_methods(["GET", "PUT"])
+def upload_chunk(request, upload_id):
+    """GET — сколько принято (для докачки), PUT — очередной кусок."""
+    try:
+        if request.method == "GET":
+            session = uploads.get_session(request.user, upload_id)
+        else:
+            # тело читаем потоком: request.body здесь не трогаем
+            session = uploads.write_chunk(
+                request.user, upload_id, request.headers.get("Content-Range"), request
+            )
+    except uploads.UploadError as error:
+        return _upload_error(error)
+    return JsonResponse(_upload_payload(session))
+
+
+@login_required
+@require_POST
+def upload_finish(request, upload_id):
+    try:
+        data = _json_body(request)
+        session = uploads.finish_upload(request.user, upload_id, str(data.get("sha256") or ""))
+    except uploads.UploadError as error:
+        return _upload_error(error)
+    return JsonResponse(_upload_payload(session))
+
+
+# -------------------------------
+# ВХОД ПО КОДУ ИЗ ПИСЬМА (archive/email_login.py)
+# -------------------------------
+import time
+
+from django.utils.http import url_has_allowed_host_and_scheme
+
+from . import email_login
+from .forms import EmailLoginRequestForm, EmailLoginVerifyForm, StyledAuthenticationForm
+from .ratelimit import client_ip
+
+EMAIL_LOGIN_SESSION_KEY = "email_login"
+
+
+def _rate_limited(form, buckets):
+    """Забирает жетон из каждого ведра; при отказе — ошибка формы и True."""
+    for bucket, ident in buckets:
+        allowed, retry_after = bucket.take(ident)
+        if not allowed:
+            form.add_error(None, f"Слишком много попыток. Повторите через {retry_after} с.")
+            return True
+    return False
+
+
+def _finish_email_login(request, user, pending):
+    request.session.pop(EMAIL_LOGIN_SESSION_KEY, None)
+    login(request, user, backend="django.contrib.auth.backends.ModelBackend")
+    return redirect(pending.get("next") or settings.LOGIN_REDIRECT_URL)
+
+
+def email_login_request(request):
+    if request.user.is_authenticated:
+        return redirect(settings.LOGIN_REDIRECT_URL)
+
+    status = 200
+    form = EmailLoginRequestForm(request.POST or None)
+    if request.method == "POST" and form.is_valid():
+        email = email_login.normalize_email(form.cleaned_data["email"])
+        buckets = [
+            (email_login.request_by_ip, client_ip(request)),
+            (email_login.request_by_email, email),
+        ]
+        if _rate_limited(form, buckets):
+            status = 429
+        else:
+            email_login.request_code(email)
+            next_url = request.GET.get("next", "")
+            if not url_has_allowed_host_and_scheme(
+                next_url, allowed_hosts={request.get_host()}, require_https=request.is_secure()
+            ):
+                next_url = ""
+            request.session[EMAIL_LOGIN_SESSION_KEY] = {"email": email, "next": next_url}
+            return redirect("email_login_verify")
+
+    return render(request, "archive/email_login_request.html", {"form": form}, status=status)
+
+
+def email_login_verify(request):
+    pending = request.session.get(EMAIL_LOGIN_SESSION_KEY)
+    if not pending:
+        return redirect("email_login")
+    email = pending["email"]
+
+    status = 200
+    form = EmailLoginVerifyForm(request.POST or None)
+    if request.method == "POST" and form.is_valid():
+        buckets = [
+            (email_login.verify_by_ip, client_ip(request)),
+            (email_login.verify_by_email, email),
+        ]
+        if _rate_limited(form, buckets):
+            status = 429
+        elif email_login.verify_code(email, form.cleaned_data["code"]):
+            email_login.verify_by_email.reset(email)
+            user = email_login.verified_user(email)
+            if user is None and email_login.unverified_accounts(email).exists():
+                # email указан в аккаунте с паролем, но не подтверждён —
+                # не входим в него без пароля (см. archive/email_login.py)
+                request.session[EMAIL_LOGIN_SESSION_KEY] = {**pending, "proven_at": time.time()}
+                return redirect("email_login_claim")
+            if user is None:
+                user = email_login.create_user(email)
+            return _finish_email_login(request, user, pending)
+        else:
+            form.add_error("code", "Неверный или просроченный код.")
+            status = 400
+
+    return render(request, "archive/email_login_verify.html", {
+        "form": form,
+        "email": email,
+    }, status=status)
+
+
+def email_login_claim(request):
+    """
+    Код верный, но email записан в аккаунт(ы) с паролем без подтверждения.
+    Войти в такой аккаунт можно только его паролем — тогда email
+    подтверждается за ним; иначе — новый аккаунт с этим email.
+    """
+    pending = request.session.get(EMAIL_LOGIN_SESSION_KEY) or {}
+    proven_at = pending.get("proven_at")
+    if not proven_at or time.time() - proven_at > email_login.code_ttl().total_seconds():
+        return redirect("email_login")
+    email = pending["email"]
+
+    status = 200
+    form = StyledAuthenticationForm(request, data=request.POST or None)
+    if request.method == "POST" and "new_account" in request.POST:
+        user = email_login.verified_user(email) or email_login.create_user(email)
+        return _finish_email_login(request, user, pending)
+    if request.method == "POST":
+        buckets = [
+            (email_login.verify_by_ip, client_ip(request)),
+            (email_login.claim_by_email, email),
+        ]
+        if _rate_limited(form, buckets):
+            status = 429
+        elif form.is_valid():
+            user = form.get_user()
+            if user.email.lower() != email:
+                form.add_error(None, "У этого аккаунта другой email.")
+                status = 400
+            elif not email_login.mark_verified(user, email):
+                form.add_error(None, "Этот email уже подтверждён за другим аккаунтом.")
+                status = 400
+            else:
+                request.session.pop(EMAIL_LOGIN_SESSION_KEY, None)
+                login(request, user)
+                return redirect(pending.get("next") or settings.LOGIN_REDIRECT_URL)
+        else:
+            status = 400
+
+    return render(request, "archive/email_login_claim.html", {
+        "form": form,
+        "email": email,
+    }, status=status)
+
+
+# -------------------------------
+# СТАТИСТИКА ЗАПРОСОВ (archive/instrumentation.py)
+# -------------------------------
+import os
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.views.decorators.cache import never_cache
+
+from .instrumentation import route_stats
+
+
+@never_cache
+@staff_member_required
+def request_stats(request):
+    """
+    Перцентили времени и числа SQL по маршрутам этого процесса.
+    ?sort=queries_p90 (любое поле сводки) — по убыванию; POST ?reset=1 — обнулить.
+    """
+    if request.method == "POST" and request.GET.get("reset"):
+        route_stats.reset()
+    routes = route_stats.snapshot()
+    sort = request.GET.get("sort", "ms_p90")
+    ordered = sorted(routes.items(), key=lambda item: item[1].get(sort, 0), reverse=True)
+    return JsonResponse({
+        "pid": os.getpid(),
+        "since": route_stats.started_at,
+        "routes": dict(ordered),
+    }, json_dumps_params={"ensure_ascii": False})
+
+
+# -------------------------------
+# PROMETHEUS (archive/metrics.py)
+# -------------------------------
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+from . import metrics
+
+
+def _metrics_allowed(request):
+    token = getattr(settings, "METRICS_TOKEN", "")
+    auth = request.headers.get("Authorization", "")
+    if token and auth.startswith("Bearer ") and constant_time_compare(auth[7:].strip(), token):
+        return True
+    return request.user.is_authenticated and request.user.is_staff
+
+
+@never_cache
+@require_safe
+def metrics_view(request):
+    """Метрики для Prometheus: Bearer METRICS_TOKEN или вход под staff."""
+    if not _metrics_allowed(request):
+        return HttpResponseForbidden("Forbidden")
+    return HttpResponse(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
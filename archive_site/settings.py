@@ -1,4 +1,5 @@
 import os
+import tempfile
 from pathlib import Path
 from urllib.parse import urlparse
 
@@ -68,6 +69,8 @@ INSTALLED_APPS = [
 # ======================
 
 MIDDLEWARE = [
+    # первым: замеряет всё, что ниже (archive/instrumentation.py)
+    "archive.instrumentation.InstrumentationMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -80,6 +83,23 @@ MIDDLEWARE = [
 ]
 
 
+# Замеры запросов (archive/instrumentation.py). Server-Timing: "all" / "staff" / "off"
+INSTRUMENTATION_SERVER_TIMING = os.getenv(
+    "DJANGO_INSTRUMENTATION_SERVER_TIMING", "all" if DEBUG else "staff"
+).strip().lower()
+# запросы медленнее / с большим числом SQL пишутся в лог archive.instrumentation
+INSTRUMENTATION_SLOW_MS = int(os.getenv("DJANGO_INSTRUMENTATION_SLOW_MS", "500"))
+INSTRUMENTATION_SLOW_QUERIES = int(os.getenv("DJANGO_INSTRUMENTATION_SLOW_QUERIES", "50"))
+# сколько последних запросов каждого маршрута хранить для перцентилей
+INSTRUMENTATION_SAMPLES = 500
+# /metrics (archive/metrics.py): доступ по "Authorization: Bearer <METRICS_TOKEN>" или staff.
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+# Каталог, через который воркеры gunicorn складывают метрики (задаёт gunicorn.conf.py).
+# Пусто — метрики только своего процесса.
+METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR", "")
+METRICS_FLUSH_SECONDS = int(os.getenv("METRICS_FLUSH_SECONDS", "5"))
+
+
 # ======================
 # URLS / WSGI
 # ======================
@@ -104,6 +124,7 @@ TEMPLATES = [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                "archive.context_processors.current_profile",
 
                 "social_django.context_processors.backends",
                 "social_django.context_processors.login_redirect",
@@ -140,6 +161,45 @@ else:
     }
 
 
+# ======================
+# CACHE
+# ======================
+
+# DJANGO_CACHE_BACKEND: locmem | file | redis. По умолчанию file, с DEBUG — locmem.
+# locmem живёт внутри процесса: при нескольких воркерах gunicorn (Procfile)
+# инвалидация по сигналам видна только тому воркеру, что сохранил модель,
+# поэтому без DEBUG по умолчанию file — каталог общий для воркеров одной машины.
+# Без DEBUG с locmem manage.py check / migrate выводят предупреждение archive.W001.
+# redis — любой сервер с протоколом Redis (Redis, Valkey, KeyDB, локальная заглушка)
+# по адресу REDIS_URL; пакет redis есть в requirements.txt.
+CACHE_BACKEND = os.getenv("DJANGO_CACHE_BACKEND", "locmem" if DEBUG else "file").strip().lower()
+
+_cache_backends = {
+    "locmem": ("django.core.cache.backends.locmem.LocMemCache", "webarchive"),
+    "file": (
+        "django.core.cache.backends.filebased.FileBasedCache",
+        os.path.join(tempfile.gettempdir(), "webarchive-cache"),
+    ),
+    "redis": (
+        "django.core.cache.backends.redis.RedisCache",
+        os.getenv("REDIS_URL", "redis://127.0.0.1:6379/0"),
+    ),
+}
+_cache_engine, _cache_location = _cache_backends[CACHE_BACKEND]
+
+CACHES = {
+    "default": {
+        "BACKEND": _cache_engine,
+        "LOCATION": os.getenv("DJANGO_CACHE_LOCATION", _cache_location),
+        # срок блоков и ответов archive/caching.py; версии моделей — без срока
+        "TIMEOUT": int(os.getenv("DJANGO_CACHE_TIMEOUT", "300")),
+        "KEY_PREFIX": "webarchive",
+    }
+}
+# Имя и аватар текущего пользователя для шапки (archive/profiles.display_for)
+PROFILE_DISPLAY_CACHE_TIMEOUT = int(os.getenv("DJANGO_PROFILE_DISPLAY_CACHE_TIMEOUT", "600"))
+
+
 # ======================
 # PASSWORDS
 # ======================
@@ -175,6 +235,32 @@ MEDIA_URL = os.getenv("DJANGO_MEDIA_URL", "/media/")
 MEDIA_ROOT = Path(os.getenv("DJANGO_MEDIA_ROOT", str(BASE_DIR / "media")))
 SERVE_MEDIA = env_bool("DJANGO_SERVE_MEDIA", True)
 
+# Отдача файлов (archive/downloads.py). Если перед Django стоит прокси:
+# "x-accel" — nginx (internal location DOWNLOADS_ACCEL_PREFIX с alias на MEDIA_ROOT),
+# "x-sendfile" — Apache mod_xsendfile / lighttpd. Пусто — отдаёт сам Django.
+DOWNLOADS_OFFLOAD = os.getenv("DJANGO_DOWNLOADS_OFFLOAD", "").strip().lower()
+DOWNLOADS_ACCEL_PREFIX = os.getenv("DJANGO_DOWNLOADS_ACCEL_PREFIX", "/protected-media/")
+DOWNLOAD_COUNTER_FLUSH_SECONDS = int(os.getenv("DJANGO_DOWNLOAD_COUNTER_FLUSH_SECONDS", "10"))
+# Чанковая загрузка (archive/uploads.py): куски пишутся в MEDIA_ROOT/<STAGING_DIR>
+CHUNKED_UPLOAD_STAGING_DIR = "staging/"
+CHUNKED_UPLOAD_CHUNK_SIZE = int(os.getenv("DJANGO_CHUNKED_UPLOAD_CHUNK_SIZE", str(8 * 1024 * 1024)))
+CHUNKED_UPLOAD_MAX_CHUNK = 4 * CHUNKED_UPLOAD_CHUNK_SIZE
+CHUNKED_UPLOAD_MAX_SIZE = int(os.getenv("DJANGO_CHUNKED_UPLOAD_MAX_SIZE", str(2 * 1024 ** 3)))
+# сколько секунд кусок считается «в передаче»: после этого смещение может занять другой PUT
+CHUNKED_UPLOAD_CHUNK_LEASE = int(os.getenv("DJANGO_CHUNKED_UPLOAD_CHUNK_LEASE", "600"))
+# Очередь фоновых задач (archive/tasks.py, manage.py run_worker).
+# TASKS_EAGER=1 — выполнять задачи сразу в запросе, без воркера.
+TASKS_EAGER = env_bool("DJANGO_TASKS_EAGER", False)
+TASKS_WORKER_CONCURRENCY = int(os.getenv("DJANGO_TASKS_WORKER_CONCURRENCY", "2"))
+TASKS_POLL_INTERVAL = float(os.getenv("DJANGO_TASKS_POLL_INTERVAL", "2"))
+# задача, которая выполняется дольше, считается брошенной упавшим воркером
+TASKS_LOCK_TIMEOUT = int(os.getenv("DJANGO_TASKS_LOCK_TIMEOUT", "600"))
+TASKS_KEEP_DONE_HOURS = 24 * 7
+# Воркер считается пропавшим, если не отмечался дольше TASKS_WORKER_TIMEOUT секунд.
+# Тогда .delay() пишет ошибку в лог и (TASKS_WORKER_FALLBACK) выполняет задачу сам.
+TASKS_WORKER_TIMEOUT = int(os.getenv("DJANGO_TASKS_WORKER_TIMEOUT", "60"))
+TASKS_WORKER_FALLBACK = env_bool("DJANGO_TASKS_WORKER_FALLBACK", True)
+
 
 # ======================
 # EMAIL
@@ -195,6 +281,14 @@ EMAIL_HOST_PASSWORD = os.environ.get("EMAIL_HOST_PASSWORD", "")
 DEFAULT_FROM_EMAIL = os.environ.get("DEFAULT_FROM_EMAIL") or EMAIL_HOST_USER or "noreply@webarchive.com"
 SERVER_EMAIL = os.environ.get("SERVER_EMAIL") or DEFAULT_FROM_EMAIL
 
+# Вход по коду из письма (archive/email_login.py): срок жизни кода, секунд
+EMAIL_LOGIN_CODE_TTL = int(os.environ.get("EMAIL_LOGIN_CODE_TTL", "600"))
+# Неверных вводов одного кода, после которых он гасится
+EMAIL_LOGIN_MAX_ATTEMPTS = int(os.environ.get("EMAIL_LOGIN_MAX_ATTEMPTS", "5"))
+# Сколько обратных прокси перед приложением дописывают X-Forwarded-For
+# (archive/ratelimit.client_ip). 0 — верить только REMOTE_ADDR.
+TRUSTED_PROXY_COUNT = int(os.environ.get("TRUSTED_PROXY_COUNT", "0"))
+
 
 # ======================
 # AUTH / SOCIAL AUTH
@@ -22,10 +22,11 @@ urlpatterns = [
     ),
 ] 
 
-# Обслуживаем медиа-файлы прямо Django'ем, если разрешено флагом (например, на Render)
+# Обслуживаем медиа-файлы прямо Django'ем, если разрешено флагом (например, на Render).
+# serve_media понимает Range / ETag и умеет отдать файл через прокси (archive/downloads.py)
 if settings.SERVE_MEDIA:
-    from django.views.static import serve
+    from archive.views import serve_media
 
     urlpatterns += [
-        path(f"{settings.MEDIA_URL.lstrip('/') }<path:path>", serve, {"document_root": settings.MEDIA_ROOT})
+        path(f"{settings.MEDIA_URL.lstrip('/') }<path:path>", serve_media)
     ]
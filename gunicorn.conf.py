@@ -0,0 +1,21 @@
+# gunicorn.conf.py — gunicorn читает его сам из рабочего каталога (Procfile: web).
+"""
+Метрики нескольких воркеров (archive/metrics.py) собираются через общий
+каталог METRICS_MULTIPROC_DIR. Мастер задаёт его до запуска воркеров и
+очищает от файлов прошлого запуска: иначе счётчики продолжились бы со
+старых значений процессов, которых уже нет.
+"""
+import os
+import tempfile
+from pathlib import Path
+
+os.environ.setdefault(
+    "METRICS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "webarchive-metrics")
+)
+
+
+def on_starting(server):
+    directory = Path(os.environ["METRICS_MULTIPROC_DIR"])
+    directory.mkdir(parents=True, exist_ok=True)
+    for path in directory.iterdir():
+        path.unlink(missing_ok=True)
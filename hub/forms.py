@@ -1,18 +1,43 @@
 # hub/forms.py
 from django import forms
-from django.utils.text import slugify
+
+from archive.forms import ChunkedUploadMixin, upload_id_field
+from archive.models import UploadSession
+
 from .models import Post, Comment, Project, ProjectPost, ProjectComment, Tag
+from .tags import tag_service
 
 
-class PostForm(forms.ModelForm):
-    """Форма для создания постов с хештегами."""
+class HashtagsMixin:
+    """Поле tags_raw («#python #django») и разбор его в теги через TagService."""
 
-    tags_raw = forms.CharField(
+    def clean_tags_raw(self):
+        raw = self.cleaned_data.get("tags_raw", "") or ""
+        parts = [p.strip().lstrip("#").lower() for p in raw.replace(",", " ").split()]
+        tags = [p for p in parts if p]
+        return list(dict.fromkeys(tags))  # уникальные, сохранённый порядок
+
+    def parse_tags(self):
+        """
+        id тегов по введённым хештегам (недостающие создаются) — готово
+        для .set() / .add(). Все теги разом, а не get_or_create на каждый.
+        """
+        return tag_service(Tag).ids(self.cleaned_data.get("tags_raw", []))
+
+
+def _tags_raw_field():
+    return forms.CharField(
         required=False,
         widget=forms.TextInput(attrs={"class": "input-control", "placeholder": "#python #django"}),
         label="Хештеги",
     )
 
+
+class PostForm(HashtagsMixin, forms.ModelForm):
+    """Форма для создания постов с хештегами."""
+
+    tags_raw = _tags_raw_field()
+
     class Meta:
         model = Post
         fields = ["title", "body", "tags_raw"]
@@ -21,21 +46,6 @@ class PostForm(forms.ModelForm):
             "body": forms.Textarea(attrs={"class": "input-control", "rows": 5, "placeholder": "Текст поста"}),
         }
 
-    def clean_tags_raw(self):
-        raw = self.cleaned_data.get("tags_raw", "") or ""
-        parts = [p.strip().lstrip("#").lower() for p in raw.replace(",", " ").split()]
-        tags = [p for p in parts if p]
-        return list(dict.fromkeys(tags))  # уникальные, сохранённый порядок
-
-    def parse_tags(self):
-        """Создаёт/возвращает объекты Tag по введённым хештегам."""
-        tags = []
-        for name in self.cleaned_data.get("tags_raw", []):
-            slug = slugify(name)[:60] or name
-            tag, _ = Tag.objects.get_or_create(slug=slug, defaults={"name": name})
-            tags.append(tag)
-        return tags
-
 
 class CommentForm(forms.ModelForm):
     """Форма для комментариев."""
@@ -54,12 +64,19 @@ class CommentForm(forms.ModelForm):
         }
 
 
-class ProjectForm(forms.ModelForm):
+class ProjectForm(ChunkedUploadMixin, HashtagsMixin, forms.ModelForm):
     """Создание/редактирование проекта (репозитория)."""
 
+    upload_target = UploadSession.PROJECT
+    # архив, загруженный по кускам (вместо attachment в том же POST)
+    upload_id = upload_id_field()
+
+    # новые теги текстом — в дополнение к отмеченным в tags
+    tags_raw = _tags_raw_field()
+
     class Meta:
         model = Project
-        fields = ["title", "short_description", "readme", "github_url", "attachment", "visibility", "tags", "related_materials", "slug"]
+        fields = ["title", "short_description", "readme", "github_url", "attachment", "visibility", "tags", "tags_raw", "related_materials", "slug", "upload_id"]
         widgets = {
             "title": forms.TextInput(attrs={"class": "input-control"}),
             "short_description": forms.Textarea(attrs={"class": "input-control", "rows": 4}),
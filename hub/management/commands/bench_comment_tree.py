@@ -0,0 +1,106 @@
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from hub.models import Comment, Post
+from hub.threads import build_tree
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Бенчмарк загрузки ветки комментариев: рекурсия по parent (как раньше) "
+        "против диапазона по материализованному пути. Данные создаются в транзакции, "
+        "которая откатывается."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--comments", type=int, default=10000)
+        parser.add_argument("--roots", type=int, default=100)
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        rnd = random.Random(42)
+        with transaction.atomic():
+            author = User.objects.create(username=f"bench-{time.time_ns()}")
+            post = Post.objects.create(author=author, title="bench", body="bench")
+            self._build_thread(post, author, rnd, options["comments"], options["roots"])
+
+            subtree_root = (
+                Comment.objects.filter(post=post, parent__isnull=True).order_by("pk").first()
+            )
+
+            rows = [
+                ("Вся ветка, рекурсия по parent", lambda: self._recursive(post)),
+                ("Вся ветка, по path", lambda: self._by_path(post)),
+                ("Поддерево, рекурсия по parent", lambda: self._recursive(post, subtree_root)),
+                ("Поддерево, диапазон по path", lambda: list(subtree_root.subtree())),
+                ("Число ответов, рекурсия", lambda: len(self._recursive(post, subtree_root)) - 1),
+                ("Число ответов, по path", lambda: subtree_root.descendants().count()),
+            ]
+            self.stdout.write(f"{'':<32} {'мс':>10} {'запросов':>10}")
+            for title, func in rows:
+                elapsed, queries = self._measure(func, options["repeat"])
+                self.stdout.write(f"{title:<32} {elapsed:>10.1f} {queries:>10}")
+
+            transaction.set_rollback(True)
+
+    def _build_thread(self, post, author, rnd, total, roots):
+        """Случайное дерево: каждый новый комментарий отвечает на один из уже созданных."""
+        created = Comment.objects.bulk_create(
+            Comment(post=post, author=author, body="root") for _ in range(roots)
+        )
+        for comment in created:
+            comment.path = Comment.path_segment(comment.pk)
+        Comment.objects.bulk_update(created, ["path"])
+
+        while len(created) < total:
+            parents = [rnd.choice(created) for _ in range(min(1000, total - len(created)))]
+            batch = Comment.objects.bulk_create(
+                Comment(post=post, author=author, body="reply", parent=parent)
+                for parent in parents
+            )
+            for comment, parent in zip(batch, parents):
+                comment.path = parent.path + Comment.path_segment(comment.pk)
+            Comment.objects.bulk_update(batch, ["path"])
+            created.extend(c for c in batch if len(c.path) < Comment.PATH_STEP * Comment.PATH_MAX_DEPTH)
+
+    def _recursive(self, post, root=None):
+        level = [root] if root else list(Comment.objects.filter(post=post, parent__isnull=True))
+        result = list(level)
+        stack = list(level)
+        while stack:
+            node = stack.pop()
+            children = list(node.replies.all())
+            result.extend(children)
+            stack.extend(children)
+        return result
+
+    def _by_path(self, post):
+        return build_tree(list(Comment.objects.filter(post=post).order_by("path")))
+
+    def _measure(self, func, repeat):
+        best = None
+        queries = 0
+        for _ in range(repeat):
+            counter = _QueryCounter()
+            with connection.execute_wrapper(counter):
+                started = time.perf_counter()
+                func()
+                elapsed = (time.perf_counter() - started) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+            queries = counter.count
+        return best, queries
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
@@ -0,0 +1,105 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from hub.models import Post
+from hub.search import get_backend, search_posts
+
+User = get_user_model()
+
+WORDS = (
+    "python django бот телеграм парсер api база данных поиск лента проект "
+    "скрипт гайд docker postgres redis очередь кэш шаблон форма модель"
+).split()
+
+# Редкие слова: у каждого ровно NEEDLE_MATCHES постов при любом размере ленты
+NEEDLES = ["ёжик", "криптограф", "микросервис", "kubernetes", "асинхронность"]
+NEEDLE_MATCHES = 30
+
+
+def _p50(timings):
+    return statistics.median(timings)
+
+
+def _p95(timings):
+    return statistics.quantiles(timings, n=20)[-1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Бенчмарк поиска по ленте: наполняет БД синтетическими постами "
+        "(в транзакции, которая откатывается) и меряет время первой страницы выдачи. "
+        "Редкие запросы (фиксированное число совпадений) должны держаться на одном уровне "
+        "при росте ленты; частые показаны для сравнения — их стоимость растёт с числом совпадений."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="1000,10000,100000,500000")
+        parser.add_argument("--queries", type=int, default=50)
+        parser.add_argument("--page-size", type=int, default=20)
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(x) for x in options["sizes"].split(","))
+        rnd = random.Random(42)
+
+        with transaction.atomic():
+            author = User.objects.create(username=f"bench-{time.time_ns()}")
+            backend = get_backend()
+            created = self._plant_needles(author)
+
+            self.stdout.write(
+                f"{'posts':>10} {'rare p50':>10} {'rare p95':>10} {'common p50':>11} {'common p95':>11}"
+            )
+            for size in sizes:
+                created = self._fill(author, rnd, created, size, options["batch_size"])
+                backend.rebuild()
+                rare = self._measure(
+                    lambda: rnd.choice(NEEDLES).upper(), options["queries"], options["page_size"]
+                )
+                common = self._measure(
+                    lambda: " ".join(rnd.sample(WORDS, 2)), options["queries"], options["page_size"]
+                )
+                self.stdout.write(
+                    f"{size:>10} {_p50(rare):>10.2f} {_p95(rare):>10.2f} "
+                    f"{_p50(common):>11.2f} {_p95(common):>11.2f}"
+                )
+
+            transaction.set_rollback(True)
+
+    def _plant_needles(self, author):
+        posts = [
+            Post(author=author, title=f"{needle} {i}", body=f"Пост про {needle}")
+            for needle in NEEDLES
+            for i in range(NEEDLE_MATCHES)
+        ]
+        Post.objects.bulk_create(posts)
+        return len(posts)
+
+    def _fill(self, author, rnd, created, target, batch_size):
+        while created < target:
+            count = min(batch_size, target - created)
+            Post.objects.bulk_create(
+                Post(
+                    author=author,
+                    title=" ".join(rnd.choices(WORDS, k=4)),
+                    body=" ".join(rnd.choices(WORDS, k=40)),
+                )
+                for _ in range(count)
+            )
+            created += count
+        return created
+
+    def _measure(self, make_query, queries, page_size):
+        base = Post.objects.select_related("author", "author__profile")
+        timings = []
+        for _ in range(queries):
+            query = make_query()
+            started = time.perf_counter()
+            list(search_posts(base, query)[:page_size])
+            timings.append((time.perf_counter() - started) * 1000)
+        return timings
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from hub.search import REBUILD_BATCH_SIZE, get_backend
+
+
+class Command(BaseCommand):
+    help = "Полностью перестраивает поисковый индекс постов ленты."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=REBUILD_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        backend.install()
+        total = backend.rebuild(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Проиндексировано постов: {total}"))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+
+from hub.models import Post
+from hub.services import reconcile_comment_counts, reconcile_reaction_counts
+
+RECONCILERS = {
+    "reactions": reconcile_reaction_counts,
+    "comments": reconcile_comment_counts,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Сверяет денормализованные счётчики постов (лайки / дизлайки / комментарии) "
+        "с реальными данными. Работает диапазонами id, чтобы не держать блокировку "
+        "на всей таблице."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--only",
+            choices=sorted(RECONCILERS),
+            help="Пересчитать только одну группу счётчиков",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        names = [options["only"]] if options["only"] else list(RECONCILERS)
+        max_id = Post.objects.aggregate(max_id=Max("id"))["max_id"] or 0
+
+        updated = dict.fromkeys(names, 0)
+        for start in range(0, max_id, batch_size):
+            batch = Post.objects.filter(id__gt=start, id__lte=start + batch_size)
+            for name in names:
+                updated[name] += RECONCILERS[name](batch)
+
+        for name in names:
+            self.stdout.write(self.style.SUCCESS(f"Пересчитано постов ({name}): {updated[name]}"))
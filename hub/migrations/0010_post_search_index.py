@@ -0,0 +1,29 @@
+# Поисковый индекс постов: tsvector + GIN на PostgreSQL, FTS5 на SQLite.
+
+from django.db import migrations
+
+
+def install_search_index(apps, schema_editor):
+    from hub.search import get_backend
+
+    backend = get_backend(schema_editor.connection)
+    backend.install()
+    backend.rebuild()
+
+
+def uninstall_search_index(apps, schema_editor):
+    from hub.search import get_backend
+
+    get_backend(schema_editor.connection).uninstall()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hub', '0009_project_attachment'),
+        ('archive', '0004_profile_avatar_url_alter_profile_user'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.0.14 on 2026-10-18 02:17
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_reaction_counts(apps, schema_editor):
+    Post = apps.get_model('hub', 'Post')
+    PostLike = apps.get_model('hub', 'PostLike')
+
+    def count_of(value):
+        return Coalesce(
+            Subquery(
+                PostLike.objects.filter(post=OuterRef('pk'), value=value)
+                .order_by()
+                .values('post')
+                .annotate(total=Count('pk'))
+                .values('total')[:1]
+            ),
+            Value(0),
+        )
+
+    Post.objects.update(likes_count=count_of(1), dislikes_count=count_of(-1))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hub', '0010_post_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='dislikes_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_reaction_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# comments_count раньше никто не обновлял — заполняем по реальным данным.
+
+from django.db import migrations
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_comments_count(apps, schema_editor):
+    Post = apps.get_model('hub', 'Post')
+    Comment = apps.get_model('hub', 'Comment')
+
+    Post.objects.update(
+        comments_count=Coalesce(
+            Subquery(
+                Comment.objects.filter(post=OuterRef('pk'))
+                .order_by()
+                .values('post')
+                .annotate(total=Count('pk'))
+                .values('total')[:1]
+            ),
+            Value(0),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hub', '0011_post_dislikes_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_comments_count, migrations.RunPython.noop),
+    ]
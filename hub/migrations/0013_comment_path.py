@@ -0,0 +1,70 @@
+# Generated by Django 5.0.14 on 2026-10-18 02:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+PATH_STEP = 10
+PATH_MAX_DEPTH = 50
+
+
+def backfill_comment_paths(apps, schema_editor):
+    """
+    Заполняет path уровнями: сначала корни, затем ответы тех, у кого путь уже есть.
+    Каждая пачка — отдельный bulk_update (миграция не атомарна), чтобы не держать
+    долгую блокировку на больших таблицах.
+    """
+    Comment = apps.get_model('hub', 'Comment')
+    max_parent_length = PATH_STEP * (PATH_MAX_DEPTH - 1)
+
+    while True:
+        batch = list(
+            Comment.objects.filter(path='', parent__isnull=True)
+            .order_by('pk')
+            .only('pk')[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        for comment in batch:
+            comment.path = str(comment.pk).zfill(PATH_STEP)
+        Comment.objects.bulk_update(batch, ['path'])
+
+    while True:
+        rows = list(
+            Comment.objects.filter(path='')
+            .exclude(parent__path='')
+            .order_by('pk')
+            .values_list('pk', 'parent_id', 'parent__path')[:BATCH_SIZE]
+        )
+        if not rows:
+            break
+        batch = []
+        for pk, parent_id, parent_path in rows:
+            # старые ветки глубже PATH_MAX_DEPTH: parent_id не трогаем,
+            # обрезается только путь (ответ остаётся в диапазоне предка)
+            parent_path = parent_path[:max_parent_length]
+            batch.append(Comment(pk=pk, path=parent_path + str(pk).zfill(PATH_STEP)))
+        Comment.objects.bulk_update(batch, ['path'])
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('hub', '0012_backfill_post_comments_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(blank=True, default='', editable=False, max_length=500),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'path'], name='hub_comment_post_path_idx'),
+        ),
+        migrations.RunPython(backfill_comment_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.0.14 on 2026-10-18 02:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hub', '0013_comment_path'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-created_at', '-id'], name='hub_post_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['-created_at', '-id'], name='hub_project_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='projectpost',
+            index=models.Index(fields=['-created_at', '-id'], name='hub_projectpost_created_id_idx'),
+        ),
+    ]
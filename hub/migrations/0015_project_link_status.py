@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-18 02:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hub', '0014_feed_cursor_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='link_status',
+            field=models.CharField(choices=[('unknown', 'Не проверялась'), ('ok', 'Работает'), ('broken', 'Битая'), ('error', 'Недоступна')], db_index=True, default='unknown', max_length=10),
+        ),
+    ]
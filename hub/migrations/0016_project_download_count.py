@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-18 02:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hub', '0015_project_link_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='download_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.0.14 on 2026-10-18 03:39
+
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+OLD_STEP = 10
+NEW_STEP = 19
+
+
+def _repad(apps, old_step, new_step):
+    """
+    Переписывает каждый сегмент пути под новую ширину. Порядок путей
+    сохраняется: сегменты по-прежнему одной ширины.
+    """
+    Comment = apps.get_model('hub', 'Comment')
+    last_pk = 0
+    while True:
+        batch = list(
+            Comment.objects.filter(pk__gt=last_pk)
+            .exclude(path='')
+            .order_by('pk')
+            .only('pk', 'path')[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        for comment in batch:
+            segments = [
+                comment.path[i:i + old_step] for i in range(0, len(comment.path), old_step)
+            ]
+            comment.path = ''.join(str(int(segment)).zfill(new_step) for segment in segments)
+        Comment.objects.bulk_update(batch, ['path'])
+        last_pk = batch[-1].pk
+
+
+def widen_paths(apps, schema_editor):
+    _repad(apps, OLD_STEP, NEW_STEP)
+
+
+def narrow_paths(apps, schema_editor):
+    _repad(apps, NEW_STEP, OLD_STEP)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hub', '0016_project_download_count'),
+    ]
+
+    operations = [
+        # поле сначала расширяется, при откате — сужается уже после перезаписи
+        migrations.AlterField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(blank=True, default='', editable=False, max_length=950),
+        ),
+        migrations.RunPython(widen_paths, narrow_paths),
+    ]
@@ -2,7 +2,9 @@
 from django.conf import settings
 from django.db import models
 from django.urls import reverse
-from django.utils.text import slugify
+from archive.slugs import save_with_slug, unique_slug
+
+from archive.models import LinkStatus
 
 
 # Базовые справочники (дублируют archive-модели, но в пространстве hub)
@@ -147,7 +149,13 @@ class Project(models.Model):
     short_description = models.TextField(blank=True)
     readme = models.TextField(blank=True)
     github_url = models.URLField(blank=True)
+    # статус github_url по данным manage.py check_links
+    link_status = models.CharField(
+        max_length=10, choices=LinkStatus.choices, default=LinkStatus.UNKNOWN, db_index=True
+    )
     attachment = models.FileField(upload_to="project_files/", blank=True, null=True)
+    # пишется пачками из archive/downloads.py (DownloadCounter)
+    download_count = models.PositiveIntegerField(default=0, editable=False)
     visibility = models.CharField(max_length=20, choices=VISIBILITY_CHOICES, default=PUBLIC)
     tags = models.ManyToManyField(Tag, related_name="projects", blank=True)
     related_materials = models.ManyToManyField(Resource, related_name="projects", blank=True)
@@ -156,20 +164,22 @@ class Project(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # курсорная пагинация по (created_at, id), см. hub/pagination.py
+            models.Index(fields=["-created_at", "-id"], name="hub_project_created_id_idx"),
+        ]
 
     def __str__(self) -> str:
         return self.title
 
     def generate_unique_slug(self):
-        base = slugify(self.title)[:170] or "project"
-        slug_candidate = base
-        counter = 1
-        while Project.objects.filter(slug=slug_candidate).exclude(pk=self.pk).exists():
-            slug_candidate = f"{base}-{counter}"
-            counter += 1
-        self.slug = slug_candidate
+        self.slug = unique_slug(Project, self.title, "project", exclude_pk=self.pk)
         return self.slug
 
+    def save_with_unique_slug(self, text=None):
+        """Сохраняет проект с уникальным slug-ом от text (по умолчанию — от названия)."""
+        return save_with_slug(self, text or self.title, "project")
+
     def get_absolute_url(self):
         return reverse("project_detail", args=[self.slug])
 
@@ -183,6 +193,9 @@ class ProjectPost(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="hub_projectpost_created_id_idx"),
+        ]
 
     def __str__(self) -> str:
         return self.title
@@ -214,11 +227,15 @@ class Post(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     likes_count = models.PositiveIntegerField(default=0)
+    dislikes_count = models.PositiveIntegerField(default=0)
     comments_count = models.PositiveIntegerField(default=0)
     tags = models.ManyToManyField(Tag, related_name="posts", blank=True)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="hub_post_created_id_idx"),
+        ]
 
     def __str__(self) -> str:
         return self.title
@@ -239,14 +256,25 @@ class Post(models.Model):
             pass
         return self.author.username
 
+    def _prefetched(self, name):
+        return getattr(self, "_prefetched_objects_cache", {}).get(name)
+
     @property
     def dislike_count(self):
-        # Считаем количество дизлайков по реакциям
-        return self.reactions.filter(value=PostLike.DISLIKE).count()
+        # Если реакции уже подтянуты prefetch_related — считаем в памяти,
+        # иначе берём денормализованный счётчик (см. hub.services.toggle_reaction)
+        reactions = self._prefetched("reactions")
+        if reactions is not None:
+            return sum(1 for r in reactions if r.value == PostLike.DISLIKE)
+        return self.dislikes_count
 
     @property
     def comment_count(self):
-        return self.comments.count()
+        # comments_count: +1 в hub.services.create_comment, -N в delete_comment
+        comments = self._prefetched("comments")
+        if comments is not None:
+            return len(comments)
+        return self.comments_count
 
 
 class PostLike(models.Model):
@@ -270,6 +298,15 @@ class PostLike(models.Model):
 
 
 class Comment(models.Model):
+    # Материализованный путь: id всех предков и самого комментария,
+    # каждый дополнен нулями до PATH_STEP цифр ("000…012" + "000…045").
+    # Только цифры фиксированной ширины — порядок строк совпадает с порядком
+    # в дереве при любой collation БД, а поддерево — это диапазон [path, next_path).
+    # 19 цифр — максимум BigAutoField (2**63 - 1), шире id не бывает.
+    # Ответ глубже PATH_MAX_DEPTH отклоняет hub.services.create_comment.
+    PATH_STEP = 19
+    PATH_MAX_DEPTH = 50
+
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="comments")
     author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="hub_comments")
     body = models.TextField()
@@ -281,9 +318,47 @@ class Comment(models.Model):
         related_name="replies",
         on_delete=models.CASCADE,
     )
+    path = models.CharField(max_length=PATH_STEP * PATH_MAX_DEPTH, blank=True, default="", editable=False)
 
     class Meta:
         ordering = ["created_at"]
+        indexes = [
+            models.Index(fields=["post", "path"], name="hub_comment_post_path_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"Comment by {self.author} on {self.post}"
+
+    @classmethod
+    def path_segment(cls, pk):
+        return str(pk).zfill(cls.PATH_STEP)
+
+    @classmethod
+    def next_path(cls, path):
+        """Первый путь, который уже не входит в поддерево path."""
+        return path[: -cls.PATH_STEP] + cls.path_segment(int(path[-cls.PATH_STEP:]) + 1)
+
+    @property
+    def path_depth(self):
+        return max(len(self.path) // self.PATH_STEP - 1, 0)
+
+    @property
+    def accepts_replies(self):
+        """Путь ответа ещё помещается в PATH_MAX_DEPTH уровней."""
+        return len(self.path) < self.PATH_STEP * self.PATH_MAX_DEPTH
+
+    def descendants(self):
+        """Все ответы любой вложенности — один диапазонный проход по индексу (post, path)."""
+        return Comment.objects.filter(
+            post_id=self.post_id,
+            path__gt=self.path,
+            path__lt=self.next_path(self.path),
+        )
+
+    def subtree(self):
+        """Комментарий вместе с ответами, в порядке дерева."""
+        return Comment.objects.filter(
+            post_id=self.post_id,
+            path__gte=self.path,
+            path__lt=self.next_path(self.path),
+        ).order_by("path")
@@ -0,0 +1,254 @@
+# hub/pagination.py
+"""
+Курсорная (keyset) пагинация лент по (created_at, id).
+
+Вместо OFFSET n следующая страница начинается «после» последней записи
+текущей: WHERE created_at <= v AND (created_at < v OR id < pk). На индексе
+(created_at, id) это константная стоимость на любой глубине прокрутки,
+и COUNT(*) по всей таблице больше не нужен.
+
+Курсор — подписанный токен (django.core.signing), поэтому его нельзя
+подделать и клиенту не видна внутренняя структура.
+"""
+import math
+from datetime import datetime
+
+from django.core import signing
+from django.db import connections
+from django.db.models import Q
+
+CURSOR_SALT = "hub.pagination.cursor"
+
+# Сколько строк максимум считать в режиме «примерного» количества
+APPROXIMATE_COUNT_CAP = 1000
+
+NEXT = "n"
+PREVIOUS = "p"
+
+
+def approximate_count(queryset, cap=None):
+    """
+    Возвращает (count, is_estimate).
+
+    На PostgreSQL для нефильтрованной таблицы берём оценку планировщика
+    из pg_class.reltuples; иначе считаем не дальше cap строк
+    (по умолчанию APPROXIMATE_COUNT_CAP).
+    """
+    if cap is None:
+        cap = APPROXIMATE_COUNT_CAP
+    connection = connections[queryset.db]
+    if connection.vendor == "postgresql" and not queryset.query.where:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        if row and row[0] > 0:
+            return row[0], True
+
+    count = queryset.order_by()[: cap + 1].count()
+    if count > cap:
+        return cap, True
+    return count, False
+
+
+class CursorPaginator:
+    def __init__(self, queryset, per_page, field="created_at", count_mode=None):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.field = field
+        self.count_mode = count_mode  # None | "exact" | "approximate"
+        self._count = None
+        self._count_is_estimate = False
+
+    # --- количество (необязательно) ---
+    def _load_count(self):
+        if self._count is None:
+            if self.count_mode == "exact":
+                self._count = self.queryset.count()
+            elif self.count_mode == "approximate":
+                self._count, self._count_is_estimate = approximate_count(self.queryset)
+        return self._count
+
+    @property
+    def count(self):
+        return self._load_count()
+
+    @property
+    def count_is_estimate(self):
+        # шаблоны читают флаг раньше num_pages — количество грузим здесь же
+        self._load_count()
+        return self._count_is_estimate
+
+    @property
+    def num_pages(self):
+        count = self._load_count()
+        if count is None:
+            return None
+        return max(math.ceil(count / self.per_page), 1)
+
+    # --- курсоры ---
+    def encode_cursor(self, obj, direction, number):
+        value = getattr(obj, self.field)
+        return signing.dumps(
+            {"v": value.isoformat(), "i": obj.pk, "d": direction, "n": number},
+            salt=CURSOR_SALT,
+            compress=True,
+        )
+
+    def decode_cursor(self, token):
+        if not token:
+            return None
+        try:
+            data = signing.loads(token, salt=CURSOR_SALT)
+            return datetime.fromisoformat(data["v"]), int(data["i"]), data["d"], int(data["n"])
+        except (signing.BadSignature, KeyError, TypeError, ValueError):
+            return None
+
+    # --- страница ---
+    def page(self, token=None):
+        cursor = self.decode_cursor(token)
+        field = self.field
+        qs = self.queryset
+
+        if cursor is None:
+            rows = list(qs.order_by(f"-{field}", "-pk")[: self.per_page + 1])
+            has_next = len(rows) > self.per_page
+            return CursorPage(rows[: self.per_page], 1, self, has_next=has_next, has_previous=False)
+
+        value, pk, direction, number = cursor
+        if direction == PREVIOUS:
+            # страница «до» курсора: идём по возрастанию и разворачиваем
+            rows = list(
+                qs.filter(Q(**{f"{field}__gte": value}))
+                .filter(Q(**{f"{field}__gt": value}) | Q(pk__gt=pk))
+                .order_by(field, "pk")[: self.per_page + 1]
+            )
+            has_previous = len(rows) > self.per_page
+            rows = list(reversed(rows[: self.per_page]))
+            return CursorPage(
+                rows, max(number, 1), self, has_next=True, has_previous=has_previous and number > 1
+            )
+
+        # WHERE created_at <= v отсекает начало по индексу, OR уточняет равные значения
+        rows = list(
+            qs.filter(Q(**{f"{field}__lte": value}))
+            .filter(Q(**{f"{field}__lt": value}) | Q(pk__lt=pk))
+            .order_by(f"-{field}", "-pk")[: self.per_page + 1]
+        )
+        has_next = len(rows) > self.per_page
+        return CursorPage(rows[: self.per_page], number, self, has_next=has_next, has_previous=True)
+
+
+class CursorPage:
+    """Совместим с django.core.paginator.Page в той части, что используют шаблоны."""
+
+    def __init__(self, object_list, number, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.number = number
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f"<CursorPage {self.number}>"
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    def next_page_number(self):
+        return self.number + 1
+
+    def previous_page_number(self):
+        return self.number - 1
+
+    @property
+    def next_cursor(self):
+        if not self._has_next or not self.object_list:
+            return None
+        return self.paginator.encode_cursor(self.object_list[-1], NEXT, self.number + 1)
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous or not self.object_list:
+            return None
+        return self.paginator.encode_cursor(self.object_list[0], PREVIOUS, self.number - 1)
+
+
+class CursorPaginationMixin:
+    """
+    Подмешивается к ListView: пагинация курсором вместо OFFSET.
+
+    В контекст дополнительно попадают next_page_query / previous_page_query —
+    готовые query string (с сохранением остальных GET-параметров), так что
+    шаблону не важно, курсорная страница или обычная (offset-фолбэк).
+    """
+
+    cursor_field = "created_at"
+    cursor_kwarg = "cursor"
+    paginate_count = None  # None | "exact" | "approximate"
+
+    def use_cursor_pagination(self, queryset):
+        return True
+
+    def paginate_queryset(self, queryset, page_size):
+        if not self.use_cursor_pagination(queryset):
+            self._cursor_mode = False
+            return super().paginate_queryset(queryset, page_size)
+
+        self._cursor_mode = True
+        paginator = CursorPaginator(
+            queryset, page_size, field=self.cursor_field, count_mode=self.paginate_count
+        )
+        page = paginator.page(self.request.GET.get(self.cursor_kwarg))
+        return paginator, page, page.object_list, page.has_other_pages()
+
+    def _page_query(self, **params):
+        query = self.request.GET.copy()
+        query.pop(self.page_kwarg, None)
+        query.pop(self.cursor_kwarg, None)
+        for key, value in params.items():
+            query[key] = value
+        return query.urlencode()
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        page = ctx.get("page_obj")
+        ctx["next_page_query"] = None
+        ctx["previous_page_query"] = None
+        if page is None:
+            return ctx
+
+        if getattr(self, "_cursor_mode", False):
+            if page.next_cursor:
+                ctx["next_page_query"] = self._page_query(**{self.cursor_kwarg: page.next_cursor})
+            if page.previous_cursor:
+                ctx["previous_page_query"] = self._page_query(
+                    **{self.cursor_kwarg: page.previous_cursor}
+                )
+        else:
+            if page.has_next():
+                ctx["next_page_query"] = self._page_query(
+                    **{self.page_kwarg: page.next_page_number()}
+                )
+            if page.has_previous():
+                ctx["previous_page_query"] = self._page_query(
+                    **{self.page_kwarg: page.previous_page_number()}
+                )
+        return ctx
@@ -0,0 +1,322 @@
+# hub/search.py
+"""
+Полнотекстовый поиск по постам ленты.
+
+Индекс живёт в отдельной «теневой» таблице и поддерживается сигналами
+(см. hub/signals.py):
+- PostgreSQL (DATABASE_URL задан) — таблица hub_post_search с tsvector + GIN,
+  документ строится русской и английской конфигурациями;
+- SQLite (локально) — виртуальная таблица FTS5 hub_post_fts, rowid = id поста.
+
+Текст перед индексацией и запрос перед поиском проходят через normalize():
+casefold + ё→е, поэтому кириллица ищется без учёта регистра на любой БД.
+"""
+import re
+
+from django.db import connection as default_connection
+from django.db.models import FloatField
+from django.db.models.expressions import RawSQL
+
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+# Сколько постов переиндексировать за один INSERT при полной перестройке
+REBUILD_BATCH_SIZE = 1000
+
+# Веса полей: заголовок важнее автора, автор важнее текста
+TITLE_WEIGHT = 10.0
+BODY_WEIGHT = 1.0
+AUTHOR_WEIGHT = 5.0
+
+
+def normalize(text):
+    """Приводит текст к виду, в котором он лежит в индексе."""
+    return (text or "").casefold().replace("ё", "е")
+
+
+def _author_text(username, nickname):
+    return normalize(" ".join(x for x in (nickname, username) if x))
+
+
+class BaseSearchBackend:
+    """Общий интерфейс поискового индекса."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    # --- схема ---
+    def install(self):
+        raise NotImplementedError
+
+    def uninstall(self):
+        raise NotImplementedError
+
+    # --- запись ---
+    def index_rows(self, rows):
+        """rows: iterable из (post_id, title, body, username, nickname)."""
+        raise NotImplementedError
+
+    def delete(self, post_ids):
+        raise NotImplementedError
+
+    # --- чтение ---
+    def matching_ids_sql(self, query):
+        """(sql, params): id постов, подходящих под запрос, — для pk__in=RawSQL(...)."""
+        raise NotImplementedError
+
+    def rank_sql(self, query):
+        """
+        (sql, params): релевантность поста hub_post.id (больше — лучше).
+        Коррелированный подзапрос по ключу индекса — по строке на найденный пост.
+        """
+        raise NotImplementedError
+
+    # --- общее ---
+    def rebuild(self, batch_size=REBUILD_BATCH_SIZE):
+        """Полностью перестраивает индекс батчами, не поднимая модели в память."""
+        with self.connection.cursor() as cursor:
+            self.clear(cursor)
+            last_id = 0
+            total = 0
+            while True:
+                cursor.execute(
+                    """
+                    SELECT p.id, p.title, p.body, u.username, pr.nickname
+                    FROM hub_post p
+                    JOIN auth_user u ON u.id = p.author_id
+                    LEFT JOIN archive_profile pr ON pr.user_id = u.id
+                    WHERE p.id > %s
+                    ORDER BY p.id
+                    LIMIT %s
+                    """,
+                    [last_id, batch_size],
+                )
+                rows = cursor.fetchall()
+                if not rows:
+                    break
+                self.index_rows(rows)
+                last_id = rows[-1][0]
+                total += len(rows)
+        return total
+
+    def clear(self, cursor):
+        raise NotImplementedError
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    table = "hub_post_search"
+    configs = ("russian", "english")
+
+    def _vector_sql(self, weight):
+        parts = [f"to_tsvector('{config}', %s)" for config in self.configs]
+        return f"setweight({' || '.join(parts)}, '{weight}')"
+
+    def _query_sql(self):
+        parts = [f"websearch_to_tsquery('{config}', %s)" for config in self.configs]
+        return "(" + " || ".join(parts) + ")"
+
+    def install(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS {self.table} (
+                    post_id bigint PRIMARY KEY REFERENCES hub_post (id) ON DELETE CASCADE,
+                    document tsvector NOT NULL
+                )
+                """
+            )
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {self.table}_document_gin "
+                f"ON {self.table} USING gin (document)"
+            )
+
+    def uninstall(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {self.table}")
+
+    def clear(self, cursor):
+        cursor.execute(f"TRUNCATE {self.table}")
+
+    def index_rows(self, rows):
+        document = " || ".join(
+            [self._vector_sql("A"), self._vector_sql("B"), self._vector_sql("C")]
+        )
+        sql = (
+            f"INSERT INTO {self.table} (post_id, document) VALUES (%s, {document}) "
+            f"ON CONFLICT (post_id) DO UPDATE SET document = EXCLUDED.document"
+        )
+        params = []
+        for post_id, title, body, username, nickname in rows:
+            fields = (normalize(title), normalize(body), _author_text(username, nickname))
+            row_params = [post_id]
+            for value in fields:
+                row_params.extend([value] * len(self.configs))
+            params.append(row_params)
+        if params:
+            with self.connection.cursor() as cursor:
+                cursor.executemany(sql, params)
+
+    def delete(self, post_ids):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {self.table} WHERE post_id = ANY(%s)", [list(post_ids)]
+            )
+
+    def _params(self, query):
+        return [normalize(query)] * len(self.configs)
+
+    def matching_ids_sql(self, query):
+        # GIN-индекс по document
+        return (
+            f"SELECT post_id FROM {self.table} WHERE document @@ {self._query_sql()}",
+            self._params(query),
+        )
+
+    def rank_sql(self, query):
+        # веса ts_rank задаются массивом {D, C, B, A}
+        weights = (
+            f"'{{{BODY_WEIGHT / TITLE_WEIGHT}, {AUTHOR_WEIGHT / TITLE_WEIGHT}, "
+            f"{BODY_WEIGHT / TITLE_WEIGHT}, 1.0}}'"
+        )
+        return (
+            f"SELECT ts_rank({weights}, s.document, {self._query_sql()}) "
+            f"FROM {self.table} s WHERE s.post_id = hub_post.id",
+            self._params(query),
+        )
+
+
+class SQLiteSearchBackend(BaseSearchBackend):
+    table = "hub_post_fts"
+
+    @staticmethod
+    def match_expression(query):
+        """
+        Превращает пользовательский ввод в безопасное FTS5-выражение:
+        каждое слово — префиксный терм в кавычках, слова объединяются через AND.
+        """
+        words = WORD_RE.findall(normalize(query))
+        return " ".join(f'"{word}"*' for word in words)
+
+    def install(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} "
+                f"USING fts5(title, body, author, tokenize = 'unicode61 remove_diacritics 2')"
+            )
+
+    def uninstall(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {self.table}")
+
+    def clear(self, cursor):
+        cursor.execute(f"DELETE FROM {self.table}")
+
+    def index_rows(self, rows):
+        rows = list(rows)
+        if not rows:
+            return
+        # У FTS5 нет UPSERT — удаляем и вставляем заново
+        self.delete([row[0] for row in rows])
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {self.table} (rowid, title, body, author) VALUES (%s, %s, %s, %s)",
+                [
+                    (post_id, normalize(title), normalize(body), _author_text(username, nickname))
+                    for post_id, title, body, username, nickname in rows
+                ],
+            )
+
+    def delete(self, post_ids):
+        post_ids = list(post_ids)
+        if not post_ids:
+            return
+        placeholders = ", ".join(["%s"] * len(post_ids))
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {self.table} WHERE rowid IN ({placeholders})", post_ids
+            )
+
+    def matching_ids_sql(self, query):
+        return (
+            f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s",
+            [self.match_expression(query)],
+        )
+
+    def rank_sql(self, query):
+        # bm25() считается только внутри MATCH; rowid = ... FTS5 ищет по
+        # doclist-ам сразу нужной строки. bm25() меньше — лучше, меняем знак
+        return (
+            f"SELECT -bm25({self.table}, {TITLE_WEIGHT}, {BODY_WEIGHT}, {AUTHOR_WEIGHT}) "
+            f"FROM {self.table} WHERE {self.table} MATCH %s AND rowid = hub_post.id",
+            [self.match_expression(query)],
+        )
+
+
+BACKENDS = {
+    "postgresql": PostgresSearchBackend,
+    "sqlite": SQLiteSearchBackend,
+}
+
+
+def get_backend(connection=None):
+    connection = connection or default_connection
+    try:
+        return BACKENDS[connection.vendor](connection)
+    except KeyError:
+        raise NotImplementedError(f"Поиск не поддерживается для БД {connection.vendor}")
+
+
+# =========================
+# API для views / сигналов
+# =========================
+def index_posts(posts):
+    """Переиндексирует переданные посты (нужны author и author.profile)."""
+    rows = []
+    for post in posts:
+        profile = getattr(post.author, "profile", None)
+        rows.append(
+            (
+                post.pk,
+                post.title,
+                post.body,
+                post.author.username,
+                getattr(profile, "nickname", ""),
+            )
+        )
+    get_backend().index_rows(rows)
+
+
+def index_author_posts(user_id):
+    """Переиндексирует все посты автора (после смены ника / username)."""
+    from .models import Post
+
+    qs = Post.objects.filter(author_id=user_id).select_related("author", "author__profile")
+    batch = []
+    for post in qs.iterator(chunk_size=REBUILD_BATCH_SIZE):
+        batch.append(post)
+        if len(batch) >= REBUILD_BATCH_SIZE:
+            index_posts(batch)
+            batch = []
+    if batch:
+        index_posts(batch)
+
+
+def remove_posts(post_ids):
+    get_backend().delete(post_ids)
+
+
+def search_posts(queryset, query):
+    """
+    Фильтрует queryset постов по запросу и сортирует по релевантности.
+    Пагинация остаётся на стороне БД (LIMIT/OFFSET поверх результата).
+    """
+    if not WORD_RE.search(normalize(query)):
+        return queryset.none()
+
+    backend = get_backend()
+    # фильтр — один проход по индексу (IN по id), ранг — подзапрос по
+    # ключу индекса только для найденных постов
+    return (
+        queryset.filter(pk__in=RawSQL(*backend.matching_ids_sql(query)))
+        .annotate(search_rank=RawSQL(*backend.rank_sql(query), output_field=FloatField()))
+        .order_by("-search_rank", "-created_at")
+    )
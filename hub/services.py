@@ -0,0 +1,150 @@
+# hub/services.py
+"""
+Операции записи, которые помимо самой строки обновляют денормализованные
+счётчики поста. Вьюхи не должны трогать счётчики напрямую — только через
+эти функции, иначе цифры в ленте разъедутся с реальными данными.
+
+Комментарии удаляются только через delete_comment: сигнала post_delete
+на Comment нет (он стоил бы UPDATE на каждую строку и отключал бы
+быстрое удаление). Каскад от пользователя или прямой .delete() счётчик
+не трогают — его выравнивает manage.py reconcile_post_counters.
+"""
+from collections import Counter
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Comment, Post, PostLike
+
+REACTION_COUNTERS = {
+    PostLike.LIKE: "likes_count",
+    PostLike.DISLIKE: "dislikes_count",
+}
+
+
+def _apply_counter_deltas(post_id, deltas):
+    """Один UPDATE с F()-дельтами только по изменившимся счётчикам."""
+    updates = {
+        field: Greatest(F(field) + Value(delta), Value(0))
+        for field, delta in deltas.items()
+        if delta
+    }
+    if updates:
+        Post.objects.filter(pk=post_id).update(**updates)
+
+
+def toggle_reaction(post, user, value):
+    """
+    Ставит реакцию пользователя на пост.
+
+    - реакции не было → создаём, +1 к нужному счётчику;
+    - та же реакция → снимаем её, -1;
+    - противоположная → переключаем, +1 / -1 одним UPDATE.
+
+    Возвращает итоговое значение реакции или None, если реакция снята.
+    """
+    counter = REACTION_COUNTERS[value]
+    deltas = {}
+
+    with transaction.atomic():
+        reaction = (
+            PostLike.objects.select_for_update()
+            .filter(post=post, user=user)
+            .first()
+        )
+        if reaction is None:
+            try:
+                with transaction.atomic():
+                    PostLike.objects.create(post=post, user=user, value=value)
+            except IntegrityError:
+                # параллельный клик успел вставить строку — считаем, что реакция уже стоит
+                return value
+            deltas[counter] = 1
+            result = value
+        elif reaction.value == value:
+            reaction.delete()
+            deltas[counter] = -1
+            result = None
+        else:
+            deltas[REACTION_COUNTERS[reaction.value]] = -1
+            deltas[counter] = 1
+            reaction.value = value
+            reaction.save(update_fields=["value"])
+            result = value
+
+        _apply_counter_deltas(post.pk, deltas)
+
+    return result
+
+
+# =========================
+# Комментарии
+# =========================
+def create_comment(comment):
+    """
+    Сохраняет новый комментарий (post / author / body уже заполнены)
+    и в той же транзакции увеличивает post.comments_count.
+    Ответ на комментарий глубины PATH_MAX_DEPTH — ValidationError.
+    """
+    if comment.parent_id is not None and not comment.parent.accepts_replies:
+        raise ValidationError(
+            f"Ветка слишком глубокая: не больше {Comment.PATH_MAX_DEPTH} уровней ответов."
+        )
+    with transaction.atomic():
+        comment.save()
+        _apply_counter_deltas(comment.post_id, {"comments_count": 1})
+    return comment
+
+
+def delete_comment(comment):
+    """
+    Удаляет комментарий вместе с ветками ответов (CASCADE по parent)
+    и уменьшает comments_count одним UPDATE на пост, а не на строку.
+    """
+    with transaction.atomic():
+        # поддерево — один диапазонный проход по материализованному пути
+        rows = list(comment.subtree().values_list("pk", "post_id"))
+        Comment.objects.filter(pk__in=[pk for pk, _ in rows]).delete()
+        for post_id, deleted in Counter(post_id for _, post_id in rows).items():
+            _apply_counter_deltas(post_id, {"comments_count": -deleted})
+    return len(rows)
+
+
+# =========================
+# Сверка счётчиков
+# =========================
+def _count_subquery(model, **filters):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(post=OuterRef("pk"), **filters)
+            .order_by()
+            .values("post")
+            .annotate(total=Count("pk"))
+            .values("total")[:1]
+        ),
+        Value(0),
+    )
+
+
+def _reaction_count_subquery(value):
+    return _count_subquery(PostLike, value=value)
+
+
+def reconcile_reaction_counts(queryset=None):
+    """
+    Пересчитывает likes_count / dislikes_count одним UPDATE ... SET = (подзапрос)
+    для переданного набора постов. Возвращает число обновлённых строк.
+    """
+    queryset = Post.objects.all() if queryset is None else queryset
+    return queryset.update(
+        likes_count=_reaction_count_subquery(PostLike.LIKE),
+        dislikes_count=_reaction_count_subquery(PostLike.DISLIKE),
+    )
+
+
+def reconcile_comment_counts(queryset=None):
+    """Пересчитывает comments_count по реальному числу комментариев (вместе с ответами)."""
+    queryset = Post.objects.all() if queryset is None else queryset
+    return queryset.update(comments_count=_count_subquery(Comment))
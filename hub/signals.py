@@ -0,0 +1,99 @@
+# hub/signals.py
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from . import search
+from .models import Comment, Post, Tag
+from .tags import forget_tag
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, raw=False, **kwargs):
+    """Держим поисковый индекс в актуальном состоянии после сохранения поста."""
+    if raw:
+        return
+    search.index_posts([instance])
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    search.remove_posts([instance.pk])
+
+
+# Ник и username автора тоже ищутся. Значение, с которым объект
+# загружен, запоминаем в post_init и переиндексируем посты автора
+# только если оно действительно изменилось: профиль и пользователь
+# сохраняются часто (аватар, last_login, bio), а посты автора — дорого.
+def _remember_indexed(field):
+    def remember(sender, instance, **kwargs):
+        # __dict__, а не getattr: отложенное поле (.only()) не догружаем
+        instance.__dict__[f"_indexed_{field}"] = instance.__dict__.get(field)
+
+    return remember
+
+
+def _indexed_value_changed(instance, field, update_fields):
+    if update_fields is not None and field not in update_fields:
+        return False
+    before = instance.__dict__.get(f"_indexed_{field}")
+    after = instance.__dict__.get(field)
+    instance.__dict__[f"_indexed_{field}"] = after
+    # поле было отложено при загрузке — прежнее значение неизвестно
+    return before is None or before != after
+
+
+post_init.connect(_remember_indexed("nickname"), sender="archive.Profile", weak=False)
+post_init.connect(_remember_indexed("username"), sender=User, weak=False)
+
+
+@receiver(post_save, sender="archive.Profile")
+def reindex_profile_posts(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw or created or not _indexed_value_changed(instance, "nickname", update_fields):
+        return
+    user_id = instance.user_id
+    transaction.on_commit(lambda: search.index_author_posts(user_id))
+
+
+@receiver(post_save, sender=User)
+def reindex_user_posts(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw or created or not _indexed_value_changed(instance, "username", update_fields):
+        return
+    user_id = instance.pk
+    transaction.on_commit(lambda: search.index_author_posts(user_id))
+
+
+@receiver(post_save, sender=Comment)
+def assign_comment_path(sender, instance, created, raw=False, **kwargs):
+    """
+    Материализованный путь известен только после INSERT (в нём id комментария),
+    поэтому дописываем его сразу следующим UPDATE-ом.
+    """
+    if raw or not created or instance.path:
+        return
+
+    parent_path = ""
+    if instance.parent_id:
+        if Comment.parent.is_cached(instance) and instance.parent.path:
+            parent_path = instance.parent.path
+        else:
+            parent_path = (
+                Comment.objects.filter(pk=instance.parent_id).values_list("path", flat=True).first()
+                or ""
+            )
+
+    if len(parent_path) >= Comment.PATH_STEP * Comment.PATH_MAX_DEPTH:
+        # create_comment такие ответы не пропускает; сюда попадает только
+        # сохранение в обход сервиса — parent_id молча не переписываем
+        raise ValueError(f"Ответ глубже {Comment.PATH_MAX_DEPTH} уровней: comment {instance.pk}")
+
+    instance.path = parent_path + Comment.path_segment(instance.pk)
+    Comment.objects.filter(pk=instance.pk).update(path=instance.path)
+
+
+# id тега в LRU TagService устаревает при переименовании и удалении
+post_save.connect(forget_tag, sender=Tag, dispatch_uid="tag-cache-save-hub")
+post_delete.connect(forget_tag, sender=Tag, dispatch_uid="tag-cache-delete-hub")
@@ -0,0 +1,167 @@
+# hub/tags.py
+"""
+Пакетное получение тегов по введённым именам (хештеги постов и проектов,
+теги импортёров).
+
+Вместо get_or_create на каждый тег:
+- сначала in-process LRU имя → id для горячих тегов;
+- остальные — одним SELECT по slug__in / name__in;
+- недостающие — одним bulk_create(ignore_conflicts=True) и тем же SELECT
+  повторно. Конфликт с параллельной вставкой не роняет запрос: строку
+  просто дочитываем.
+
+Совпадение по имени важнее совпадения по slug: тег, уже заведённый
+со slug-ом «c-1» под именем «C#», найдётся по имени. Новое имя, чей
+slug уже занят другим тегом, склеивается с этим тегом — так же, как
+раньше делал get_or_create(slug=...) в PostForm.
+
+Кэш общий на процесс, поэтому при изменении или удалении тега его id
+выкидывается из кэша сигналами (hub/signals.py, archive/signals.py).
+Сигнал срабатывает только в том процессе, где тег удалили, поэтому
+id из кэша перед записью сверяются с БД — в том же SELECT, что ищет
+недостающие имена. Запоминаются id только после коммита: тег,
+созданный в откатившейся транзакции, в кэш не попадёт.
+"""
+import threading
+from collections import OrderedDict
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils.text import slugify
+
+from archive.metrics import cache_result
+
+TAG_CACHE_SIZE = 2048
+
+
+class TagService:
+    def __init__(self, model, cache_size=TAG_CACHE_SIZE):
+        self.model = model
+        self.cache_size = cache_size
+        self.name_length = model._meta.get_field("name").max_length
+        self.slug_length = model._meta.get_field("slug").max_length
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    # --- кэш ---
+    def _cached(self, names):
+        found = {}
+        with self._lock:
+            for name in names:
+                pk = self._cache.get(name)
+                if pk is not None:
+                    self._cache.move_to_end(name)
+                    found[name] = pk
+        cache_result("tags", True, len(found))
+        cache_result("tags", False, len(names) - len(found))
+        return found
+
+    def _remember(self, mapping):
+        if mapping:
+            transaction.on_commit(lambda: self._store(mapping))
+
+    def _store(self, mapping):
+        with self._lock:
+            for name, pk in mapping.items():
+                self._cache[name] = pk
+                self._cache.move_to_end(name)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def forget(self, pk):
+        """Выкидывает из кэша все имена, указывающие на тег pk."""
+        with self._lock:
+            for name in [name for name, cached in self._cache.items() if cached == pk]:
+                del self._cache[name]
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    # --- БД ---
+    def normalize(self, name):
+        return (name or "").strip()[: self.name_length]
+
+    def slug_for(self, name):
+        return slugify(name)[: self.slug_length].strip("-") or name[: self.slug_length]
+
+    def _lookup(self, names, slugs, known_ids=()):
+        """
+        ({имя: id} для names, какие из known_ids ещё есть в БД) одним
+        запросом; имя важнее slug-а.
+        """
+        if not names and not known_ids:
+            return {}, set()
+        by_name, by_slug, existing = {}, {}, set()
+        for pk, name, slug in self.model.objects.filter(
+            Q(name__in=names) | Q(slug__in={slugs[name] for name in names}) | Q(pk__in=known_ids)
+        ).values_list("id", "name", "slug"):
+            by_name[name] = pk
+            by_slug[slug] = pk
+            existing.add(pk)
+        result = {}
+        for name in names:
+            pk = by_name.get(name) or by_slug.get(slugs[name])
+            if pk is not None:
+                result[name] = pk
+        return result, existing
+
+    def resolve(self, names):
+        """
+        {имя: id} для всех непустых имён, в порядке ввода; недостающие
+        теги создаются. Запросов: 1 (всё есть в БД) или 3.
+        """
+        names = list(dict.fromkeys(filter(None, map(self.normalize, names))))
+        if not names:
+            return {}
+
+        result = self._cached(names)
+        missing = [name for name in names if name not in result]
+        slugs = {name: self.slug_for(name) for name in names}
+        found, existing = self._lookup(missing, slugs, set(result.values()))
+
+        stale = [name for name, pk in result.items() if pk not in existing]
+        if stale:
+            # тег удалили в другом процессе — его id не годится для записи
+            for pk in {result.pop(name) for name in stale}:
+                self.forget(pk)
+            more, _ = self._lookup(stale, slugs)
+            found.update(more)
+            missing += stale
+
+        absent = [name for name in missing if name not in found]
+        if absent:
+            self.model.objects.bulk_create(
+                [self.model(name=name, slug=slugs[name]) for name in absent],
+                ignore_conflicts=True,
+            )
+            # ignore_conflicts не возвращает id — дочитываем тем же запросом
+            found.update(self._lookup(absent, slugs)[0])
+        self._remember(found)
+        result.update(found)
+
+        return {name: result[name] for name in names if name in result}
+
+    def ids(self, names):
+        """Уникальные id тегов в порядке ввода (для .set() / .add())."""
+        return list(dict.fromkeys(self.resolve(names).values()))
+
+
+_services = {}
+_services_lock = threading.Lock()
+
+
+def tag_service(model):
+    """Общий на процесс TagService для модели тегов (hub.Tag, archive.Tag)."""
+    service = _services.get(model)
+    if service is None:
+        with _services_lock:
+            service = _services.setdefault(model, TagService(model))
+    return service
+
+
+def forget_tag(sender, instance, **kwargs):
+    """Обработчик post_save / post_delete для моделей тегов."""
+    service = _services.get(sender)
+    if service is not None:
+        service.forget(instance.pk)
@@ -0,0 +1,36 @@
+# hub/testing.py
+"""Общие для тестов hub и archive данные и проверки лент."""
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from .models import Comment, Post, Tag
+
+
+def make_posts(count):
+    """Посты разных авторов с тегом и комментарием — всё, что выводит лента."""
+    User = get_user_model()
+    for i in range(count):
+        author = User.objects.create_user(f"author{i}")
+        author.profile.nickname = f"Автор {i}"
+        author.profile.save()
+        post = Post.objects.create(author=author, title=f"Пост {i}", body="Текст")
+        post.tags.add(Tag.objects.create(name=f"tag{i}", slug=f"tag{i}"))
+        Comment.objects.create(post=post, author=author, body="Комментарий")
+
+
+class FeedQueriesMixin:
+    """
+    Для TestCase ленты постов: число запросов на страницу не зависит от
+    числа постов. feed_url — имя URL ленты, feed_page_size — paginate_by вьюхи.
+    """
+
+    feed_url = None
+    feed_page_size = None
+
+    def assertFeedQueries(self, count, expected):
+        make_posts(count)
+        with self.assertNumQueries(expected):
+            response = self.client.get(reverse(self.feed_url))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["posts"]), min(count, self.feed_page_size))
+        return response
@@ -0,0 +1,127 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from . import pagination, search, threads
+from .models import Comment, Post
+from .services import create_comment, delete_comment
+from .testing import FeedQueriesMixin, make_posts
+
+
+# =========================
+# Лента постов: число запросов не зависит от числа постов
+# =========================
+class PostListQueriesTests(FeedQueriesMixin, TestCase):
+    feed_url = "post_list"
+    feed_page_size = 10
+
+    # посты, теги (prefetch), приблизительный count для пагинации
+    def test_full_page(self):
+        self.assertFeedQueries(12, 3)
+
+    def test_many_pages(self):
+        self.assertFeedQueries(40, 3)
+
+    def test_estimated_page_count_is_marked(self):
+        make_posts(25)
+        with mock.patch.object(pagination, "APPROXIMATE_COUNT_CAP", 15):
+            response = self.client.get(reverse("post_list"))
+        self.assertContains(response, "Страница 1 из ~2")
+
+
+# =========================
+# Счётчик комментариев (hub/services.py, hub/signals.py)
+# =========================
+class CommentCountTests(TestCase):
+    def test_subtree_delete_decrements_once(self):
+        author = get_user_model().objects.create_user("commenter")
+        post = Post.objects.create(author=author, title="Пост", body="Текст")
+        root = create_comment(Comment(post=post, author=author, body="1"))
+        reply = create_comment(Comment(post=post, author=author, body="1.1", parent=root))
+        create_comment(Comment(post=post, author=author, body="1.1.1", parent=reply))
+        create_comment(Comment(post=post, author=author, body="2"))
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(delete_comment(root), 3)
+        updates = [q["sql"] for q in queries if q["sql"].startswith("UPDATE")]
+        self.assertEqual(len(updates), 1)
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+
+
+# =========================
+# Ветка комментариев страницами корней (hub/threads.py)
+# =========================
+class CommentThreadPagingTests(TestCase):
+    def test_page_of_roots_in_two_queries(self):
+        author = get_user_model().objects.create_user("commenter")
+        post = Post.objects.create(author=author, title="Пост", body="Текст")
+        roots = [create_comment(Comment(post=post, author=author, body=f"{i}")) for i in range(5)]
+        for root in roots:
+            create_comment(Comment(post=post, author=author, body=f"{root.body}.1", parent=root))
+        post.refresh_from_db()
+
+        with self.assertNumQueries(2):
+            first = threads.load_thread(post, per_page=2)
+        self.assertEqual([c.body for c in first], ["0", "1"])
+        self.assertEqual([c.children[0].body for c in first], ["0.1", "1.1"])
+        self.assertTrue(first.has_more)
+
+        second = threads.load_thread(post, page=2, per_page=2, after=first.next_after)
+        self.assertEqual([c.body for c in second], ["2", "3"])
+        self.assertEqual(
+            [c.body for c in threads.load_thread(post, page=2, per_page=2)], ["2", "3"]
+        )
+        last = threads.load_thread(post, page=3, per_page=2, after=second.next_after)
+        self.assertEqual([c.body for c in last], ["4"])
+        self.assertFalse(last.has_more)
+
+
+class CommentDepthTests(TestCase):
+    def test_too_deep_reply_is_rejected(self):
+        author = get_user_model().objects.create_user("commenter")
+        post = Post.objects.create(author=author, title="Пост", body="Текст")
+        parent = None
+        for depth in range(Comment.PATH_MAX_DEPTH):
+            parent = create_comment(Comment(post=post, author=author, body=f"{depth}", parent=parent))
+        self.assertEqual(len(parent.path), Comment.PATH_STEP * Comment.PATH_MAX_DEPTH)
+
+        reply = Comment(post=post, author=author, body="глубже", parent=parent)
+        with self.assertRaises(ValidationError):
+            create_comment(reply)
+        self.assertFalse(Comment.objects.filter(body="глубже").exists())
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, Comment.PATH_MAX_DEPTH)
+
+
+# =========================
+# Поисковый индекс: посты автора переиндексируются только при смене имени
+# =========================
+class AuthorReindexTests(TestCase):
+    def test_only_real_name_change_reindexes(self):
+        user = get_user_model().objects.create_user("writer")
+        with mock.patch.object(search, "index_author_posts") as reindex:
+            with self.captureOnCommitCallbacks(execute=True):
+                user.profile.bio = "О себе"
+                user.profile.save()
+                user.save()
+            reindex.assert_not_called()
+
+            with self.captureOnCommitCallbacks(execute=True):
+                user.profile.nickname = "Писатель"
+                user.profile.save()
+                user.username = "writer2"
+                user.save()
+            self.assertEqual(reindex.call_count, 2)
+
+    def test_search_ranks_title_above_body(self):
+        author = get_user_model().objects.create_user("author")
+        Post.objects.create(author=author, title="Другое", body="django в тексте")
+        Post.objects.create(author=author, title="Django", body="Текст")
+        found = search.search_posts(Post.objects.all(), "django")
+        self.assertEqual([post.title for post in found], ["Django", "Другое"])
@@ -0,0 +1,194 @@
+# hub/threads.py
+"""
+Загрузка ветки комментариев поста страницами корневых комментариев.
+
+Страница корней выбирается в SQL (parent IS NULL, ORDER BY path, LIMIT,
+курсор ?after=<id последнего корня>). Ветки этих корней идут в порядке
+пути подряд, поэтому читаются вторым запросом — одним диапазоном
+[путь первого корня, next_path последнего) по индексу (post, path),
+вместе с автором и профилем. Дерево собирается в памяти за O(n):
+каждому комментарию проставляются .children (ответы), .depth (уровень
+вложенности) и .hidden_replies (сколько ответов скрыто из-за
+ограничения глубины).
+"""
+from .models import Comment
+
+DEFAULT_MAX_DEPTH = 6
+DEFAULT_ROOTS_PER_PAGE = 30
+
+
+class CommentThread:
+    """Страница корневых комментариев с уже собранными ветками ответов."""
+
+    def __init__(self, comments, total, page, per_page, has_more, root=None):
+        self.comments = comments
+        self.total = total
+        self.page = page
+        self.per_page = per_page
+        self.has_more = has_more
+        self.root = root
+
+    @property
+    def next_page(self):
+        return self.page + 1 if self.has_more else None
+
+    @property
+    def next_after(self):
+        """Курсор следующей страницы: id последнего корня этой."""
+        return self.comments[-1].pk if self.has_more and self.comments else None
+
+    def __iter__(self):
+        return iter(self.comments)
+
+    def __len__(self):
+        return len(self.comments)
+
+    def __bool__(self):
+        return bool(self.comments)
+
+
+def _with_authors(qs):
+    return list(qs.select_related("author", "author__profile").order_by("path"))
+
+
+def _fetch_subtree(post, root_id):
+    """Ветка одного комментария — диапазон по индексу (post, path), без рекурсии по parent."""
+    qs = Comment.objects.filter(post=post)
+    root_path = qs.filter(pk=root_id).values_list("path", flat=True).first()
+    if not root_path:
+        return []
+    return _with_authors(qs.filter(path__gte=root_path, path__lt=Comment.next_path(root_path)))
+
+
+def _fetch_roots_page(post, offset, limit, after=None):
+    """
+    Пути limit + 1 корней (лишний — признак следующей страницы) и все
+    комментарии веток первых limit из них.
+    """
+    roots = Comment.objects.filter(post=post, parent__isnull=True)
+    if after is not None:
+        # корень — один сегмент пути, порядок путей корней = порядок id
+        roots = roots.filter(path__gt=Comment.path_segment(after))
+        offset = 0
+    roots = roots.order_by("path").values_list("path", flat=True)
+    paths = list(roots[offset:offset + limit + 1])
+    has_more = len(paths) > limit
+    paths = paths[:limit]
+    if not paths:
+        return [], has_more
+    comments = _with_authors(
+        Comment.objects.filter(
+            post=post, path__gte=paths[0], path__lt=Comment.next_path(paths[-1])
+        )
+    )
+    return comments, has_more
+
+
+def build_tree(comments):
+    """
+    Собирает дерево из плоского списка. Возвращает (roots, by_id).
+    Комментарии, чей родитель не попал в выборку, считаются корневыми.
+    """
+    by_id = {}
+    for comment in comments:
+        comment.children = []
+        comment.depth = 0
+        comment.hidden_replies = 0
+        by_id[comment.pk] = comment
+
+    roots = []
+    for comment in comments:
+        parent = by_id.get(comment.parent_id)
+        if parent is None:
+            roots.append(comment)
+        else:
+            parent.children.append(comment)
+    return roots, by_id
+
+
+def _subtree_size(comment):
+    size = 0
+    stack = list(comment.children)
+    while stack:
+        node = stack.pop()
+        size += 1
+        stack.extend(node.children)
+    return size
+
+
+def limit_depth(roots, max_depth):
+    """
+    Проставляет depth и обрезает ветки глубже max_depth (0 — только корни).
+    У обрезанного узла hidden_replies = число скрытых потомков.
+    """
+    stack = [(root, 0) for root in roots]
+    while stack:
+        node, depth = stack.pop()
+        node.depth = depth
+        if max_depth is not None and depth >= max_depth and node.children:
+            node.hidden_replies = _subtree_size(node)
+            node.children = []
+            continue
+        stack.extend((child, depth + 1) for child in node.children)
+
+
+def load_thread(
+    post,
+    *,
+    page=1,
+    per_page=DEFAULT_ROOTS_PER_PAGE,
+    max_depth=DEFAULT_MAX_DEPTH,
+    root_id=None,
+    after=None,
+):
+    """
+    Возвращает CommentThread для поста.
+
+    page / per_page — «загрузить ещё» по корневым комментариям; after —
+    курсор (id последнего корня прошлой страницы), с ним OFFSET не нужен,
+    page тогда только номер для показа;
+    root_id — показать только ветку конкретного комментария (например,
+    продолжение обрезанной по глубине ветки); глубина считается от неё.
+    """
+    page = max(int(page or 1), 1)
+    root = None
+    if root_id is not None:
+        _, by_id = build_tree(_fetch_subtree(post, root_id))
+        root = by_id.get(root_id)
+        roots = [root] if root is not None else []
+        has_more = False
+    else:
+        comments, has_more = _fetch_roots_page(post, (page - 1) * per_page, per_page, after)
+        roots, _ = build_tree(comments)
+    limit_depth(roots, max_depth)
+
+    return CommentThread(
+        comments=roots,
+        total=post.comments_count,
+        page=page,
+        per_page=per_page,
+        has_more=has_more,
+        root=root,
+    )
+
+
+def _int_param(request, name, default=None):
+    value = request.GET.get(name)
+    try:
+        return int(value) if value else default
+    except ValueError:
+        return default
+
+
+def load_thread_for_request(post, request, **kwargs):
+    """
+    load_thread с параметрами из query string: ?page=2&after=<id корня>,
+    ?thread=<id комментария>.
+    """
+    return load_thread(
+        post,
+        page=_int_param(request, "page", 1),
+        root_id=_int_param(request, "thread"),
+        after=_int_param(request, "after"),
+        **kwargs,
+    )
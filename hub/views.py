@@ -3,10 +3,14 @@ from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.db.models import Q
 from django.shortcuts import redirect, get_object_or_404
 from django.urls import reverse_lazy
-from django.utils.text import slugify
 from django.views.generic import CreateView, DetailView, ListView
 from django.views.generic.edit import FormView, DeleteView
-from django.http import FileResponse, Http404
+from django.http import Http404
+from django.views.decorators.http import require_safe
+
+from archive.downloads import serve_file
+from archive.linkcheck import link_status_filter
+from archive.models import LinkStatus
 
 from .forms import (
     PostForm,
@@ -16,13 +20,17 @@ from .forms import (
     ProjectCommentForm,
 )
 from .models import Post, Project, ProjectComment, ProjectPost, Comment
+from .pagination import CursorPaginationMixin
+from .services import create_comment
+from .threads import load_thread_for_request
 
 
-class ProjectListView(ListView):
+class ProjectListView(CursorPaginationMixin, ListView):
     model = Project
     template_name = "hub/project_list.html"
     context_object_name = "projects"
     paginate_by = 12
+    paginate_count = "approximate"
 
     def get_queryset(self):
         qs = (
@@ -32,24 +40,30 @@ class ProjectListView(ListView):
         )
         q = self.request.GET.get("q")
         owner = self.request.GET.get("owner")
+        links = self.request.GET.get("links")
         if q:
             qs = qs.filter(Q(title__icontains=q) | Q(short_description__icontains=q))
         if owner:
             qs = qs.filter(owner__username__iexact=owner)
+        if links:
+            qs = qs.filter(link_status_filter(links))
         return qs
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
         ctx["q"] = self.request.GET.get("q", "")
         ctx["owner"] = self.request.GET.get("owner", "")
+        ctx["links"] = self.request.GET.get("links", "")
+        ctx["link_status_choices"] = LinkStatus.choices
         return ctx
 
 
-class MyProjectsView(LoginRequiredMixin, ListView):
+class MyProjectsView(LoginRequiredMixin, CursorPaginationMixin, ListView):
     model = Project
     template_name = "hub/project_list.html"
     context_object_name = "projects"
     paginate_by = 12
+    paginate_count = "approximate"
 
     def get_queryset(self):
         return (
@@ -91,14 +105,20 @@ class ProjectCreateView(LoginRequiredMixin, CreateView):
     form_class = ProjectForm
     success_url = reverse_lazy("project_list")
 
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs["owner"] = self.request.user
+        return kwargs
+
     def form_valid(self, form):
         project = form.save(commit=False)
         project.owner = self.request.user
-        if not form.cleaned_data.get("slug"):
-            project.slug = slugify(project.title)[:170] or "project"
-        project.generate_unique_slug()
-        project.save()
+        # введённый slug — основа, при занятости к нему добавится суффикс
+        project.save_with_unique_slug(form.cleaned_data.get("slug") or project.title)
         form.save_m2m()
+        tags = form.parse_tags()
+        if tags:
+            project.tags.add(*tags)
         messages.success(self.request, "Проект создан и опубликован.")
         return redirect(self.success_url)
 
@@ -120,22 +140,26 @@ class ProjectDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
         return redirect(self.get_object().get_absolute_url())
 
 
+@require_safe
 def project_download(request, slug):
-    project = get_object_or_404(Project, slug=slug)
+    project = get_object_or_404(Project.objects.only("id", "attachment"), slug=slug)
     if not project.attachment:
         raise Http404("Файл не прикреплён")
-    return FileResponse(
-        project.attachment.open("rb"),
+    return serve_file(
+        request,
+        project.attachment.storage,
+        project.attachment.name,
         as_attachment=True,
-        filename=project.attachment.name.split("/")[-1],
+        count=("hub.Project", "pk", project.pk),
     )
 
 
-class ProjectPostListView(ListView):
+class ProjectPostListView(CursorPaginationMixin, ListView):
     model = ProjectPost
     template_name = "hub/project_feed.html"
     context_object_name = "posts"
     paginate_by = 10
+    paginate_count = "approximate"
 
     def get_queryset(self):
         qs = (
@@ -212,14 +236,19 @@ class ProjectPostDetailView(FormView):
         return super().form_valid(form)
 
 
-class PostListView(ListView):
+class PostListView(CursorPaginationMixin, ListView):
     model = Post
     template_name = "hub/post_list.html"
     context_object_name = "posts"
     paginate_by = 10
+    paginate_count = "approximate"
 
     def get_queryset(self):
-        return Post.objects.select_related("author").order_by("-created_at")
+        return (
+            Post.objects.select_related("author", "author__profile")
+            .prefetch_related("tags")
+            .order_by("-created_at")
+        )
 
 
 # Универсальные посты (без проекта) с комментариями
@@ -231,15 +260,17 @@ class PostDetailView(FormView):
         from django.shortcuts import get_object_or_404
 
         self.post = get_object_or_404(
-            Post.objects.select_related("author").prefetch_related("comments__author"),
+            Post.objects.select_related("author", "author__profile"),
             pk=kwargs["pk"],
         )
         return super().dispatch(request, *args, **kwargs)
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
+        thread = load_thread_for_request(self.post, self.request)
         ctx["post"] = self.post
-        ctx["comments"] = self.post.comments.all()
+        ctx["thread"] = thread
+        ctx["comments"] = thread.comments
         return ctx
 
     def form_valid(self, form):
@@ -249,7 +280,7 @@ class PostDetailView(FormView):
         comment = form.save(commit=False)
         comment.post = self.post
         comment.author = self.request.user
-        comment.save()
+        create_comment(comment)
         messages.success(self.request, "Комментарий добавлен.")
         return super().form_valid(form)
 
@@ -267,6 +298,9 @@ class PostCreateView(LoginRequiredMixin, CreateView):
         post = form.save(commit=False)
         post.author = self.request.user
         post.save()
+        tags = form.parse_tags()
+        if tags:
+            post.tags.set(tags)
         messages.success(self.request, "Пост опубликован.")
         return redirect(self.success_url)
 
@@ -3,16 +3,24 @@
 Парсер репозитория professional-programming от charlax.
 
 Скрипт обходит все .md файлы, извлекает элементы списков с Markdown-ссылками
-и сохраняет структуру в JSON и CSV.
+и сохраняет структуру в JSON, CSV и (по желанию) NDJSON.
+
+Повторные запуски инкрементальные: манифест хранит sha256 каждого файла
+и уже разобранные из него ресурсы, так что заново парсятся только
+изменившиеся файлы. С --jobs N файлы разбираются в пуле процессов;
+id всё равно назначаются в порядке отсортированных путей, поэтому
+результат не зависит от числа воркеров.
 """
 
 import argparse
 import csv
+import hashlib
 import json
 import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, Iterable, List, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 
 HEADING_RE = re.compile(r"^(#{1,6})\s+(.*)")
@@ -21,6 +29,22 @@ RESOURCE_RE = re.compile(r"^\s*[-*+]\s+\[(.+?)\]\((.+?)\)\s*(?:[-–—]\s*(.*))
 DEFAULT_REPO_DIR = "./professional-programming"
 DEFAULT_JSON_OUT = "professional_programming_resources.json"
 DEFAULT_CSV_OUT = "professional_programming_resources.csv"
+DEFAULT_MANIFEST = "professional_programming_manifest.json"
+
+MANIFEST_VERSION = 1
+
+CSV_FIELDNAMES = [
+    "id",
+    "title",
+    "url",
+    "description",
+    "category_h1",
+    "category_h2",
+    "category_h3",
+    "category_path",
+    "file_path",
+    "raw_line",
+]
 
 
 def parse_args() -> argparse.Namespace:
@@ -40,6 +64,27 @@ def parse_args() -> argparse.Namespace:
         default=DEFAULT_CSV_OUT,
         help="Путь для вывода CSV (по умолчанию: %(default)s)",
     )
+    parser.add_argument(
+        "--ndjson-out",
+        default="",
+        help="Путь для вывода NDJSON — по объекту на строку, пишется по мере разбора",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Сколько процессов разбирают файлы параллельно (по умолчанию: %(default)s)",
+    )
+    parser.add_argument(
+        "--manifest",
+        default=DEFAULT_MANIFEST,
+        help="Манифест для инкрементального режима (по умолчанию: %(default)s)",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Игнорировать манифест и разобрать все файлы заново",
+    )
     return parser.parse_args()
 
 
@@ -77,16 +122,20 @@ def extract_resource(line: str) -> Tuple[str, str, str]:
     return title.strip(), url.strip(), desc
 
 
-def parse_markdown_file(path: Path, repo_dir: Path, start_id: int) -> Tuple[List[Dict], int]:
+def iter_lines(path: Path) -> Iterator[str]:
+    """Читает файл построчно, не загружая его целиком."""
+    with path.open(encoding="utf-8", errors="ignore", newline="") as f:
+        for line in f:
+            yield line.rstrip("\r\n")
+
+
+def parse_markdown_file(path: Path, repo_dir: Path) -> List[Dict]:
+    """Ресурсы одного файла (без id — их назначает main в порядке файлов)."""
     resources: List[Dict] = []
     heading_stack: List[str] = []
+    file_path = str(path.relative_to(repo_dir).as_posix())
 
-    try:
-        lines = path.read_text(encoding="utf-8").splitlines()
-    except UnicodeDecodeError:
-        lines = path.read_text(encoding="utf-8", errors="ignore").splitlines()
-
-    for line in lines:
+    for line in iter_lines(path):
         heading_match = HEADING_RE.match(line)
         if heading_match:
             level = len(heading_match.group(1))
@@ -103,7 +152,6 @@ def parse_markdown_file(path: Path, repo_dir: Path, start_id: int) -> Tuple[List
             category_path = " / ".join([h for h in heading_stack if h])
             resources.append(
                 {
-                    "id": start_id + len(resources),
                     "title": title,
                     "url": url,
                     "description": description,
@@ -111,58 +159,237 @@ def parse_markdown_file(path: Path, repo_dir: Path, start_id: int) -> Tuple[List
                     "category_h2": category_h2,
                     "category_h3": category_h3,
                     "category_path": category_path,
-                    "file_path": str(path.relative_to(repo_dir).as_posix()),
-                    "raw_line": line.rstrip("\n"),
+                    "file_path": file_path,
+                    "raw_line": line,
                 }
             )
 
-    return resources, start_id + len(resources)
+    return resources
 
 
-def write_json(resources: List[Dict], json_path: Path) -> None:
-    json_path.write_text(json.dumps(resources, ensure_ascii=False, indent=2), encoding="utf-8")
+def file_digest(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
 
 
-def write_csv(resources: List[Dict], csv_path: Path) -> None:
-    fieldnames = [
-        "id",
-        "title",
-        "url",
-        "description",
-        "category_h1",
-        "category_h2",
-        "category_h3",
-        "category_path",
-        "file_path",
-        "raw_line",
-    ]
-    with csv_path.open("w", encoding="utf-8", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(resources)
+def parse_job(args: Tuple[str, str]) -> Tuple[str, List[Dict]]:
+    """Задача для пула процессов: (путь, корень) → (sha256, ресурсы)."""
+    path, repo_dir = Path(args[0]), Path(args[1])
+    return file_digest(path), parse_markdown_file(path, repo_dir)
+
+
+# ---------- манифест ----------
+def load_manifest(path: Path) -> Dict:
+    """
+    {"version", "outputs": {формат: путь}, "files": {относительный путь:
+    {"sha256", "size", "mtime_ns", "resources"}}}.
+    """
+    empty = {"version": MANIFEST_VERSION, "outputs": {}, "files": {}}
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return empty
+    if data.get("version") != MANIFEST_VERSION:
+        return empty
+    return data
+
+
+def save_manifest(path: Path, files: Dict[str, Dict], outputs: Dict[str, str]) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(
+        json.dumps(
+            {"version": MANIFEST_VERSION, "outputs": outputs, "files": files},
+            ensure_ascii=False,
+        ),
+        encoding="utf-8",
+    )
+    os.replace(tmp, path)
+
+
+def is_unchanged(path: Path, entry: Optional[Dict]) -> Tuple[bool, bool]:
+    """
+    Сначала сравнивает size + mtime (без чтения файла), затем sha256.
+    Возвращает (содержимое не изменилось, stat() совпал).
+    """
+    if not entry:
+        return False, False
+    stat = path.stat()
+    if entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns:
+        return True, True
+    return file_digest(path) == entry.get("sha256"), False
+
+
+_encode = json.JSONEncoder(ensure_ascii=False).encode
+
+
+def _json_item(resource: Dict) -> str:
+    """
+    Элемент массива в том же виде, что у json.dumps(список, indent=2).
+    Записи плоские, поэтому собираем отступы сами: с indent json
+    переключается на медленный кодировщик на чистом Python.
+    """
+    fields = ",\n".join(f"    {_encode(key)}: {_encode(value)}" for key, value in resource.items())
+    return "  {\n" + fields + "\n  }"
+
+
+class OutputWriter:
+    """
+    Потоковая запись результатов во все выбранные форматы сразу.
+    Файлы пишутся во временные и подменяются атомарно в close(),
+    так что прерванный запуск не портит прошлую выгрузку.
+    """
+
+    def __init__(self, json_path: Optional[Path], csv_path: Optional[Path], ndjson_path: Optional[Path]):
+        self._files = []
+        self._json = self._open(json_path)
+        self._csv_file = self._open(csv_path)
+        self._ndjson = self._open(ndjson_path)
+        self._csv = None
+        self._json_first = True
+        self.count = 0
+
+        if self._json:
+            self._json.write("[")
+        if self._csv_file:
+            self._csv = csv.DictWriter(self._csv_file, fieldnames=CSV_FIELDNAMES)
+            self._csv.writeheader()
+
+    def _open(self, path: Optional[Path]):
+        if path is None:
+            return None
+        tmp = path.with_name(path.name + ".tmp")
+        f = tmp.open("w", encoding="utf-8", newline="")
+        self._files.append((f, tmp, path))
+        return f
+
+    def write(self, resource: Dict) -> None:
+        self.count += 1
+        if self._json:
+            self._json.write(("\n" if self._json_first else ",\n") + _json_item(resource))
+            self._json_first = False
+        if self._csv:
+            self._csv.writerow(resource)
+        if self._ndjson:
+            self._ndjson.write(_encode(resource) + "\n")
+
+    def flush(self) -> None:
+        """Вызывается после каждого файла: NDJSON можно читать, пока идёт разбор."""
+        if self._ndjson:
+            self._ndjson.flush()
+
+    def close(self) -> None:
+        if self._json:
+            self._json.write("]" if self._json_first else "\n]")
+        for f, tmp, path in self._files:
+            f.close()
+            os.replace(tmp, path)
+
+
+def _out_path(value: str) -> Optional[Path]:
+    return Path(value).expanduser().resolve() if value else None
+
+
+def plan_files(md_files: List[Path], repo_dir: Path, known: Dict[str, Dict]) -> List[Tuple[Path, str, bool, bool]]:
+    """[(путь, относительный путь, не изменился, stat() совпал)] в порядке md_files."""
+    plan = []
+    for md_file in md_files:
+        rel = md_file.relative_to(repo_dir).as_posix()
+        unchanged, same_stat = is_unchanged(md_file, known.get(rel))
+        plan.append((md_file, rel, unchanged, same_stat))
+    return plan
+
+
+def iter_parsed(
+    plan: List[Tuple[Path, str, bool, bool]], repo_dir: Path, known: Dict[str, Dict], jobs: int
+) -> Iterator[Tuple[str, Dict]]:
+    """
+    Отдаёт (относительный путь, запись манифеста) строго в порядке plan.
+    Неизменившиеся файлы берутся из манифеста, остальные разбираются —
+    при jobs > 1 в пуле процессов; executor.map сохраняет порядок, поэтому
+    запись результатов начинается, как только готов первый файл.
+    """
+    to_parse = [(str(md_file), str(repo_dir)) for md_file, _, unchanged, _ in plan if not unchanged]
+
+    executor = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 and len(to_parse) > 1 else None
+    try:
+        if executor:
+            results = executor.map(parse_job, to_parse, chunksize=max(1, len(to_parse) // (jobs * 4)))
+        else:
+            results = map(parse_job, to_parse)
+
+        for md_file, rel, unchanged, _ in plan:
+            stat = md_file.stat()
+            if unchanged:
+                # mtime мог смениться при том же содержимом — обновляем,
+                # чтобы в следующий раз снова хватило stat()
+                yield rel, dict(known[rel], size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+                continue
+            digest, resources = next(results)
+            yield rel, {
+                "sha256": digest,
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "resources": resources,
+            }
+    finally:
+        if executor:
+            executor.shutdown(cancel_futures=True)
 
 
 def main() -> None:
     args = parse_args()
     repo_dir = Path(args.repo_dir).expanduser().resolve()
-    json_out = Path(args.json_out).expanduser().resolve()
-    csv_out = Path(args.csv_out).expanduser().resolve()
+    manifest_path = Path(args.manifest).expanduser().resolve()
 
     if not repo_dir.exists():
         raise SystemExit(f"Repo directory not found: {repo_dir}")
-
-    all_resources: List[Dict] = []
+    if args.jobs < 1:
+        raise SystemExit("--jobs must be >= 1")
+
+    outputs = {
+        label: str(_out_path(value))
+        for label, value in (("JSON", args.json_out), ("CSV", args.csv_out), ("NDJSON", args.ndjson_out))
+        if value
+    }
+    manifest = load_manifest(manifest_path)
+    known = {} if args.full else manifest["files"]
+
+    md_files = sorted(iter_markdown_files(repo_dir))
+    plan = plan_files(md_files, repo_dir, known)
+    parsed = sum(1 for _, _, unchanged, _ in plan if not unchanged)
+
+    nothing_changed = (
+        not parsed
+        and len(plan) == len(known)
+        and manifest["outputs"] == outputs
+        and all(Path(path).exists() for path in outputs.values())
+    )
+    if nothing_changed:
+        if not all(same_stat for _, _, _, same_stat in plan):
+            save_manifest(manifest_path, dict(iter_parsed(plan, repo_dir, known, 1)), outputs)
+        print(f"Nothing changed in {repo_dir}: {len(plan)} files, outputs are up to date")
+        return
+
+    writer = OutputWriter(*(_out_path(value) for value in (args.json_out, args.csv_out, args.ndjson_out)))
+    new_manifest: Dict[str, Dict] = {}
     current_id = 1
-
-    for md_file in sorted(iter_markdown_files(repo_dir)):
-        file_resources, current_id = parse_markdown_file(md_file, repo_dir, current_id)
-        all_resources.extend(file_resources)
-
-    write_json(all_resources, json_out)
-    write_csv(all_resources, csv_out)
-    print(f"Parsed {len(all_resources)} resources from {repo_dir}")
-    print(f"JSON saved to: {json_out}")
-    print(f"CSV saved to: {csv_out}")
+    for rel, entry in iter_parsed(plan, repo_dir, known, args.jobs):
+        new_manifest[rel] = entry
+        for resource in entry["resources"]:
+            writer.write({"id": current_id, **resource})
+            current_id += 1
+        writer.flush()
+    writer.close()
+    # удалённые файлы выпадают из манифеста сами
+    save_manifest(manifest_path, new_manifest, outputs)
+
+    print(f"Parsed {writer.count} resources from {repo_dir}")
+    print(f"Files: {parsed} parsed, {len(plan) - parsed} unchanged (from manifest)")
+    for label, path in outputs.items():
+        print(f"{label} saved to: {path}")
 
 
 if __name__ == "__main__":
@@ -1,6 +1,10 @@
 import asyncio
+import gzip
 import json
+import os
 import re
+import shutil
+import time
 from datetime import datetime
 
 from telethon import TelegramClient, events
@@ -10,6 +14,14 @@ api_id = 29724408   # твой api_id
 api_hash = "d3dd6dc57205144410539b2abab89fc2"  # не забудь потом сменить на новый
 session_name = "one_channel_session"
 output_file = "devs_storage_messages.jsonl"
+checkpoint_file = "devs_storage_checkpoint.json"   # последний записанный msg_id
+
+# запись в файл
+flush_interval = 2.0          # сек — как часто сбрасывать буфер на диск
+flush_batch = 1000            # или раньше, если накопилось столько сообщений
+queue_size = 10000            # больше — выгрузка ждёт диск (backpressure)
+rotate_bytes = 100 * 1024 * 1024   # ротация файла по размеру, 0 — не ротировать
+gzip_rotated = True           # сжимать ротированные файлы
 
 # канал можно указать так:
 target_channel = -1001427475948   # ИЛИ так: "@devs_storage"
@@ -17,7 +29,7 @@ target_channel = -1001427475948   # ИЛИ так: "@devs_storage"
 
 
 # Регулярка для поиска всех http/https ссылок в тексте
-URL_REGEX = re.compile(r"(https?://[^\\s]+)")
+URL_REGEX = re.compile(r"(https?://\S+)")
 
 
 def extract_links(text: str):
@@ -36,16 +48,148 @@ def extract_links(text: str):
     return cleaned
 
 
-def write(data: dict):
-    """Записываем одну строку JSON в файл."""
-    with open(output_file, "a", encoding="utf-8") as f:
-        f.write(json.dumps(data, ensure_ascii=False) + "\n")
-
-
-async def export_history(client: TelegramClient, channel):
-    print("Начинаю выгрузку ВСЕХ сообщений канала...")
-
-    async for msg in client.iter_messages(channel, reverse=True):
+# ========= ЗАПИСЬ =========
+def load_checkpoint() -> int:
+    """Последний msg_id, который точно лежит в файле (0 — начать с начала)."""
+    try:
+        with open(checkpoint_file, encoding="utf-8") as f:
+            return int(json.load(f).get("last_msg_id", 0))
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def save_checkpoint(last_msg_id: int):
+    tmp = checkpoint_file + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"last_msg_id": last_msg_id, "saved_at": datetime.utcnow().isoformat()}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, checkpoint_file)
+
+
+class JsonlWriter:
+    """
+    Буферизованная запись JSONL из асинхронного кода.
+
+    Сообщения кладутся в ограниченную очередь, фоновая задача пачками
+    дописывает их в один открытый файл (сама запись — в отдельном потоке,
+    чтобы не блокировать event loop) и после каждой пачки сохраняет
+    checkpoint. При превышении rotate_bytes файл переименовывается
+    в <имя>.<дата-время>.jsonl и при gzip_rotated сжимается.
+    Если фоновая запись упала, put() и close() поднимают её ошибку,
+    а не ждут вечно места в очереди.
+    """
+
+    def __init__(self, path: str, last_msg_id: int = 0):
+        self.path = path
+        self.last_msg_id = last_msg_id
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self._file = None
+        self._task = None
+
+    async def start(self):
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._task = asyncio.create_task(self._run())
+
+    def _raise_if_stopped(self):
+        """Фоновая задача записи умерла — её исключение поднимается у вызывающего."""
+        if self._task is None or not self._task.done():
+            return
+        error = None if self._task.cancelled() else self._task.exception()
+        if error is not None:
+            raise RuntimeError("запись JSONL остановилась с ошибкой") from error
+        raise RuntimeError("JsonlWriter уже закрыт")
+
+    async def _enqueue(self, item):
+        self._raise_if_stopped()
+        if not self.queue.full():
+            self.queue.put_nowait(item)
+            return
+        # очередь полна: ждём место, но не дольше, чем живёт писатель —
+        # иначе после его падения put() висел бы вечно
+        put = asyncio.ensure_future(self.queue.put(item))
+        await asyncio.wait({put, self._task}, return_when=asyncio.FIRST_COMPLETED)
+        if not put.done():
+            put.cancel()
+            self._raise_if_stopped()
+
+    async def put(self, data: dict):
+        await self._enqueue(data)
+
+    async def _run(self):
+        closing = False
+        while not closing:
+            batch = []
+            deadline = time.monotonic() + flush_interval
+            while len(batch) < flush_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:   # сигнал от close()
+                    closing = True
+                    break
+                batch.append(item)
+            if batch:
+                await asyncio.to_thread(self._write_batch, batch)
+
+    def _write_batch(self, batch):
+        lines = "".join(json.dumps(data, ensure_ascii=False) + "\n" for data in batch)
+        if rotate_bytes and self._file.tell() and self._file.tell() + len(lines) > rotate_bytes:
+            self._rotate()
+        self._file.write(lines)
+        self._file.flush()
+        # checkpoint — только после того, как строки ушли в файл
+        self.last_msg_id = max([self.last_msg_id] + [data["msg_id"] for data in batch])
+        save_checkpoint(self.last_msg_id)
+
+    def _rotate(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+
+        stem, ext = os.path.splitext(self.path)
+        # микросекунды в имени: при частой ротации файлы не перезапишут друг друга,
+        # а сортировка по имени совпадает с порядком записи
+        rotated = f"{stem}.{datetime.utcnow():%Y%m%d-%H%M%S-%f}{ext}"
+        os.replace(self.path, rotated)
+        if gzip_rotated:
+            with open(rotated, "rb") as src, gzip.open(rotated + ".gz", "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(rotated)
+
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    async def close(self):
+        """
+        Дописывает очередь до конца и делает fsync. Если запись упала,
+        файл всё равно закрывается, а ошибка поднимается дальше.
+        """
+        if self._task is None:
+            return
+        try:
+            if not self._task.done():
+                await self._enqueue(None)
+            await self._task
+        finally:
+            self._task = None
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+
+
+async def export_history(client: TelegramClient, channel, writer: JsonlWriter):
+    # продолжаем с последнего записанного сообщения
+    min_id = writer.last_msg_id
+    if min_id:
+        print(f"Продолжаю выгрузку после msg_id={min_id}...")
+    else:
+        print("Начинаю выгрузку ВСЕХ сообщений канала...")
+
+    async for msg in client.iter_messages(channel, reverse=True, min_id=min_id):
         text = msg.message or msg.raw_text or ""
         links = extract_links(text)
 
@@ -58,7 +202,7 @@ async def export_history(client: TelegramClient, channel):
             "reply_to": msg.reply_to_msg_id if msg.reply_to_msg_id else None,
             "links": links,   # <--- вот здесь список ссылок из текста
         }
-        write(data)
+        await writer.put(data)
 
     print("История канала выгружена.")
 
@@ -70,29 +214,36 @@ async def main():
     # получаем entity канала
     channel = await client.get_entity(target_channel)
 
-    # 1) выгружаем старые сообщения
-    await export_history(client, channel)
-
-    # 2) слушаем новые сообщения
-    @client.on(events.NewMessage(chats=channel))
-    async def handler(event: events.NewMessage.Event):
-        msg = event.message
-        text = msg.message or msg.raw_text or ""
-        links = extract_links(text)
-
-        data = {
-            "type": "new",
-            "msg_id": msg.id,
-            "date": datetime.utcnow().isoformat(),
-            "from_id": getattr(msg.from_id, "user_id", None) if msg.from_id else None,
-            "text": text,
-            "links": links,
-        }
-        write(data)
-        print("Новое сообщение:", data["text"][:80], "| links:", links)
-
-    print("История выгружена. Слушаю новые сообщения канала...")
-    await client.run_until_disconnected()
+    writer = JsonlWriter(output_file, load_checkpoint())
+    await writer.start()
+
+    # close() — и при ошибке выгрузки истории: иначе буфер не попадёт в файл
+    try:
+        # 1) выгружаем старые сообщения
+        await export_history(client, channel, writer)
+
+        # 2) слушаем новые сообщения
+        @client.on(events.NewMessage(chats=channel))
+        async def handler(event: events.NewMessage.Event):
+            msg = event.message
+            text = msg.message or msg.raw_text or ""
+            links = extract_links(text)
+
+            data = {
+                "type": "new",
+                "msg_id": msg.id,
+                "date": datetime.utcnow().isoformat(),
+                "from_id": getattr(msg.from_id, "user_id", None) if msg.from_id else None,
+                "text": text,
+                "links": links,
+            }
+            await writer.put(data)
+            print("Новое сообщение:", data["text"][:80], "| links:", links)
+
+        print("История выгружена. Слушаю новые сообщения канала...")
+        await client.run_until_disconnected()
+    finally:
+        await writer.close()
 
 
 if __name__ == "__main__":